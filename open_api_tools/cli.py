@@ -0,0 +1,494 @@
+# -*- coding: utf-8 -*-
+"""Command-line interface for testing an API against its schema."""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import sys
+from typing import Dict, List, Union
+from termcolor import colored
+
+from open_api_tools.common.load_schema import load_schema
+from open_api_tools.common.sessions import SessionConfig, SessionManager
+from open_api_tools.common.sharding import parse_shard
+from open_api_tools.common.traffic_archive import TrafficRecorder
+from open_api_tools.common.traffic_logs import LOG_FORMATS
+from open_api_tools.test.full_test import async_full_test, full_test
+from open_api_tools.test.proxy import ProxyStats, run_proxy
+from open_api_tools.test.replay import ReplayResult, replay
+from open_api_tools.test.shard import (
+    ShardResult,
+    merge_shard_results,
+    sharded_full_test,
+)
+from open_api_tools.test.validate_logs import (
+    LogValidationResult,
+    validate_logs,
+)
+
+OUTPUT_FORMATS = ["text", "json"]
+
+
+class SetHeaders:
+    """A `before_request_send` hook that adds headers to every request.
+
+    A class rather than a closure, so that it can be passed to other
+    processes.
+    """
+
+    def __init__(self, headers: Dict[str, str]):
+        """Create the hook.
+
+        Args:
+            headers: Header names and values
+        """
+        self.headers = headers
+
+    def __call__(self, _endpoint_name: str, request):
+        request.headers = {**(request.headers or {}), **self.headers}
+        return request
+
+
+def parse_header(header: str) -> List[str]:
+    """Parse a "Name: value" header."""
+    name, separator, value = header.partition(":")
+    if not separator or not name.strip():
+        raise argparse.ArgumentTypeError(
+            f"Invalid header: {header}. Expected 'Name: value'"
+        )
+    return [name.strip(), value.strip()]
+
+
+def shard_argument(shard: str):
+    """Parse a "i/N" shard definition."""
+    try:
+        return parse_shard(shard)
+    except Exception as error:
+        raise argparse.ArgumentTypeError(str(error))
+
+
+def create_parser() -> argparse.ArgumentParser:
+    """Define the command-line arguments."""
+    parser = argparse.ArgumentParser(
+        prog="open-api-tools",
+        description="Test an API against its OpenAPI schema",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    test = commands.add_parser(
+        "test",
+        help="send generated requests to all endpoints and validate "
+        "the responses",
+    )
+    test.add_argument(
+        "schema",
+        help="path or URL of the OpenAPI schema (YAML or JSON)",
+    )
+    test.add_argument(
+        "--cache-directory",
+        help="cache the parsed schema in this directory",
+    )
+    test.add_argument(
+        "--methods",
+        nargs="+",
+        default=["GET"],
+        metavar="METHOD",
+        help="HTTP methods to test (default: GET)",
+    )
+    test.add_argument(
+        "--max-urls-per-endpoint",
+        type=int,
+        default=50,
+        help="max number of test URLs for any single endpoint "
+        "(default: 50)",
+    )
+    test.add_argument(
+        "--covering-strength",
+        type=int,
+        help="pick test URLs that cover every interaction between this "
+        "many parameters",
+    )
+    test.add_argument(
+        "--failed-request-limit",
+        type=int,
+        default=100,
+        help="stop testing after this many errors (default: 100)",
+    )
+    test.add_argument(
+        "--concurrency",
+        type=int,
+        default=1,
+        help="max number of requests in flight at once (default: 1)",
+    )
+    test.add_argument(
+        "--endpoint-concurrency",
+        type=int,
+        help="max number of requests in flight to a single endpoint",
+    )
+    test.add_argument(
+        "--async",
+        dest="use_async",
+        action="store_true",
+        help="send the requests with asyncio instead of threads",
+    )
+    test.add_argument(
+        "--processes",
+        type=int,
+        help="split the test into shards and run them in this many "
+        "processes",
+    )
+    test.add_argument(
+        "--shard",
+        type=shard_argument,
+        metavar="I/N",
+        help="only send the requests of shard I of N (requires --seed)",
+    )
+    test.add_argument(
+        "--seed",
+        type=int,
+        help="seed for the random test values, to generate the same "
+        "test URLs on every run",
+    )
+    test.add_argument(
+        "--header",
+        type=parse_header,
+        action="append",
+        default=[],
+        metavar="'NAME: VALUE'",
+        help="add a header to every request (can be repeated)",
+    )
+    test.add_argument(
+        "--timeout",
+        type=float,
+        default=60,
+        help="seconds to wait for a response (default: 60)",
+    )
+    test.add_argument(
+        "--retries",
+        type=int,
+        default=0,
+        help="retry failed connections, and 502, 503 and 504 responses "
+        "to requests of idempotent methods, this many times "
+        "(default: 0)",
+    )
+    test.add_argument(
+        "--pool-size",
+        type=int,
+        help="max number of connections to each server "
+        "(default: concurrency, at least 10)",
+    )
+    test.add_argument(
+        "--record",
+        metavar="ARCHIVE",
+        help="store the requests and the responses in this archive, to "
+        "validate them again later with the 'replay' command",
+    )
+    add_output_arguments(test)
+
+    merge = commands.add_parser(
+        "merge", help="combine the result files of the shards of a test"
+    )
+    merge.add_argument(
+        "results", nargs="+", help="result files written with --output"
+    )
+    add_output_arguments(merge)
+
+    replay_command = commands.add_parser(
+        "replay",
+        help="validate the responses stored in an archive, without "
+        "sending any requests",
+    )
+    replay_command.add_argument(
+        "schema",
+        help="path or URL of the OpenAPI schema (YAML or JSON)",
+    )
+    replay_command.add_argument(
+        "archive", help="archive written with 'test --record'"
+    )
+    replay_command.add_argument(
+        "--cache-directory",
+        help="cache the parsed schema in this directory",
+    )
+    add_output_arguments(replay_command)
+
+    logs = commands.add_parser(
+        "validate-logs",
+        help="validate the requests and responses in HAR files and "
+        "access logs",
+    )
+    logs.add_argument(
+        "schema",
+        help="path or URL of the OpenAPI schema (YAML or JSON)",
+    )
+    logs.add_argument("logs", nargs="+", help="log files")
+    logs.add_argument(
+        "--log-format",
+        choices=LOG_FORMATS,
+        help="format of the log files (default: guessed from the "
+        "extension - .har, .jsonl or .ndjson, otherwise an access log)",
+    )
+    logs.add_argument(
+        "--processes",
+        type=int,
+        help="number of processes (default: number of CPUs)",
+    )
+    logs.add_argument(
+        "--batch-size",
+        type=int,
+        default=1000,
+        help="number of log records sent to a process at once "
+        "(default: 1000)",
+    )
+    logs.add_argument(
+        "--cache-directory",
+        help="cache the parsed schema in this directory",
+    )
+    add_output_arguments(logs)
+
+    proxy = commands.add_parser(
+        "proxy",
+        help="forward requests to a server and validate the traffic, "
+        "until interrupted with Ctrl+C",
+    )
+    proxy.add_argument(
+        "schema",
+        help="path or URL of the OpenAPI schema (YAML or JSON)",
+    )
+    proxy.add_argument(
+        "upstream",
+        help="URL of the server to forward the requests to (e.x "
+        "http://localhost:8000)",
+    )
+    proxy.add_argument(
+        "--host",
+        default="127.0.0.1",
+        help="address to listen on (default: 127.0.0.1)",
+    )
+    proxy.add_argument(
+        "--port",
+        type=int,
+        default=8080,
+        help="port to listen on (default: 8080)",
+    )
+    proxy.add_argument(
+        "--queue-size",
+        type=int,
+        default=1000,
+        help="max number of requests waiting to be validated. When the "
+        "queue is full, requests are forwarded without validation and "
+        "counted as dropped (default: 1000)",
+    )
+    proxy.add_argument(
+        "--validation-threads",
+        type=int,
+        default=2,
+        help="number of threads that validate requests (default: 2)",
+    )
+    proxy.add_argument(
+        "--stats-interval",
+        type=float,
+        default=60,
+        help="print the statistics every this many seconds "
+        "(default: 60)",
+    )
+    proxy.add_argument(
+        "--timeout",
+        type=float,
+        default=60,
+        help="seconds to wait for the server to respond (default: 60)",
+    )
+    proxy.add_argument(
+        "--pool-size",
+        type=int,
+        default=10,
+        help="max number of connections to the server (default: 10)",
+    )
+    proxy.add_argument(
+        "--cache-directory",
+        help="cache the parsed schema in this directory",
+    )
+    add_output_arguments(proxy)
+
+    return parser
+
+
+def add_output_arguments(parser: argparse.ArgumentParser) -> None:
+    """Define the arguments that control the output of a command."""
+    parser.add_argument(
+        "--format",
+        choices=OUTPUT_FORMATS,
+        default="text",
+        help="'json' prints the result as JSON and moves the progress "
+        "output to stderr (default: text)",
+    )
+    parser.add_argument(
+        "--output",
+        help="also write the result as JSON to this file (results of "
+        "'test' can be merged with the 'merge' command)",
+    )
+
+
+def run_test(arguments: argparse.Namespace) -> ShardResult:
+    """Run the `test` command."""
+    if arguments.shard is not None and arguments.seed is None:
+        raise Exception("--shard requires --seed")
+    if arguments.processes is not None and (
+        arguments.shard is not None
+        or arguments.use_async
+        or arguments.record is not None
+    ):
+        raise Exception(
+            "--processes can't be combined with --shard, --async or "
+            "--record"
+        )
+
+    options = dict(
+        max_urls_per_endpoint=arguments.max_urls_per_endpoint,
+        covering_strength=arguments.covering_strength,
+        failed_request_limit=arguments.failed_request_limit,
+        methods_to_test=arguments.methods,
+        concurrency=arguments.concurrency,
+        endpoint_concurrency=arguments.endpoint_concurrency,
+        before_request_send=(
+            SetHeaders(dict(arguments.header))
+            if arguments.header
+            else None
+        ),
+    )
+    session_config = SessionConfig(
+        pool_size=arguments.pool_size or max(arguments.concurrency, 10),
+        retries=arguments.retries,
+        timeout=arguments.timeout,
+    )
+
+    if arguments.processes is not None:
+        return sharded_full_test(
+            arguments.schema,
+            processes=arguments.processes,
+            seed=0 if arguments.seed is None else arguments.seed,
+            cache_directory=arguments.cache_directory,
+            session_config=session_config,
+            **options,
+        )
+
+    schema = load_schema(arguments.schema, arguments.cache_directory)
+    if arguments.record is not None:
+        schema.traffic_recorder = TrafficRecorder(arguments.record)
+    shard_number, shard_count = arguments.shard or (1, 1)
+    result = ShardResult(
+        shard_count=shard_count,
+        shards=[shard_number],
+        seed=arguments.seed,
+    )
+    options = dict(
+        options,
+        schema=schema,
+        after_error_occurred=result.record_error,
+        timings=result.timings,
+        seed=arguments.seed,
+        shard=arguments.shard,
+    )
+    try:
+        if arguments.use_async:
+            asyncio.run(
+                async_full_test(
+                    session_config=session_config, **options
+                )
+            )
+        else:
+            with SessionManager(session_config) as sessions:
+                full_test(sessions=sessions, **options)
+    finally:
+        if schema.traffic_recorder is not None:
+            schema.traffic_recorder.close()
+    print(
+        colored("Result: ", "cyan")
+        + f"{result.requests} requests, {len(result.errors)} errors"
+    )
+    return result
+
+
+def run_replay(arguments: argparse.Namespace) -> ReplayResult:
+    """Run the `replay` command."""
+    return replay(
+        schema=load_schema(arguments.schema, arguments.cache_directory),
+        archive_path=arguments.archive,
+    )
+
+
+def run_validate_logs(
+    arguments: argparse.Namespace,
+) -> LogValidationResult:
+    """Run the `validate-logs` command."""
+    return validate_logs(
+        schema_location=arguments.schema,
+        paths=arguments.logs,
+        log_format=arguments.log_format,
+        processes=arguments.processes,
+        batch_size=arguments.batch_size,
+        cache_directory=arguments.cache_directory,
+    )
+
+
+def run_proxy_command(arguments: argparse.Namespace) -> ProxyStats:
+    """Run the `proxy` command."""
+    return run_proxy(
+        schema=load_schema(arguments.schema, arguments.cache_directory),
+        upstream=arguments.upstream,
+        host=arguments.host,
+        port=arguments.port,
+        queue_size=arguments.queue_size,
+        validation_threads=arguments.validation_threads,
+        stats_interval=arguments.stats_interval,
+        session_config=SessionConfig(
+            pool_size=arguments.pool_size, timeout=arguments.timeout
+        ),
+    )
+
+
+def main(argv: Union[List[str], None] = None) -> int:
+    """Run the command-line interface.
+
+    Args:
+        argv: The arguments. Default: `sys.argv[1:]`
+
+    Returns:
+        The exit code: 0 if there were no errors (and no missing shards
+        when merging), 1 otherwise
+    """
+    arguments = create_parser().parse_args(argv)
+
+    # Keep stdout for the result when it is printed as JSON
+    with contextlib.redirect_stdout(
+        sys.stderr if arguments.format == "json" else sys.stdout
+    ):
+        if arguments.command == "test":
+            result = run_test(arguments)
+            failed = bool(result.errors)
+        elif arguments.command == "replay":
+            result = run_replay(arguments)
+            failed = bool(result.errors)
+        elif arguments.command == "validate-logs":
+            result = run_validate_logs(arguments)
+            failed = bool(result.errors)
+        elif arguments.command == "proxy":
+            result = run_proxy_command(arguments)
+            failed = bool(result.validation.errors)
+        else:
+            result = merge_shard_results(arguments.results)
+            result.print_summary()
+            failed = bool(result.errors or result.missing_shards)
+
+    if arguments.output is not None:
+        with open(arguments.output, "w") as file:
+            json.dump(result.to_dict(), file, indent=2)
+    if arguments.format == "json":
+        json.dump(result.to_dict(), sys.stdout, indent=2)
+        print()
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
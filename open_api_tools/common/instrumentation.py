@@ -0,0 +1,359 @@
+# -*- coding: utf-8 -*-
+"""Measure how long each phase of a request takes."""
+
+import json
+import threading
+import time
+from contextlib import ExitStack, contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import Dict, Iterator, Tuple, Union
+from termcolor import colored
+
+# Values below 2 ** SUB_BUCKET_BITS microseconds are stored exactly.
+# Larger values are stored with a relative error of at most
+# 2 ** -(SUB_BUCKET_BITS - 1)
+SUB_BUCKET_BITS = 7
+_SUB_BUCKET_HALF = 1 << (SUB_BUCKET_BITS - 1)
+
+PERCENTILES = [50, 95, 99]
+
+
+def _bucket_index(value: int) -> int:
+    """Find the bucket a value (in microseconds) falls into."""
+    if value < 1 << SUB_BUCKET_BITS:
+        return value
+    shift = value.bit_length() - SUB_BUCKET_BITS
+    return (shift << (SUB_BUCKET_BITS - 1)) + (value >> shift)
+
+
+def _bucket_value(index: int) -> int:
+    """Get the highest value (in microseconds) of a bucket."""
+    if index < 1 << SUB_BUCKET_BITS:
+        return index
+    shift = index // _SUB_BUCKET_HALF - 1
+    return ((index - shift * _SUB_BUCKET_HALF + 1) << shift) - 1
+
+
+class LatencyHistogram:
+    """A log-linear histogram of durations, like HdrHistogram.
+
+    Durations are counted in buckets whose width grows with the value,
+    so memory use does not depend on the number of recorded values,
+    while percentiles are accurate to about 1%.
+    """
+
+    def __init__(self):
+        """Create an empty histogram."""
+        self.buckets: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    def record(self, seconds: float) -> None:
+        """Record a duration.
+
+        Args:
+            seconds: The duration in seconds
+        """
+        value = max(0, int(seconds * 1_000_000))
+        index = _bucket_index(value)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        """Add the values recorded by another histogram to this one.
+
+        Args:
+            other: The histogram to merge
+        """
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        if other.count:
+            self.min = (
+                other.min
+                if self.min is None
+                else min(self.min, other.min)
+            )
+            self.max = (
+                other.max
+                if self.max is None
+                else max(self.max, other.max)
+            )
+
+    def percentile(self, percentile: float) -> Union[float, None]:
+        """Get a percentile of the recorded durations.
+
+        Args:
+            percentile: A number between 0 and 100
+
+        Returns:
+            The duration in seconds or None if nothing was recorded
+        """
+        if self.count == 0:
+            return None
+        threshold = max(1, percentile / 100 * self.count)
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= threshold:
+                return min(_bucket_value(index), self.max) / 1_000_000
+        return self.max / 1_000_000
+
+    def to_dict(self) -> Dict[str, any]:
+        """Summarize the histogram.
+
+        Durations are in milliseconds. The bucket counts are included so
+        that the histogram can be restored with `from_dict`.
+        """
+        summary = {
+            "count": self.count,
+            "min_ms": None if self.min is None else self.min / 1000,
+            "max_ms": None if self.max is None else self.max / 1000,
+            "mean_ms": self.total / self.count / 1000
+            if self.count
+            else None,
+        }
+        for percentile in PERCENTILES:
+            value = self.percentile(percentile)
+            summary[f"p{percentile}_ms"] = (
+                None if value is None else value * 1000
+            )
+        summary["buckets"] = {
+            str(index): count
+            for index, count in sorted(self.buckets.items())
+        }
+        return summary
+
+    @classmethod
+    def from_dict(cls, summary: Dict[str, any]) -> "LatencyHistogram":
+        """Restore a histogram summarized by `to_dict`."""
+        histogram = cls()
+        histogram.buckets = {
+            int(index): count
+            for index, count in summary["buckets"].items()
+        }
+        histogram.count = summary["count"]
+        histogram.total = round(
+            (summary["mean_ms"] or 0) * 1000 * histogram.count
+        )
+        if summary["min_ms"] is not None:
+            histogram.min = round(summary["min_ms"] * 1000)
+            histogram.max = round(summary["max_ms"] * 1000)
+        return histogram
+
+
+class Timings:
+    """Latency histograms for each (endpoint, method, phase).
+
+    The phases are:
+
+    - `prepare` - the whole of `prepare_request`
+    - `validate_request_body` - validating the request body
+    - `validate_url` - validating the request URL, parameters and
+      security
+    - `send` - sending the request and receiving the response
+    - `validate_response` - validating the status code, content type and
+      body of the response
+    - `validate_response_body` - validating the response body
+    """
+
+    def __init__(self):
+        """Create an empty collection."""
+        self.histograms: Dict[
+            Tuple[str, str, str], LatencyHistogram
+        ] = {}
+        self._lock = threading.Lock()
+
+    def record(
+        self,
+        endpoint_name: str,
+        method: str,
+        phase: str,
+        seconds: float,
+    ) -> None:
+        """Record the duration of a phase.
+
+        Args:
+            endpoint_name: endpoint name
+            method: HTTP method name
+            phase: Name of the phase
+            seconds: The duration in seconds
+        """
+        key = (endpoint_name, method.lower(), phase)
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = LatencyHistogram()
+            histogram.record(seconds)
+
+    @contextmanager
+    def measure(
+        self, endpoint_name: str, method: str, phase: str
+    ) -> Iterator[None]:
+        """Record how long the body of the `with` statement takes."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(
+                endpoint_name,
+                method,
+                phase,
+                time.perf_counter() - start,
+            )
+
+    def merge(self, other: "Timings") -> None:
+        """Add the durations recorded by another collection."""
+        with self._lock:
+            for key, histogram in other.histograms.items():
+                self.histograms.setdefault(
+                    key, LatencyHistogram()
+                ).merge(histogram)
+
+    def by_phase(self) -> Dict[str, LatencyHistogram]:
+        """Combine the histograms of all endpoints for each phase."""
+        phases: Dict[str, LatencyHistogram] = {}
+        with self._lock:
+            for (_endpoint, _method, phase), histogram in sorted(
+                self.histograms.items()
+            ):
+                phases.setdefault(phase, LatencyHistogram()).merge(
+                    histogram
+                )
+        return phases
+
+    def to_dict(self) -> Dict[str, any]:
+        """Summarize all histograms (durations are in milliseconds)."""
+        with self._lock:
+            endpoints = [
+                {
+                    "endpoint": endpoint_name,
+                    "method": method,
+                    "phase": phase,
+                    **histogram.to_dict(),
+                }
+                for (endpoint_name, method, phase), histogram in sorted(
+                    self.histograms.items()
+                )
+            ]
+        return {
+            "phases": {
+                phase: histogram.to_dict()
+                for phase, histogram in self.by_phase().items()
+            },
+            "endpoints": endpoints,
+        }
+
+    @classmethod
+    def from_dict(cls, summary: Dict[str, any]) -> "Timings":
+        """Restore a collection summarized by `to_dict`."""
+        timings = cls()
+        for entry in summary["endpoints"]:
+            timings.histograms[
+                (entry["endpoint"], entry["method"], entry["phase"])
+            ] = LatencyHistogram.from_dict(entry)
+        return timings
+
+    def dump(self, path: str) -> None:
+        """Write the summary to a JSON file.
+
+        Args:
+            path: Where to write the file
+        """
+        with open(path, "w") as timings_file:
+            json.dump(self.to_dict(), timings_file, indent=2)
+
+    def print_summary(self) -> None:
+        """Print the percentiles of each phase."""
+        phases = self.by_phase()
+        if not phases:
+            return
+        print(colored("Timings (ms):", "cyan"))
+        for phase, histogram in phases.items():
+            percentiles = ", ".join(
+                f"p{percentile}="
+                f"{histogram.percentile(percentile) * 1000:.2f}"
+                for percentile in PERCENTILES
+            )
+            print(
+                colored(f"  {phase}: ", "cyan")
+                + f"count={histogram.count}, {percentiles}, "
+                f"max={histogram.max / 1000:.2f}"
+            )
+
+
+# Instrumentation objects that receive the measurements. Anything with a
+# `measure(endpoint_name, method, phase)` method that returns a context
+# manager can be used, not only `Timings`. The objects are set per
+# context, so that runs in other threads or tasks don't record into
+# each other's objects
+_instrumentation: ContextVar[Tuple[any, ...]] = ContextVar(
+    "instrumentation", default=()
+)
+
+
+@contextmanager
+def instrument(instrumentation: any) -> Iterator[any]:
+    """Send the measurements to an instrumentation object.
+
+    Measurements are taken in the current thread or task while the
+    `with` block runs, and in the tasks it creates. Threads only take
+    measurements if they run in a copy of the context (see
+    `contextvars.copy_context`), as the `RequestScheduler` workers do.
+    Blocks may be nested, in which case all active objects receive the
+    measurements.
+
+    Args:
+        instrumentation: A `Timings` object or a compatible object
+
+    Returns:
+        Context manager that gives the instrumentation object
+    """
+    token = _instrumentation.set(
+        _instrumentation.get() + (instrumentation,)
+    )
+    try:
+        yield instrumentation
+    finally:
+        _instrumentation.reset(token)
+
+
+def measure(endpoint_name: str, method: str, phase: str):
+    """Measure a phase of a request.
+
+    Args:
+        endpoint_name: endpoint name
+        method: HTTP method name
+        phase: Name of the phase (see `Timings`)
+
+    Returns:
+        Context manager. Does nothing when no instrumentation is active
+    """
+    instrumentation = _instrumentation.get()
+    if not instrumentation:
+        return nullcontext()
+    if len(instrumentation) == 1:
+        return instrumentation[0].measure(endpoint_name, method, phase)
+    return _measure_all(instrumentation, endpoint_name, method, phase)
+
+
+@contextmanager
+def _measure_all(
+    instrumentation: Tuple[any, ...],
+    endpoint_name: str,
+    method: str,
+    phase: str,
+) -> Iterator[None]:
+    """Measure a phase with several instrumentation objects."""
+    with ExitStack() as stack:
+        for item in instrumentation:
+            stack.enter_context(
+                item.measure(endpoint_name, method, phase)
+            )
+        yield
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""Parse the items of a JSON array as the array is being received."""
+
+import codecs
+import json
+import re
+from typing import List
+
+_WHITESPACE = re.compile(r"\s*")
+_NUMBER_CHARACTERS = re.compile(r"[0-9eE.+\-]*")
+
+# What the parser expects to see next
+_START, _ITEM, _FIRST_ITEM, _SEPARATOR, _END = range(5)
+
+
+class JsonArrayParser:
+    """An incremental parser for a JSON array.
+
+    Feed it the content in chunks of any size. Each item is returned as
+    soon as it was fully received, and is then dropped from the buffer,
+    so memory use is bounded by the size of the largest item rather than
+    the size of the array.
+    """
+
+    def __init__(self, trailing_content: bool = False):
+        """Create a parser.
+
+        Args:
+            trailing_content:
+                Allow and ignore content after the end of the array
+                (e.x when the array is a value inside a larger document)
+        """
+        self._decoder = json.JSONDecoder()
+        self._text_decoder = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._state = _START
+        self._trailing_content = trailing_content
+
+    @property
+    def finished(self) -> bool:
+        """Whether the end of the array was reached."""
+        return self._state == _END
+
+    def feed(self, chunk: bytes) -> List[any]:
+        """Parse the next chunk of the content.
+
+        Args:
+            chunk: The next part of the content
+
+        Returns:
+            The items that were completed by this chunk
+
+        Raises:
+            ValueError if the content is not a JSON array
+        """
+        self._buffer += self._text_decoder.decode(chunk)
+        return self._parse(final=False)
+
+    def close(self) -> List[any]:
+        """Finish parsing.
+
+        Returns:
+            The items that were not returned yet
+
+        Raises:
+            ValueError if the content is not a complete JSON array
+        """
+        self._buffer += self._text_decoder.decode(b"", final=True)
+        items = self._parse(final=True)
+        if self._state != _END:
+            raise ValueError("Unexpected end of the JSON array")
+        return items
+
+    def _parse(self, final: bool) -> List[any]:
+        items = []
+        position = 0
+        buffer = self._buffer
+        while True:
+            position = _WHITESPACE.match(buffer, position).end()
+            if position == len(buffer):
+                break
+
+            character = buffer[position]
+            if self._state == _START:
+                if character != "[":
+                    raise ValueError("Expected a JSON array")
+                self._state = _FIRST_ITEM
+                position += 1
+            elif self._state == _SEPARATOR or (
+                self._state == _FIRST_ITEM and character == "]"
+            ):
+                if character == "]":
+                    self._state = _END
+                elif character == ",":
+                    self._state = _ITEM
+                else:
+                    raise ValueError(
+                        f"Expected ',' or ']' at position {position}"
+                    )
+                position += 1
+            elif self._state in (_ITEM, _FIRST_ITEM):
+                try:
+                    item, end = self._decoder.raw_decode(
+                        buffer, position
+                    )
+                except json.JSONDecodeError:
+                    if final:
+                        raise
+                    # The item was not fully received yet
+                    break
+                # A number at the end of the buffer may continue in the
+                # next chunk (e.x "12" of "12.5e3")
+                if (
+                    not final
+                    and isinstance(item, (int, float))
+                    and not isinstance(item, bool)
+                    and _NUMBER_CHARACTERS.match(buffer, end).end()
+                    == len(buffer)
+                ):
+                    break
+                items.append(item)
+                self._state = _SEPARATOR
+                position = end
+            elif self._trailing_content:
+                position = len(buffer)
+                break
+            else:
+                raise ValueError(
+                    f"Unexpected content after the JSON array at "
+                    f"position {position}"
+                )
+
+        self._buffer = buffer[position:]
+        return items
@@ -2,44 +2,343 @@
 """Load the OpenAPI schema `.yaml` file."""
 
 import json
-from dataclasses import dataclass
+import mmap
+import os
+import re
+import threading
+import urllib.parse
+import urllib.request
+from collections.abc import Mapping
+from contextlib import contextmanager
+from typing import Dict, Iterator, Tuple, Union
 import yaml
 from openapi3 import OpenAPI
+from openapi3.paths import Path
 from openapi_core import create_spec
-import urllib
 import requests
 
+from open_api_tools.common.path_matching import PathRouter
+from open_api_tools.common.schema_cache import (
+    get_cache_path,
+    read_cache,
+    write_cache,
+)
+from open_api_tools.common.transform_schema import (
+    ReferenceResolver,
+    create_validator,
+)
+
+
+class LazyPaths(Mapping):
+    """The `paths` of an openapi3 model, parsed one path at a time.
+
+    Parsing every path of a large schema takes a while, yet most runs
+    only touch a few of them.
+    """
+
+    def __init__(self, raw_paths: Dict[str, any], root: OpenAPI):
+        """Create the mapping.
+
+        Args:
+            raw_paths: The `paths` object of the raw schema
+            root: The model the paths belong to
+        """
+        self._raw_paths = raw_paths
+        self._root = root
+        self._paths: Dict[str, Path] = {}
+        self._lock = threading.Lock()
+
+    def __getitem__(self, endpoint_name: str) -> Path:
+        path = self._paths.get(endpoint_name)
+        if path is not None:
+            return path
+
+        with self._lock:
+            if endpoint_name not in self._paths:
+                path = Path(
+                    ["paths", endpoint_name],
+                    self._raw_paths[endpoint_name],
+                    self._root,
+                )
+                path._resolve_references()
+                path._resolve_allOfs()
+                self._paths[endpoint_name] = path
+            return self._paths[endpoint_name]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._raw_paths)
+
+    def __len__(self) -> int:
+        return len(self._raw_paths)
+
+    def __contains__(self, endpoint_name) -> bool:
+        return endpoint_name in self._raw_paths
+
+
+def build_openapi_model(raw_spec: Dict[str, any]) -> OpenAPI:
+    """Build the openapi3 model of a schema without parsing its paths.
+
+    Args:
+        raw_spec: The parsed schema file
+
+    Returns:
+        The model. Paths are parsed on first access (see `LazyPaths`)
+    """
+    model = OpenAPI({**raw_spec, "paths": {}})
+    model.paths = LazyPaths(raw_spec.get("paths") or {}, model)
+    return model
+
 
-@dataclass
 class Schema:
-    """Parsed OpenAPI schema."""
+    """Parsed OpenAPI schema.
+
+    The openapi3 (`schema`) and openapi_core (`open_api_core`) models
+    are built on first access, so a run only pays for the models it
+    uses.
+    """
+
+    def __init__(
+        self,
+        schema: any = None,
+        open_api_core: any = None,
+        raw_spec: Union[Dict[str, any], None] = None,
+        validate_spec: bool = True,
+    ):
+        """Create the schema.
+
+        Args:
+            schema: A ready openapi3 model
+            open_api_core: A ready openapi_core model
+            raw_spec:
+                The parsed schema file. Required unless `schema` is
+                provided
+            validate_spec:
+                Whether to validate the schema when building the
+                openapi_core model
+        """
+        if raw_spec is None:
+            if schema is None:
+                raise Exception(
+                    "Either schema or raw_spec must be provided"
+                )
+            raw_spec = schema.raw_element
+
+        self.raw_spec = raw_spec
+        self.validate_spec = validate_spec
+        self._schema = schema
+        self._open_api_core = open_api_core
+        self._lock = threading.Lock()
+
+        # Compiled validators, keyed by (endpoint, method, status code,
+        # mime type), with an extra "items" element for array item
+        # validators
+        # See `open_api_tools.common.validator_registry`
+        self.validators: Dict[Tuple, any] = {}
+        # Components that were already converted to JSON schema
+        self.references = ReferenceResolver(raw_spec)
+        # See `open_api_tools.validate.index.get_request_validator`
+        self.request_validator: any = None
+        # Set to a `ValidationCache` to skip validating identical
+        # response bodies more than once (described in `README.md`)
+        self.validation_cache: any = None
+        # Set to a `TrafficRecorder` to store every request that is sent
+        # and its response in an archive (described in `README.md`)
+        self.traffic_recorder: any = None
+        # Finds the endpoint of a concrete URL
+        self.router = PathRouter(raw_spec)
+
+    def __repr__(self):
+        return (
+            f"Schema(schema={self._schema!r}, "
+            f"open_api_core={self._open_api_core!r})"
+        )
+
+    @property
+    def schema(self) -> OpenAPI:
+        """The openapi3 model."""
+        if self._schema is None:
+            with self._lock:
+                if self._schema is None:
+                    self._schema = build_openapi_model(self.raw_spec)
+        return self._schema
 
-    schema: any
-    open_api_core: any
+    @property
+    def open_api_core(self) -> any:
+        """The openapi_core model."""
+        if self._open_api_core is None:
+            with self._lock:
+                if self._open_api_core is None:
+                    self._open_api_core = create_spec(
+                        json.loads(
+                            json.dumps(self.raw_spec, default=str)
+                        ),
+                        validate_spec=self.validate_spec,
+                    )
+        return self._open_api_core
 
 
-def load_schema(open_api_schema_location: str) -> Schema:
+# libyaml is much faster, but is not always available
+YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+# How long to wait for the server when downloading a schema, in seconds
+DOWNLOAD_TIMEOUT = 60
+
+_LEADING_WHITESPACE = re.compile(rb"\s*")
+
+
+@contextmanager
+def read_schema_source(location: str) -> Iterator[any]:
+    """Read the content of a schema file.
+
+    Args:
+        location:
+            `http://` or `https://` URL, `file://` URL, or relative /
+            absolute path to the file
+
+    Returns:
+        Context manager that gives the content of the file as a
+        bytes-like object. Local files are memory mapped and are
+        unmapped on exit
+    """
+    parsed_location = urllib.parse.urlparse(location)
+    scheme = parsed_location.scheme.lower()
+
+    if scheme in ("http", "https"):
+        response = requests.get(location, timeout=DOWNLOAD_TIMEOUT)
+        response.raise_for_status()
+        yield response.content
+        return
+
+    if scheme == "file":
+        path = urllib.request.url2pathname(parsed_location.path)
+    # Single letter schemes are Windows drive letters
+    elif len(scheme) <= 1:
+        path = location
+    else:
+        raise Exception(f"Unsupported schema location: {location}")
+
+    with open(path, "rb") as spec_file:
+        if os.fstat(spec_file.fileno()).st_size == 0:
+            # Empty files can't be memory mapped
+            yield b""
+            return
+        with mmap.mmap(
+            spec_file.fileno(), 0, access=mmap.ACCESS_READ
+        ) as content:
+            yield content
+
+
+def parse_schema_content(content: any) -> Dict[str, any]:
+    """Parse the content of a JSON or YAML schema file.
+
+    A memory mapped file is parsed without copying it into a `bytes`
+    object first: JSON is decoded straight from the mapping, and YAML is
+    read from it in chunks.
+
+    Args:
+        content: Content of the file as a bytes-like object
+
+    Returns:
+        The parsed schema, or None if the file is empty
+    """
+    if not isinstance(content, bytes) and not hasattr(content, "read"):
+        content = bytes(content)
+
+    # JSON is a subset of YAML, but the JSON parser is a lot faster
+    start = _LEADING_WHITESPACE.match(content).end()
+    if content[start : start + 1] == b"{":
+        try:
+            return json.loads(str(content, "utf-8"))
+        except ValueError:
+            # YAML flow mapping
+            pass
+    return yaml.load(content, Loader=YamlLoader)
+
+
+def load_schema(
+    open_api_schema_location: Union[str, Dict[str, any]],
+    cache_directory: Union[str, None] = None,
+) -> Schema:
     """Load the OpenAPI schema `.yaml` file.
 
     Args:
         open_api_schema_location:
-            Relative path / absolute path / URLs to a JSON/Yaml OpenAPI
-            schema 3.0 file
+            Relative path / absolute path / `file://` URL / `http(s)://`
+            URL of a JSON/Yaml OpenAPI schema 3.0 file, or an already
+            parsed schema
+        cache_directory:
+            If provided, the parsed schema and the compiled validators
+            are stored in this directory, and reused on the next load of
+            the same schema (described in `README.md`). Ignored for
+            already parsed schemas
     """
-    try:
-        # Try to parse the location as a URL and send a request
-        urllib.parse.urlparse(open_api_schema_location)
-        schema_string = requests.get(open_api_schema_location).content
-    except Exception:
-        # Try to read the schema from a local file
-        with open(open_api_schema_location) as spec_file:
-            schema_string = spec_file.read()
+    if isinstance(open_api_schema_location, dict):
+        return Schema(raw_spec=open_api_schema_location)
+
+    with read_schema_source(open_api_schema_location) as content:
+        return _load_schema_content(
+            open_api_schema_location, content, cache_directory
+        )
+
+
+def _load_schema_content(
+    location: str,
+    content: any,
+    cache_directory: Union[str, None],
+) -> Schema:
+    """Parse the schema, or read it from the cache."""
+    cache = None
+    if cache_directory is not None:
+        cache_path = get_cache_path(cache_directory, content)
+        cache = read_cache(cache_path)
+
+    if cache is None:
+        yaml_spec = parse_schema_content(content)
+        if yaml_spec is None:
+            raise Exception(f"The schema file is empty: {location}")
+        if not isinstance(yaml_spec, dict):
+            raise Exception(
+                f"The schema file is not an OpenAPI document: "
+                f"{location}"
+            )
+    else:
+        yaml_spec = cache["yaml_spec"]
+
+    schema = Schema(
+        raw_spec=yaml_spec,
+        # A cached schema was already validated when it was first loaded
+        validate_spec=cache is None,
+    )
 
-    yaml_spec = yaml.safe_load(schema_string)
+    if cache_directory is None:
+        return schema
 
-    schema = OpenAPI(yaml_spec)
+    if cache is None:
+        # Import here to avoid a circular import
+        from open_api_tools.common.validator_registry import (
+            warm_up_validators,
+        )
 
-    serializable_spec = json.loads(json.dumps(yaml_spec, default=str))
-    open_api_core = create_spec(serializable_spec)
+        # Later loads skip validating the schema, so validate it now
+        schema.open_api_core
+        warm_up_validators(schema)
+        write_cache(
+            cache_path,
+            dict(
+                yaml_spec=yaml_spec,
+                definitions=schema.references.definitions,
+                references=schema.references.references,
+                json_schemas={
+                    key: validator.schema
+                    for key, validator in schema.validators.items()
+                },
+            ),
+        )
+    else:
+        schema.references.definitions = cache["definitions"]
+        schema.references.references = cache["references"]
+        schema.validators = {
+            key: create_validator(json_schema, check_schema=False)
+            for key, json_schema in cache["json_schemas"].items()
+        }
 
-    return Schema(schema=schema, open_api_core=open_api_core)
+    return schema
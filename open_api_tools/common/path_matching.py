@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+"""Find the endpoint of the schema that a concrete URL belongs to."""
+
+import re
+import urllib.parse
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple, Union
+
+_PARAMETER = re.compile(r"{([^{}/]+)}")
+
+
+@dataclass
+class EndpointMatch:
+    """The endpoint a URL belongs to."""
+
+    endpoint_name: str
+    # Values of the path parameters, as they appear in the URL
+    path_parameters: Dict[str, str]
+    # The URL moved to the matching server of the schema, so that it can
+    # be validated even if it was sent to another host
+    request_url: str
+
+
+@dataclass
+class _Node:
+    """A node of the router's tree, for one segment of the path."""
+
+    # Children for segments without parameters, by the segment
+    literals: Dict[str, "_Node"] = field(default_factory=dict)
+    # Children for segments with parameters and text (e.x
+    # "{name}.json"), as a regex that matches the segment
+    patterns: List[Tuple[re.Pattern, "_Node"]] = field(
+        default_factory=list
+    )
+    # Child for segments that consist of a single parameter
+    parameter: Union["_Node", None] = None
+    # The endpoint whose path ends at this node, its methods and the
+    # names of its path parameters
+    endpoint_name: Union[str, None] = None
+    methods: Tuple[str, ...] = ()
+    parameter_names: List[str] = field(default_factory=list)
+
+
+class PathRouter:
+    """A tree of the path templates of a schema.
+
+    Each level of the tree is a segment of the path, so a path is
+    matched with a dictionary lookup per segment, no matter how many
+    endpoints the schema has. Segments without parameters take
+    precedence over templated ones, as the OpenAPI specification
+    requires.
+    """
+
+    def __init__(self, raw_spec: Dict[str, any]):
+        """Build the tree.
+
+        Args:
+            raw_spec: The parsed schema file
+        """
+        self.servers = get_server_urls(raw_spec)
+        self._root = _Node()
+        for endpoint_name, endpoint in (
+            raw_spec.get("paths") or {}
+        ).items():
+            self._add(endpoint_name, endpoint)
+
+    def match(
+        self, method: str, url: str
+    ) -> Union[EndpointMatch, None]:
+        """Find the endpoint a URL belongs to.
+
+        Args:
+            method: HTTP method
+            url:
+                Full URL, or a path (starting with the path of the
+                server URL) with an optional query string
+
+        Returns:
+            The endpoint, or None if no endpoint of the schema has this
+            path and method
+        """
+        parsed_url = urllib.parse.urlparse(url)
+        for server_url, base_path in self.servers:
+            if parsed_url.path != base_path and not (
+                parsed_url.path.startswith(base_path + "/")
+            ):
+                continue
+            match = self.match_path(
+                method, parsed_url.path[len(base_path) :]
+            )
+            if match is not None:
+                endpoint_name, path_parameters = match
+                return EndpointMatch(
+                    endpoint_name=endpoint_name,
+                    path_parameters=path_parameters,
+                    request_url=_rebase(server_url, parsed_url),
+                )
+        return None
+
+    def match_path(
+        self, method: str, path: str
+    ) -> Union[Tuple[str, Dict[str, str]], None]:
+        """Find the endpoint of a path relative to the server URL.
+
+        Args:
+            method: HTTP method
+            path:
+                The path, without the path of the server URL (e.x
+                "/items/42/")
+
+        Returns:
+            The endpoint name and the values of the path parameters, or
+            None if no endpoint of the schema has this path and method
+        """
+        values: List[str] = []
+        node = self._find(
+            self._root, path.split("/"), 0, method.lower(), values
+        )
+        if node is None:
+            return None
+        return node.endpoint_name, {
+            name: urllib.parse.unquote(value)
+            for name, value in zip(node.parameter_names, values)
+        }
+
+    def _add(
+        self, endpoint_name: str, endpoint: Dict[str, any]
+    ) -> None:
+        node = self._root
+        for segment in endpoint_name.split("/"):
+            if not _PARAMETER.search(segment):
+                node = node.literals.setdefault(segment, _Node())
+            elif _PARAMETER.fullmatch(segment):
+                if node.parameter is None:
+                    node.parameter = _Node()
+                node = node.parameter
+            else:
+                pattern = _compile_segment(segment)
+                for child_pattern, child in node.patterns:
+                    if child_pattern.pattern == pattern.pattern:
+                        node = child
+                        break
+                else:
+                    child = _Node()
+                    node.patterns.append((pattern, child))
+                    node = child
+        # Two templates that only differ in parameter names are the same
+        # path, which a valid schema does not have. Keep the first one
+        if node.endpoint_name is None:
+            node.endpoint_name = endpoint_name
+            node.methods = tuple(
+                method.lower() for method in endpoint or {}
+            )
+            node.parameter_names = _PARAMETER.findall(endpoint_name)
+
+    def _find(
+        self,
+        node: _Node,
+        segments: List[str],
+        index: int,
+        method: str,
+        values: List[str],
+    ) -> Union[_Node, None]:
+        """Walk down the tree, trying literal segments first.
+
+        The values of the path parameters are added to `values`.
+        """
+        if index == len(segments):
+            if (
+                node.endpoint_name is not None
+                and method in node.methods
+            ):
+                return node
+            return None
+
+        segment = segments[index]
+        child = node.literals.get(segment)
+        if child is not None:
+            found = self._find(
+                child, segments, index + 1, method, values
+            )
+            if found is not None:
+                return found
+
+        for pattern, child in node.patterns:
+            match = pattern.fullmatch(segment)
+            if match is None:
+                continue
+            values += match.groups()
+            found = self._find(
+                child, segments, index + 1, method, values
+            )
+            if found is not None:
+                return found
+            del values[len(values) - len(match.groups()) :]
+
+        if node.parameter is not None and segment:
+            values.append(segment)
+            found = self._find(
+                node.parameter, segments, index + 1, method, values
+            )
+            if found is not None:
+                return found
+            values.pop()
+        return None
+
+
+def get_server_urls(raw_spec: Dict[str, any]) -> List[Tuple[str, str]]:
+    """Get the URLs of the schema's servers, with variables filled in.
+
+    Args:
+        raw_spec: The parsed schema file
+
+    Returns:
+        The server URL and its path, for each server. Servers with
+        longer paths come first
+    """
+    servers = []
+    for server in raw_spec.get("servers") or [{"url": "/"}]:
+        url = server["url"]
+        for name, variable in (server.get("variables") or {}).items():
+            url = url.replace(f"{{{name}}}", str(variable["default"]))
+        servers.append(
+            (url, urllib.parse.urlparse(url).path.rstrip("/"))
+        )
+    return sorted(servers, key=lambda server: -len(server[1]))
+
+
+def _compile_segment(segment: str) -> re.Pattern:
+    """Turn a segment with parameters (e.x "{id}.json") into a regex."""
+    pattern = ""
+    position = 0
+    for parameter in _PARAMETER.finditer(segment):
+        pattern += re.escape(segment[position : parameter.start()])
+        pattern += "(.+?)"
+        position = parameter.end()
+    pattern += re.escape(segment[position:])
+    return re.compile(pattern)
+
+
+def _rebase(
+    server_url: str, parsed_url: urllib.parse.ParseResult
+) -> str:
+    """Move a URL to a server, keeping its path and query."""
+    server = urllib.parse.urlparse(server_url)
+    if not server.netloc:
+        # A relative server URL - the URL already is on the right server
+        server = parsed_url
+    return urllib.parse.urlunparse(
+        (
+            server.scheme,
+            server.netloc,
+            parsed_url.path,
+            "",
+            parsed_url.query,
+            "",
+        )
+    )
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""Run requests concurrently with global and per-endpoint limits."""
+
+import contextvars
+import threading
+from collections import defaultdict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Deque, Dict, Set, Union
+
+
+class RequestScheduler:
+    """A thread pool that limits how many jobs may run per key at once.
+
+    Jobs over the per-key limit wait in a queue instead of occupying a
+    worker thread, so one busy endpoint can't starve the others. Jobs
+    run in a copy of the context they were submitted from, so they take
+    measurements for the `instrument` block of their run.
+    """
+
+    def __init__(
+        self,
+        concurrency: int,
+        endpoint_concurrency: Union[int, None] = None,
+    ):
+        """Create a scheduler.
+
+        Args:
+            concurrency: Max number of jobs running at once
+            endpoint_concurrency:
+                Max number of jobs with the same key running at once.
+                Default: same as `concurrency`
+        """
+        if concurrency < 1:
+            raise Exception("concurrency must be a positive number")
+
+        self.concurrency = concurrency
+        self.endpoint_concurrency = endpoint_concurrency or concurrency
+        self._executor = ThreadPoolExecutor(max_workers=concurrency)
+        self._lock = threading.Lock()
+        self._queues: Dict[str, Deque] = defaultdict(deque)
+        self._running: Dict[str, int] = defaultdict(int)
+        # Jobs handed to the executor that have not started yet. The
+        # executor queues them when all of its workers are busy
+        self._dispatched: Set[Future] = set()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_args):
+        self.close()
+
+    def submit(
+        self, key: str, function: Callable, *args, **kwargs
+    ) -> Future:
+        """Schedule a job.
+
+        Args:
+            key: Jobs with the same key share the per-endpoint limit
+            function: The function to call
+            args: Positional arguments for the function
+            kwargs: Keyword arguments for the function
+
+        Returns:
+            A future that resolves to the function's return value
+        """
+        future = Future()
+        context = contextvars.copy_context()
+        with self._lock:
+            self._queues[key].append(
+                (future, context, function, args, kwargs)
+            )
+        self._dispatch(key)
+        return future
+
+    def cancel(self) -> None:
+        """Cancel all jobs that have not started yet."""
+        with self._lock:
+            for queue in self._queues.values():
+                for future, *_job in queue:
+                    future.cancel()
+                queue.clear()
+            for future in self._dispatched:
+                future.cancel()
+
+    def close(self) -> None:
+        """Cancel pending jobs and wait for the running ones."""
+        self.cancel()
+        self._executor.shutdown(wait=True)
+
+    def _dispatch(self, key: str) -> None:
+        with self._lock:
+            queue = self._queues[key]
+            jobs = []
+            while (
+                queue and self._running[key] < self.endpoint_concurrency
+            ):
+                job = queue.popleft()
+                if not job[0].cancelled():
+                    self._running[key] += 1
+                    self._dispatched.add(job[0])
+                    jobs.append(job)
+
+        for job in jobs:
+            self._executor.submit(self._run, key, *job)
+
+    def _run(
+        self, key, future, context, function, args, kwargs
+    ) -> None:
+        with self._lock:
+            self._dispatched.discard(future)
+            started = future.set_running_or_notify_cancel()
+            if not started:
+                # Cancelled while waiting for a worker
+                self._running[key] -= 1
+        if not started:
+            self._dispatch(key)
+            return
+
+        try:
+            result = context.run(function, *args, **kwargs)
+        except BaseException as error:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+        finally:
+            with self._lock:
+                self._running[key] -= 1
+            self._dispatch(key)
@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+"""Persist the parsed OpenAPI schema between runs.
+
+Cache files are JSON, so reading a cache file written by someone else
+can't run any code. Values that JSON can't represent (dictionaries with
+non-string keys, tuples, sets, dates and binary data, as produced by the
+YAML parser) are stored as tagged objects (see `_encode`).
+"""
+
+import base64
+import datetime
+import functools
+import hashlib
+import json
+import os
+import tempfile
+from typing import Dict, Union
+
+# Change this whenever the format of the cached data changes
+CACHE_VERSION = 2
+
+# Libraries whose output is cached. Upgrading any of them invalidates
+# the cache
+CACHED_LIBRARIES = [
+    "jsonschema",
+    "openapi-core",
+    "openapi3",
+    "py-openapi-schema-to-json-schema",
+    "PyYAML",
+]
+
+# Key of the objects that stand for values JSON can't represent
+_TAG = "__open_api_tools__"
+
+
+def get_cache_path(cache_directory: str, schema_content: bytes) -> str:
+    """Get the location of the cache file for a schema.
+
+    The file name is derived from the schema content and the versions of
+    `CACHED_LIBRARIES`, so editing the schema or upgrading a library
+    invalidates the cache.
+
+    Args:
+        cache_directory: The directory to store cache files in
+        schema_content: The raw content of the schema file
+
+    Returns:
+        Path to the cache file
+    """
+    digest = hashlib.sha256(schema_content)
+    digest.update(_library_versions().encode())
+    return os.path.join(
+        cache_directory, f"{digest.hexdigest()}.v{CACHE_VERSION}.json"
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def _library_versions() -> str:
+    """Get the installed versions of `CACHED_LIBRARIES`."""
+    try:
+        from importlib.metadata import PackageNotFoundError, version
+    except ImportError:
+        # Python < 3.8
+        from pkg_resources import (
+            DistributionNotFound as PackageNotFoundError,
+            get_distribution,
+        )
+
+        def version(name: str) -> str:
+            return get_distribution(name).version
+
+    versions = []
+    for name in CACHED_LIBRARIES:
+        try:
+            versions.append(f"{name}=={version(name)}")
+        except PackageNotFoundError:
+            versions.append(f"{name} missing")
+    return "\n".join(versions)
+
+
+def read_cache(cache_path: str) -> Union[Dict[str, any], None]:
+    """Read a cache file.
+
+    Args:
+        cache_path: Path to the cache file
+
+    Returns:
+        The cached data or None if the cache is missing or unreadable
+    """
+    try:
+        with open(cache_path, "rb") as cache_file:
+            cache = json.loads(cache_file.read(), object_hook=_decode)
+    except Exception:
+        # A missing or corrupted cache is rebuilt
+        return None
+
+    if (
+        not isinstance(cache, dict)
+        or cache.get("version") != CACHE_VERSION
+    ):
+        return None
+    return cache
+
+
+def write_cache(cache_path: str, cache: Dict[str, any]) -> None:
+    """Write a cache file.
+
+    The file is replaced atomically, so concurrent runs never read a
+    partially written cache.
+
+    Args:
+        cache_path: Path to the cache file
+        cache: The data to cache
+
+    Raises:
+        TypeError if the data contains a value that can't be stored
+    """
+    cache_directory = os.path.dirname(cache_path)
+    os.makedirs(cache_directory, exist_ok=True)
+
+    content = json.dumps(
+        _encode({**cache, "version": CACHE_VERSION}),
+        separators=(",", ":"),
+    )
+    file_descriptor, temporary_path = tempfile.mkstemp(
+        dir=cache_directory, suffix=".tmp"
+    )
+    try:
+        with os.fdopen(file_descriptor, "w") as cache_file:
+            cache_file.write(content)
+        os.replace(temporary_path, cache_path)
+    except BaseException:
+        os.unlink(temporary_path)
+        raise
+
+
+def _encode(value: any) -> any:
+    """Turn a value into one that JSON can represent.
+
+    Reversed by `_decode`.
+    """
+    if isinstance(value, dict):
+        if _TAG not in value and all(
+            isinstance(key, str) for key in value
+        ):
+            return {key: _encode(item) for key, item in value.items()}
+        return {
+            _TAG: "dict",
+            "items": [
+                [_encode(key), _encode(item)]
+                for key, item in value.items()
+            ],
+        }
+    elif isinstance(value, list):
+        return [_encode(item) for item in value]
+    elif isinstance(value, tuple):
+        return {
+            _TAG: "tuple",
+            "items": [_encode(item) for item in value],
+        }
+    elif isinstance(value, (set, frozenset)):
+        return {_TAG: "set", "items": [_encode(item) for item in value]}
+    elif isinstance(value, datetime.datetime):
+        return {_TAG: "datetime", "value": value.isoformat()}
+    elif isinstance(value, datetime.date):
+        return {_TAG: "date", "value": value.isoformat()}
+    elif isinstance(value, bytes):
+        return {
+            _TAG: "bytes",
+            "value": base64.b64encode(value).decode(),
+        }
+    elif value is None or isinstance(value, (str, int, float)):
+        return value
+    raise TypeError(
+        f"Unable to cache a value of type {type(value).__name__}"
+    )
+
+
+def _decode(value: Dict[str, any]) -> any:
+    """Restore a JSON object written by `_encode`."""
+    tag = value.get(_TAG)
+    if tag is None:
+        return value
+    elif tag == "dict":
+        return {key: item for key, item in value["items"]}
+    elif tag == "tuple":
+        return tuple(value["items"])
+    elif tag == "set":
+        return set(value["items"])
+    elif tag == "datetime":
+        return datetime.datetime.fromisoformat(value["value"])
+    elif tag == "date":
+        return datetime.date.fromisoformat(value["value"])
+    elif tag == "bytes":
+        return base64.b64decode(value["value"])
+    raise ValueError(f"Unknown cached value type: {tag}")
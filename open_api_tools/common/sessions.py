@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+"""Create and share HTTP sessions, one per server."""
+
+import threading
+import urllib.parse
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple, Union
+import httpx
+from requests import Session
+from requests.adapters import HTTPAdapter
+from termcolor import colored
+from urllib3.util.retry import Retry
+
+
+@dataclass
+class SessionConfig:
+    """Connection settings for the sessions that send the requests."""
+
+    # Max number of connections kept open to each server
+    pool_size: int = 10
+    # Reuse connections between requests
+    keep_alive: bool = True
+    # Number of times to retry a request that failed to connect, or
+    # that got one of the `retry_statuses` or no response and used one
+    # of the `retry_methods`
+    retries: int = 0
+    # Wait `backoff_factor * 2 ** (retry number - 1)` seconds between
+    # retries
+    backoff_factor: float = 0.5
+    retry_statuses: List[int] = field(
+        default_factory=lambda: [502, 503, 504]
+    )
+    # Only idempotent methods by default, as the server may have acted
+    # on a request that failed after it was sent
+    retry_methods: List[str] = field(
+        default_factory=lambda: sorted(Retry.DEFAULT_ALLOWED_METHODS)
+    )
+    # Seconds to wait for the server to accept the connection and to
+    # send the response. Either a number for both or a (connect, read)
+    # pair. `None` waits forever
+    timeout: Union[float, Tuple[float, float], None] = 60
+    # Use HTTP/2 when the server supports it. Only available for the
+    # async API, and only when the `h2` package is installed
+    http2: bool = False
+
+
+class TimeoutSession(Session):
+    """A `requests` session with a default timeout."""
+
+    def __init__(
+        self, timeout: Union[float, Tuple[float, float], None]
+    ):
+        """Create a session.
+
+        Args:
+            timeout: Used for requests that don't specify a timeout
+        """
+        super().__init__()
+        self.timeout = timeout
+
+    def send(self, request, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+        return super().send(request, **kwargs)
+
+
+def create_session(
+    config: Union[SessionConfig, None] = None
+) -> Session:
+    """Create a `requests` session.
+
+    Args:
+        config: Connection settings. Default: `SessionConfig()`
+
+    Returns:
+        The session
+    """
+    if config is None:
+        config = SessionConfig()
+
+    session = TimeoutSession(config.timeout)
+    adapter = HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=config.pool_size,
+        max_retries=Retry(
+            total=config.retries,
+            backoff_factor=config.backoff_factor,
+            status_forcelist=config.retry_statuses,
+            allowed_methods=config.retry_methods,
+            # Let the response validation report the final status code
+            raise_on_status=False,
+        ),
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    if not config.keep_alive:
+        session.headers["Connection"] = "close"
+    return session
+
+
+def create_async_client(
+    config: Union[SessionConfig, None] = None,
+) -> httpx.AsyncClient:
+    """Create an `httpx` client for the async API.
+
+    Only connection failures are retried, as `httpx` does not retry on
+    status codes.
+
+    Args:
+        config: Connection settings. Default: `SessionConfig()`
+
+    Returns:
+        The client
+    """
+    if config is None:
+        config = SessionConfig()
+
+    http2 = config.http2
+    if http2:
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            print(
+                colored(
+                    "HTTP/2 is not available, as the `h2` package is "
+                    "not installed. Falling back to HTTP/1.1",
+                    "yellow",
+                )
+            )
+            http2 = False
+
+    timeout = config.timeout
+    if isinstance(timeout, tuple):
+        timeout = httpx.Timeout(timeout[1], connect=timeout[0])
+
+    limits = httpx.Limits(
+        max_connections=config.pool_size,
+        max_keepalive_connections=config.pool_size
+        if config.keep_alive
+        else 0,
+    )
+    return httpx.AsyncClient(
+        timeout=timeout,
+        limits=limits,
+        http2=http2,
+        transport=httpx.AsyncHTTPTransport(
+            http2=http2, limits=limits, retries=config.retries
+        ),
+    )
+
+
+class SessionManager:
+    """Keep one pooled session per server."""
+
+    def __init__(self, config: Union[SessionConfig, None] = None):
+        """Create a manager.
+
+        Args:
+            config:
+                Connection settings for all sessions.
+                Default: `SessionConfig()`
+        """
+        self.config = SessionConfig() if config is None else config
+        self._sessions: Dict[str, Session] = {}
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_args):
+        self.close()
+
+    def get(self, url: str) -> Session:
+        """Get the session for the server a URL belongs to.
+
+        Args:
+            url: Any URL on the server
+
+        Returns:
+            The session
+        """
+        parsed_url = urllib.parse.urlparse(url)
+        server = f"{parsed_url.scheme}://{parsed_url.netloc}"
+        session = self._sessions.get(server)
+        if session is not None:
+            return session
+
+        with self._lock:
+            if server not in self._sessions:
+                self._sessions[server] = create_session(self.config)
+            return self._sessions[server]
+
+    def close(self) -> None:
+        """Close all sessions."""
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions = {}
+
+
+# Used when no session is provided
+default_sessions = SessionManager()
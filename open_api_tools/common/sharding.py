@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""Split test requests between shards that run independently."""
+
+import hashlib
+from typing import Tuple
+
+
+def parse_shard(shard: str) -> Tuple[int, int]:
+    """Parse a shard definition.
+
+    Args:
+        shard: Shard number and shard count (e.x "2/4")
+
+    Returns:
+        The shard number (starting from 1) and the shard count
+    """
+    try:
+        number, count = (int(part) for part in shard.split("/"))
+    except ValueError:
+        raise Exception(
+            f"Invalid shard: {shard}. Expected a shard number and a "
+            f"shard count (e.x 2/4)"
+        )
+    validate_shard((number, count))
+    return number, count
+
+
+def validate_shard(shard: Tuple[int, int]) -> None:
+    """Make sure the shard number is between 1 and the shard count."""
+    number, count = shard
+    if count < 1 or not 1 <= number <= count:
+        raise Exception(
+            f"Invalid shard: {number}/{count}. The shard number must "
+            f"be between 1 and the shard count"
+        )
+
+
+def shard_of(
+    endpoint_name: str, method: str, index: int, count: int
+) -> int:
+    """Get the shard a test request belongs to.
+
+    A stable hash is used, so all processes and machines agree on the
+    assignment.
+
+    Args:
+        endpoint_name: Endpoint name
+        method: HTTP method
+        index: Index of the request among the endpoint's requests
+        count: Number of shards
+
+    Returns:
+        The shard number (starting from 1)
+    """
+    digest = hashlib.blake2b(
+        f"{method.lower()} {endpoint_name} {index}".encode(),
+        digest_size=8,
+    ).digest()
+    return int.from_bytes(digest, "big") % count + 1
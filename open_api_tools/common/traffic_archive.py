@@ -0,0 +1,296 @@
+# -*- coding: utf-8 -*-
+"""Store requests and their responses in an append-only archive.
+
+The archive consists of two files:
+
+- The data file starts with `ARCHIVE_MAGIC`, followed by one record per
+  request. A record is a `RECORD_HEADER` (the lengths of the three
+  parts), the metadata as JSON, the request body and the response body.
+- The index file (the data file's name + ".index") starts with
+  `INDEX_MAGIC`, followed by an `INDEX_ENTRY` (offset and length) for
+  each record, so that any record can be read without scanning the data
+  file.
+"""
+
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Tuple, Union
+from requests.structures import CaseInsensitiveDict
+
+ARCHIVE_MAGIC = b"OATARCH1"
+INDEX_MAGIC = b"OATINDX1"
+# Lengths of the metadata, the request body and the response body
+RECORD_HEADER = struct.Struct(">III")
+# Offset and length of a record in the data file
+INDEX_ENTRY = struct.Struct(">QI")
+
+
+@dataclass
+class RecordedResponse:
+    """A response read from an archive.
+
+    Has the attributes of a `requests` response that the validation
+    uses.
+    """
+
+    url: str
+    status_code: int
+    headers: CaseInsensitiveDict
+    # None if the body was not captured (e.x in an access log)
+    content: Union[bytes, None] = field(repr=False)
+    # Time it took to receive the response when it was recorded, in
+    # seconds
+    elapsed: Union[float, None] = None
+
+    def iter_content(self, chunk_size: int = 1) -> Iterator[bytes]:
+        """Iterate over the content in chunks."""
+        for start in range(0, len(self.content), chunk_size):
+            yield self.content[start : start + chunk_size]
+
+    def json(self) -> any:
+        """Parse the content as JSON."""
+        return json.loads(self.content)
+
+
+@dataclass
+class RecordedExchange:
+    """A request and its response, read from an archive or a log."""
+
+    # None if the endpoint is not known yet (in a log)
+    endpoint_name: Union[str, None]
+    method: str
+    request_url: str
+    # None if the headers were not captured (e.x in an access log)
+    request_headers: Union[Dict[str, str], None]
+    request_body: bytes = field(repr=False)
+    response: RecordedResponse
+    # When the request was sent (seconds since the epoch)
+    time: Union[float, None] = None
+
+
+def index_path(path: str) -> str:
+    """Get the location of the index of an archive."""
+    return path + ".index"
+
+
+class TrafficRecorder:
+    """Append requests and responses to an archive.
+
+    Can be used from several threads at once. Records are added to an
+    existing archive.
+    """
+
+    def __init__(self, path: str):
+        """Open the archive for writing.
+
+        Args:
+            path: Location of the data file
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._data = open(path, "ab")
+        self._index = open(index_path(path), "ab")
+        if self._data.tell() == 0:
+            self._data.write(ARCHIVE_MAGIC)
+        if self._index.tell() == 0:
+            self._index.write(INDEX_MAGIC)
+        self.count = (
+            self._index.tell() - len(INDEX_MAGIC)
+        ) // INDEX_ENTRY.size
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_args):
+        self.close()
+
+    def record(
+        self,
+        endpoint_name: str,
+        method: str,
+        request_url: str,
+        request,
+        response,
+        elapsed: Union[float, None] = None,
+    ) -> None:
+        """Add a request and its response to the archive.
+
+        Args:
+            endpoint_name: Endpoint name
+            method: HTTP method
+            request_url: The request URL
+            request: The `requests.PreparedRequest` that was sent
+            response: The `requests` or `httpx` response
+            elapsed: Time it took to receive the response, in seconds
+        """
+        request_body = request.body or b""
+        if isinstance(request_body, str):
+            request_body = request_body.encode()
+
+        metadata = json.dumps(
+            {
+                "endpoint_name": endpoint_name,
+                "method": method.lower(),
+                "request_url": request_url,
+                "request_headers": dict(request.headers),
+                "url": str(response.url),
+                "status_code": response.status_code,
+                "response_headers": dict(response.headers),
+                "elapsed": elapsed,
+                "time": time.time(),
+            }
+        ).encode()
+        content = response.content
+        header = RECORD_HEADER.pack(
+            len(metadata), len(request_body), len(content)
+        )
+
+        with self._lock:
+            offset = self._data.tell()
+            self._data.write(header)
+            self._data.write(metadata)
+            self._data.write(request_body)
+            self._data.write(content)
+            self._index.write(
+                INDEX_ENTRY.pack(offset, self._data.tell() - offset)
+            )
+            self.count += 1
+
+    def flush(self) -> None:
+        """Write the buffered records to disk."""
+        with self._lock:
+            self._data.flush()
+            self._index.flush()
+
+    def close(self) -> None:
+        """Close the archive."""
+        with self._lock:
+            self._data.close()
+            self._index.close()
+
+
+class TrafficArchive:
+    """Read an archive written by `TrafficRecorder`."""
+
+    def __init__(self, path: str):
+        """Open the archive.
+
+        If the index is missing, the records are found by scanning the
+        data file.
+
+        Args:
+            path: Location of the data file
+        """
+        self.path = path
+        with open(path, "rb") as file:
+            if file.read(len(ARCHIVE_MAGIC)) != ARCHIVE_MAGIC:
+                raise Exception(f"{path} is not a traffic archive")
+            self._data = (
+                mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+                if os.path.getsize(path) > len(ARCHIVE_MAGIC)
+                else b""
+            )
+        self.entries = self._read_index()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_args):
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __getitem__(self, index: int) -> RecordedExchange:
+        offset, length = self.entries[index]
+        return self._read_record(offset, length)
+
+    def __iter__(self) -> Iterator[RecordedExchange]:
+        for offset, length in self.entries:
+            yield self._read_record(offset, length)
+
+    def close(self) -> None:
+        """Close the archive."""
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+
+    def _read_index(self) -> List[Tuple[int, int]]:
+        try:
+            with open(index_path(self.path), "rb") as file:
+                index = file.read()
+        except FileNotFoundError:
+            return self._scan()
+        if not index.startswith(INDEX_MAGIC):
+            raise Exception(f"{index_path(self.path)} is not an index")
+        entries = index[len(INDEX_MAGIC) :]
+        # Skip entries and records that were not fully written
+        entries = entries[
+            : len(entries) - len(entries) % INDEX_ENTRY.size
+        ]
+        return [
+            (offset, length)
+            for offset, length in INDEX_ENTRY.iter_unpack(entries)
+            if offset + length <= len(self._data)
+        ]
+
+    def _scan(self) -> List[Tuple[int, int]]:
+        entries = []
+        offset = len(ARCHIVE_MAGIC)
+        while offset + RECORD_HEADER.size <= len(self._data):
+            length = RECORD_HEADER.size + sum(
+                RECORD_HEADER.unpack_from(self._data, offset)
+            )
+            if offset + length > len(self._data):
+                break
+            entries.append((offset, length))
+            offset += length
+        return entries
+
+    def _read_record(
+        self, offset: int, length: int
+    ) -> RecordedExchange:
+        (
+            metadata_length,
+            request_length,
+            response_length,
+        ) = RECORD_HEADER.unpack_from(self._data, offset)
+        if (
+            RECORD_HEADER.size
+            + metadata_length
+            + request_length
+            + (response_length)
+            != length
+        ):
+            raise Exception(f"Corrupted record at offset {offset}")
+
+        start = offset + RECORD_HEADER.size
+        metadata = json.loads(
+            self._data[start : start + metadata_length]
+        )
+        start += metadata_length
+        request_body = self._data[start : start + request_length]
+        start += request_length
+        content = self._data[start : start + response_length]
+
+        return RecordedExchange(
+            endpoint_name=metadata["endpoint_name"],
+            method=metadata["method"],
+            request_url=metadata["request_url"],
+            request_headers=metadata["request_headers"],
+            request_body=request_body,
+            response=RecordedResponse(
+                url=metadata["url"],
+                status_code=metadata["status_code"],
+                headers=CaseInsensitiveDict(
+                    metadata["response_headers"]
+                ),
+                content=content,
+                elapsed=metadata["elapsed"],
+            ),
+            time=metadata["time"],
+        )
@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+"""Read requests and responses from HAR files and access logs.
+
+Supported formats:
+
+- "har" - a HAR file (as exported by browsers and proxies). The entries
+  are streamed, so the file does not have to fit into memory
+- "jsonl" - one HAR entry (a JSON object with "request" and "response")
+  per line
+- "access" - an access log in the Common or Combined Log Format. Only
+  the method, the URL and the status code are known
+"""
+
+import base64
+import json
+import os
+import re
+from typing import Iterator
+from requests.structures import CaseInsensitiveDict
+
+from open_api_tools.common.json_stream import JsonArrayParser
+from open_api_tools.common.traffic_archive import (
+    RecordedExchange,
+    RecordedResponse,
+)
+
+LOG_FORMATS = ["har", "jsonl", "access"]
+
+# Size of the chunks log files are read in, in bytes
+READ_CHUNK_SIZE = 1024 * 1024
+
+_HAR_ENTRIES = re.compile(rb'"entries"\s*:\s*')
+# e.x 127.0.0.1 - - [10/Oct/2000:13:55:36 -0700] "GET /a HTTP/1.1" 200
+_ACCESS_LOG_LINE = re.compile(
+    r'^\S+ \S+ \S+ \[[^\]]*\] "(?P<method>[A-Za-z]+) (?P<url>\S+)'
+    r'(?: [^"]*)?" (?P<status>\d{3})\b'
+)
+
+
+def detect_log_format(path: str) -> str:
+    """Guess the format of a log file from its extension.
+
+    Args:
+        path: Location of the file
+
+    Returns:
+        "har" for `.har`, "jsonl" for `.jsonl` and `.ndjson`, "access"
+        otherwise
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".har":
+        return "har"
+    if extension in (".jsonl", ".ndjson"):
+        return "jsonl"
+    return "access"
+
+
+def read_log_records(path: str, log_format: str) -> Iterator[any]:
+    """Read the raw records of a log file, one at a time.
+
+    Records are parsed by `parse_log_record`, which is the expensive
+    part, so that it can be done in another process.
+
+    Args:
+        path: Location of the file
+        log_format: One of `LOG_FORMATS`
+
+    Returns:
+        HAR entries (for "har") or lines (for other formats)
+    """
+    if log_format not in LOG_FORMATS:
+        raise Exception(
+            f"Unknown log format: {log_format}. Expected one of "
+            f"{', '.join(LOG_FORMATS)}"
+        )
+    if log_format == "har":
+        yield from _read_har_entries(path)
+        return
+
+    with open(path, encoding="utf-8", errors="replace") as file:
+        for line in file:
+            line = line.strip()
+            if line:
+                yield line
+
+
+def parse_log_record(record: any, log_format: str) -> RecordedExchange:
+    """Turn a raw record into a request and its response.
+
+    The endpoint of the request is not known yet, so `endpoint_name` is
+    None.
+
+    Args:
+        record: A record returned by `read_log_records`
+        log_format: One of `LOG_FORMATS`
+
+    Returns:
+        The request and the response
+
+    Raises:
+        Exception if the record can't be parsed
+    """
+    if log_format == "har":
+        return parse_har_entry(record)
+    if log_format == "jsonl":
+        return parse_har_entry(json.loads(record))
+
+    match = _ACCESS_LOG_LINE.match(record)
+    if match is None:
+        raise Exception("Not a Common or Combined Log Format line")
+    return RecordedExchange(
+        endpoint_name=None,
+        method=match["method"].lower(),
+        request_url=match["url"],
+        request_headers=None,
+        request_body=b"",
+        response=RecordedResponse(
+            url=match["url"],
+            status_code=int(match["status"]),
+            headers=CaseInsensitiveDict(),
+            content=None,
+        ),
+    )
+
+
+def parse_har_entry(entry: dict) -> RecordedExchange:
+    """Turn a HAR entry into a request and its response.
+
+    Args:
+        entry: An item of `log.entries`
+
+    Returns:
+        The request and the response. The response content is None if it
+        was not captured
+    """
+    request = entry["request"]
+    response = entry["response"]
+    if not response.get("status"):
+        raise Exception("The request did not receive a response")
+
+    request_headers = {
+        header["name"]: header["value"]
+        for header in request.get("headers") or []
+    }
+    post_data = request.get("postData") or {}
+    if post_data.get("mimeType") and not any(
+        name.lower() == "content-type" for name in request_headers
+    ):
+        request_headers["Content-Type"] = post_data["mimeType"]
+
+    response_headers = CaseInsensitiveDict(
+        {
+            header["name"]: header["value"]
+            for header in response.get("headers") or []
+        }
+    )
+    content = response.get("content") or {}
+    if "Content-Type" not in response_headers and content.get(
+        "mimeType"
+    ):
+        response_headers["Content-Type"] = content["mimeType"]
+
+    text = content.get("text")
+    if text is None:
+        body = None if content.get("size", 0) > 0 else b""
+    elif content.get("encoding") == "base64":
+        body = base64.b64decode(text)
+    else:
+        body = text.encode()
+
+    elapsed = entry.get("time")
+    return RecordedExchange(
+        endpoint_name=None,
+        method=request["method"].lower(),
+        request_url=request["url"],
+        request_headers=request_headers,
+        request_body=(post_data.get("text") or "").encode(),
+        response=RecordedResponse(
+            url=request["url"],
+            status_code=response["status"],
+            headers=response_headers,
+            content=body,
+            elapsed=(
+                None
+                if elapsed is None or elapsed < 0
+                else elapsed / 1000
+            ),
+        ),
+    )
+
+
+def _read_har_entries(path: str) -> Iterator[dict]:
+    """Stream the items of `log.entries` of a HAR file."""
+    parser = JsonArrayParser(trailing_content=True)
+    with open(path, "rb") as file:
+        # Skip everything before the entries (the creator, the pages)
+        head = b""
+        while True:
+            chunk = file.read(READ_CHUNK_SIZE)
+            if not chunk:
+                raise Exception(
+                    f"{path} is not a HAR file (no entries)"
+                )
+            head += chunk
+            match = _HAR_ENTRIES.search(head)
+            if match is not None:
+                break
+            # Keep the end, in case the key is split between chunks
+            head = head[-64:]
+
+        yield from parser.feed(head[match.end() :])
+        while not parser.finished:
+            chunk = file.read(READ_CHUNK_SIZE)
+            if not chunk:
+                yield from parser.close()
+                return
+            yield from parser.feed(chunk)
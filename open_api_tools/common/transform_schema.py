@@ -2,53 +2,411 @@
 """OpenAPI schema converters and transformers."""
 
 
-import re
 import json
-from jsonschema import validate
+import urllib.parse
+from jsonschema.exceptions import ValidationError, best_match
+from jsonschema.validators import validator_for
 from openapi_schema_to_json_schema import to_json_schema
-from typing import Dict
+from typing import Dict, Iterable, List, Set, Union
 
+from open_api_tools.common.json_stream import JsonArrayParser
+from open_api_tools.common.validation_policy import ValidationPolicy
 
-def resolve_schema_references(open_api: Dict[str, any]):
-    """Resolve the $ref objects in the OpenAPI schema.
 
-    Warning: this function uses a naїve string substitution approach, which
-    won't work for structures that have a circular reference with themself.
+class ReferenceResolver:
+    """Resolve the $ref objects in an OpenAPI document.
+
+    Every referenced node is converted to JSON schema only once and kept
+    in `definitions`. References are rewritten to point at those
+    definitions rather than being expanded in place, so components that
+    reference themselves (directly or through other components) are
+    supported.
+
+    Any local JSON pointer (`#/components/schemas/a`,
+    `#/paths/~1api/...`) can be used as a reference.
+    """
+
+    def __init__(self, document: Dict[str, any]):
+        """Create a resolver for a document.
+
+        Args:
+            document: OpenAPI Schema v3.0
+        """
+        self.document = document
+        # JSON pointer -> converted JSON schema
+        self.definitions: Dict[str, Dict[str, any]] = {}
+        # JSON pointer -> JSON pointers it references
+        self.references: Dict[str, Set[str]] = {}
+
+    def resolve(self, schema: Dict[str, any]) -> Dict[str, any]:
+        """Convert an OpenAPI schema object into JSON schema.
+
+        Args:
+            schema: OpenAPI schema for an object
+
+        Returns:
+            JSON schema. Referenced components are included under
+            `definitions`
+
+        Raises:
+            Exception on invalid references
+        """
+        references = set()
+        json_schema = to_json_schema(
+            self._rewrite(schema, references), {"cloneSchema": False}
+        )
+
+        reachable = set()
+        while references:
+            pointer = references.pop()
+            if pointer not in reachable:
+                reachable.add(pointer)
+                references |= self.references[pointer]
+
+        if reachable:
+            json_schema["definitions"] = {
+                _definition_name(pointer): self.definitions[pointer]
+                for pointer in sorted(reachable)
+            }
+        return json_schema
+
+    def _rewrite(self, node: any, references: Set[str]) -> any:
+        """Copy a node while pointing all references at `definitions`.
+
+        Args:
+            node: OpenAPI schema node
+            references: set to add the found references to
+
+        Returns:
+            A copy of the node
+        """
+        if isinstance(node, dict):
+            if isinstance(node.get("$ref"), str):
+                pointer = self._load(node["$ref"])
+                references.add(pointer)
+                return {
+                    "$ref": "#/definitions/"
+                    + urllib.parse.quote(
+                        _escape(_definition_name(pointer)), safe="~"
+                    )
+                }
+            return {
+                key: self._rewrite(value, references)
+                for key, value in node.items()
+            }
+        elif isinstance(node, list):
+            return [self._rewrite(value, references) for value in node]
+        else:
+            return node
+
+    def _load(self, reference: str) -> str:
+        """Convert the referenced node, unless that was already done.
+
+        Args:
+            reference: the value of the $ref
+
+        Returns:
+            Normalized JSON pointer
+
+        Raises:
+            Exception on invalid references
+        """
+        if not reference.startswith("#"):
+            raise Exception(
+                f"Unable to resolve the '{reference}' reference. Only "
+                f"references within the same document are supported"
+            )
+        pointer = urllib.parse.unquote(reference[1:])
+
+        if pointer in self.references:
+            return pointer
+        # Mark the node as visited before descending, to break cycles
+        self.references[pointer] = set()
+
+        try:
+            node = self.document
+            try:
+                for part in pointer.split("/")[1:]:
+                    part = part.replace("~1", "/").replace("~0", "~")
+                    if isinstance(node, list) or (
+                        # YAML parses response codes as integers
+                        part not in node
+                        and part.isdigit()
+                    ):
+                        part = int(part)
+                    node = node[part]
+            except (KeyError, IndexError, ValueError, TypeError):
+                raise Exception(
+                    f"Unable to find the definition for the "
+                    f"'{reference}' OpenAPI component"
+                )
+
+            references = set()
+            definition = to_json_schema(
+                self._rewrite(node, references), {"cloneSchema": False}
+            )
+            del definition["$schema"]
+        except BaseException:
+            # Forget this node and the nodes loaded while converting it
+            # (they may reference it), or later lookups would find the
+            # pointers without definitions and fail
+            loaded = list(self.references)
+            for loaded_pointer in loaded[loaded.index(pointer) :]:
+                del self.references[loaded_pointer]
+                self.definitions.pop(loaded_pointer, None)
+            raise
+        self.definitions[pointer] = definition
+        self.references[pointer] = references
+        return pointer
+
+
+def _definition_name(pointer: str) -> str:
+    """Name of the JSON schema definition for a JSON pointer."""
+    return pointer.lstrip("/")
+
+
+def _escape(name: str) -> str:
+    """Escape a string for use as a part of a JSON pointer."""
+    return name.replace("~", "~0").replace("/", "~1")
+
+
+def compile_validator(
+    schema: Dict[str, any], references: ReferenceResolver
+):
+    """Transform an OpenAPI schema object into a JSON schema validator.
 
     Args:
-        open_api: OpenAPI Schema v3.0
+        schema:
+            OpenAPI schema for an object
+            The schema should not include content type keys or
+            response codes
+        references:
+            Resolver for the document the schema object belongs to
 
     Returns:
-        Resolved OpenAPI schema
+        A jsonschema validator instance that can be reused
 
     Raises:
-        Exception on invalid references
+        SchemaError if the resulting JSON schema is invalid
     """
-    open_api_string = json.dumps(open_api)
-    pattern = re.compile(
-        r"{\"\$ref\": \"#\/components\/(\w+)\/(\w+)\"}"
-    )
+    return create_validator(references.resolve(schema))
+
+
+def create_validator(
+    json_schema: Dict[str, any], check_schema: bool = True
+):
+    """Create a JSON schema validator.
+
+    Args:
+        json_schema: JSON schema
+        check_schema:
+            Whether to make sure the JSON schema is valid. Can be
+            skipped for schemas that were already checked before
+
+    Returns:
+        A jsonschema validator instance
+
+    Raises:
+        SchemaError if the JSON schema is invalid
+    """
+    validator_class = validator_for(json_schema)
+    if check_schema:
+        validator_class.check_schema(json_schema)
+    return validator_class(json_schema)
 
-    for (component_group, component_name) in re.findall(
-        pattern, open_api_string
+
+def validate_content(validator, content: str, mime_type: str):
+    """Validate a response object or request body object.
+
+    Args:
+        validator:
+            A validator created by `compile_validator`
+        content:
+            The content to validate (response object or request body
+            object)
+        mime_type:
+            The mime type of the content to validate
+
+    Raises:
+        ValidationError if the content does not match the schema
+    """
+    if mime_type == "application/json":
+        # Make sure the response is a valid JSON object
+        json_content = json.loads(content)
+
+        # Test the response against JSON schema
+        error = best_match(validator.iter_errors(json_content))
+        if error is not None:
+            raise error
+    else:
+        # It doesn't yet validate non JSON responses
+        pass
+
+
+def get_array_schema(validator) -> Union[Dict[str, any], None]:
+    """Find the schema of an array whose items can be validated alone.
+
+    Args:
+        validator: A validator created by `compile_validator`
+
+    Returns:
+        The JSON schema of the array, with references followed, or None
+        if the content is not a (non-tuple) array
+    """
+    node = validator.schema
+    while isinstance(node, dict) and "$ref" in node:
+        _url, node = validator.resolver.resolve(node["$ref"])
+    if (
+        not isinstance(node, dict)
+        or node.get("type") != "array"
+        or not isinstance(node.get("items"), dict)
     ):
-        try:
-            component = open_api["components"][component_group][
-                component_name
-            ]
-        except KeyError:
-            raise Exception(
-                f"Unable to find the definition for the '{component_group}/"
-                f"{component_name}' OpenAPI component"
-            )
+        return None
+    return node
 
-        open_api_string = open_api_string.replace(
-            f'{"{"}"$ref": "#/components/{component_group}/'
-            f'{component_name}"{"}"}',
-            json.dumps(component),
-        )
 
-    return json.loads(open_api_string)
+def create_item_validator(validator, array_schema: Dict[str, any]):
+    """Create a validator for the items of an array.
+
+    Args:
+        validator: The validator for the whole array
+        array_schema: The schema found by `get_array_schema`
+
+    Returns:
+        A jsonschema validator instance
+    """
+    item_schema = {
+        **array_schema["items"],
+        "definitions": validator.schema.get("definitions", {}),
+    }
+    if "$schema" in validator.schema:
+        item_schema["$schema"] = validator.schema["$schema"]
+    return create_validator(item_schema, check_schema=False)
+
+
+def validate_content_stream(
+    item_validator,
+    array_schema: Dict[str, any],
+    chunks: Iterable[bytes],
+    validation_policy: Union[ValidationPolicy, None] = None,
+) -> Union[List[int], None]:
+    """Validate a JSON array as it is being received.
+
+    Only one item is kept in memory at a time (or `count` items for a
+    "random" validation policy). `uniqueItems` is not checked, as that
+    would require keeping all items.
+
+    Args:
+        item_validator: A validator created by `create_item_validator`
+        array_schema: The schema found by `get_array_schema`
+        chunks: The content of the array
+        validation_policy:
+            Only validate some of the items. With the "first" mode, the
+            rest of the content is not read, so the item count is not
+            checked
+
+    Returns:
+        Indices of the validated items, or None if all items were
+        validated
+
+    Raises:
+        ValidationError if the content does not match the schema
+        ValueError if the content is not a JSON array
+    """
+    parser = JsonArrayParser()
+    selector = (
+        None
+        if validation_policy is None
+        else validation_policy.selector()
+    )
+    checked = []
+    count = 0
+
+    def validate_items(items):
+        nonlocal count
+        for item in items:
+            if selector is None:
+                _validate_item(item_validator, count, item)
+            else:
+                for index, selected_item in selector.add(item):
+                    _validate_item(item_validator, index, selected_item)
+                    checked.append(index)
+            count += 1
+
+    for chunk in chunks:
+        validate_items(parser.feed(chunk))
+        if selector is not None and selector.done:
+            return checked
+    validate_items(parser.close())
+
+    if selector is not None:
+        for index, item in selector.finish():
+            _validate_item(item_validator, index, item)
+            checked.append(index)
+
+    _validate_item_count(array_schema, count)
+    return None if selector is None else checked
+
+
+def validate_content_sample(
+    validator,
+    item_validator,
+    array_schema: Dict[str, any],
+    content: str,
+    validation_policy: ValidationPolicy,
+) -> Union[List[int], None]:
+    """Validate some of the items of a JSON array.
+
+    Args:
+        validator: The validator for the whole array
+        item_validator: A validator created by `create_item_validator`
+        array_schema: The schema found by `get_array_schema`
+        content: The JSON content
+        validation_policy: Which items to validate
+
+    Returns:
+        Indices of the validated items, or None if the content was
+        validated in full (because it is not an array)
+
+    Raises:
+        ValidationError if the content does not match the schema
+    """
+    json_content = json.loads(content)
+    if not isinstance(json_content, list):
+        error = best_match(validator.iter_errors(json_content))
+        if error is not None:
+            raise error
+        return None
+
+    checked = validation_policy.select(len(json_content))
+    for index in checked:
+        _validate_item(item_validator, index, json_content[index])
+    _validate_item_count(array_schema, len(json_content))
+    return checked
+
+
+def _validate_item(item_validator, index: int, item: any) -> None:
+    """Validate an array item."""
+    error = best_match(item_validator.iter_errors(item))
+    if error is not None:
+        error.path.appendleft(index)
+        raise error
+
+
+def _validate_item_count(
+    array_schema: Dict[str, any], count: int
+) -> None:
+    """Check the `minItems` and `maxItems` of an array."""
+    if count < array_schema.get("minItems", 0):
+        raise ValidationError(
+            f"Array has {count} items, which is fewer than the "
+            f"minimum of {array_schema['minItems']}"
+        )
+    if count > array_schema.get("maxItems", count):
+        raise ValidationError(
+            f"Array has {count} items, which is more than the "
+            f"maximum of {array_schema['maxItems']}"
+        )
 
 
 def validate_object(
@@ -59,7 +417,9 @@ def validate_object(
 ):
     """Validate a response object or request body object.
 
-    ...by transforming it to JSON schema first.
+    ...by transforming it to JSON schema first. Prefer
+    `open_api_tools.common.validator_registry.get_validator` when the
+    same schema object is validated repeatedly.
 
     Args:
         schema:
@@ -73,16 +433,10 @@ def validate_object(
             The mime type of the content to validate
     """
     if mime_type == "application/json":
-        resolved_schema = resolve_schema_references(
-            dict(schema=schema, components=components)
-        )["schema"]
-        json_schema = to_json_schema(resolved_schema)
-
-        # Make sure the response is a valid JSON object
-        json_content = json.loads(content)
-
-        # Test the response against JSON schema
-        validate(json_content, json_schema)
-    else:
-        # It doesn't yet validate non JSON responses
-        pass
+        validate_content(
+            compile_validator(
+                schema, ReferenceResolver(dict(components=components))
+            ),
+            content,
+            mime_type,
+        )
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""Skip validating response bodies that were already found valid."""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Tuple, Union
+from termcolor import colored
+
+from open_api_tools.common.transform_schema import validate_content
+
+VALIDATION_CACHE_EVICTION_POLICIES = ["lru", "fifo"]
+
+
+class ValidationCache:
+    """Remember which bodies passed validation against which schema.
+
+    Entries are keyed by the validator key (endpoint, method, status
+    code, mime type) and a hash of the body, so a body is only parsed
+    and validated once per response schema. Only successful validations
+    are remembered, so invalid bodies are always reported.
+    """
+
+    def __init__(self, max_size: int = 4096, eviction: str = "lru"):
+        """Create a cache.
+
+        Args:
+            max_size: Max number of entries to keep
+            eviction:
+                Which entry to drop when the cache is full:
+                "lru" - the least recently used one
+                "fifo" - the oldest one
+        """
+        if max_size < 1:
+            raise Exception("Validation cache size must be positive")
+        if eviction not in VALIDATION_CACHE_EVICTION_POLICIES:
+            raise Exception(
+                f"Unknown eviction policy: {eviction}. Expected one of "
+                f"{', '.join(VALIDATION_CACHE_EVICTION_POLICIES)}"
+            )
+
+        self.max_size = max_size
+        self.eviction = eviction
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def hit_rate(self) -> float:
+        """Share of lookups that were hits."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def validate(
+        self,
+        validator_key: Tuple,
+        validator,
+        content: Union[bytes, str],
+        mime_type: str,
+    ) -> None:
+        """Validate content, unless the same content was already valid.
+
+        Args:
+            validator_key:
+                Key of the validator in the validator registry
+            validator: A validator created by `compile_validator`
+            content: The content to validate
+            mime_type: The mime type of the content to validate
+
+        Raises:
+            ValidationError if the content does not match the schema
+        """
+        if isinstance(content, str):
+            content = content.encode()
+        key = (
+            validator_key,
+            hashlib.blake2b(content, digest_size=16).digest(),
+        )
+
+        with self._lock:
+            if key in self._entries:
+                self.hits += 1
+                if self.eviction == "lru":
+                    self._entries.move_to_end(key)
+                return
+            self.misses += 1
+
+        validate_content(validator, content, mime_type)
+
+        with self._lock:
+            self._entries[key] = None
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop all entries and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def print_summary(self) -> None:
+        """Print the hit/miss counters."""
+        print(
+            colored("Validation cache: ", "cyan")
+            + f"{self.hits} hits, {self.misses} misses "
+            f"({self.hit_rate:.1%} hit rate), {self.evictions} "
+            f"evictions, {len(self)}/{self.max_size} entries"
+        )
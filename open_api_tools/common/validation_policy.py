@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""Decide which items of large array responses get validated."""
+
+import random
+from dataclasses import dataclass
+from typing import List, Union
+
+VALIDATION_POLICY_MODES = ["first", "random", "stride"]
+
+
+@dataclass
+class ValidationPolicy:
+    """Validate only some of the items of array responses.
+
+    Everything that is not an item of a top-level array (the other
+    responses, request bodies, the item count) is still validated in
+    full.
+    """
+
+    # "first" - the first `count` items
+    # "random" - `count` randomly picked items
+    # "stride" - every `count`-th item, starting with the first one
+    mode: str
+    count: int
+    # Seed for the "random" mode. When set, the same indices are picked
+    # for arrays of the same length
+    seed: Union[int, None] = None
+
+    def __post_init__(self):
+        if self.mode not in VALIDATION_POLICY_MODES:
+            raise Exception(
+                f"Unknown validation policy mode: {self.mode}. "
+                f"Expected one of {', '.join(VALIDATION_POLICY_MODES)}"
+            )
+        if self.count < 1:
+            raise Exception("Validation policy count must be positive")
+
+    def select(self, length: int) -> List[int]:
+        """Pick the indices of the items to validate.
+
+        Args:
+            length: Number of items in the array
+
+        Returns:
+            Sorted indices
+        """
+        if self.mode == "first":
+            return list(range(min(self.count, length)))
+        if self.mode == "stride":
+            return list(range(0, length, self.count))
+        return sorted(
+            random.Random(self.seed).sample(
+                range(length), min(self.count, length)
+            )
+        )
+
+    def selector(self) -> "ItemSelector":
+        """Create a selector for an array of unknown length."""
+        return ItemSelector(self)
+
+
+class ItemSelector:
+    """Pick the items to validate while an array is being received.
+
+    For the "random" mode, reservoir sampling is used, so at most
+    `count` items are kept in memory.
+    """
+
+    def __init__(self, policy: ValidationPolicy):
+        """Create a selector.
+
+        Args:
+            policy: The validation policy
+        """
+        self.policy = policy
+        self._random = random.Random(policy.seed)
+        self._reservoir = []
+        self.seen = 0
+
+    @property
+    def done(self) -> bool:
+        """Whether no more items will be selected."""
+        return (
+            self.policy.mode == "first"
+            and self.seen >= self.policy.count
+        )
+
+    def add(self, item: any) -> List[tuple]:
+        """Offer the next item of the array.
+
+        Args:
+            item: The item
+
+        Returns:
+            (index, item) pairs that can be validated right away
+        """
+        index = self.seen
+        self.seen += 1
+        if self.policy.mode == "first":
+            return [(index, item)] if index < self.policy.count else []
+        if self.policy.mode == "stride":
+            return (
+                [(index, item)]
+                if index % self.policy.count == 0
+                else []
+            )
+
+        if len(self._reservoir) < self.policy.count:
+            self._reservoir.append((index, item))
+        else:
+            slot = self._random.randint(0, index)
+            if slot < self.policy.count:
+                self._reservoir[slot] = (index, item)
+        return []
+
+    def finish(self) -> List[tuple]:
+        """Get the (index, item) pairs that were held back."""
+        reservoir = sorted(self._reservoir, key=lambda pair: pair[0])
+        self._reservoir = []
+        return reservoir
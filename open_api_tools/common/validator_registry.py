@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+"""Build JSON schema validators once per loaded OpenAPI schema."""
+
+import threading
+from typing import Dict, Iterator, List, Tuple, Union
+
+from open_api_tools.common.load_schema import Schema
+from open_api_tools.common.transform_schema import (
+    compile_validator,
+    create_item_validator,
+    get_array_schema,
+)
+
+# Only JSON content is validated (see `validate_content`)
+VALIDATED_MIME_TYPES = ["application/json"]
+
+# Validators may be requested from several threads at once (see
+# `open_api_tools.common.scheduler`), while the reference resolver is
+# not thread safe
+_compile_lock = threading.Lock()
+
+HTTP_METHODS = [
+    "get",
+    "put",
+    "post",
+    "delete",
+    "options",
+    "head",
+    "patch",
+    "trace",
+]
+
+
+def get_object_schema(
+    schema: Schema,
+    endpoint_name: str,
+    method: str,
+    status_code: Union[int, str, None],
+    mime_type: str,
+) -> Dict[str, any]:
+    """Find the OpenAPI schema for a request body or a response.
+
+    Args:
+        schema: OpenAPI schema
+        endpoint_name: endpoint name
+        method: HTTP method name
+        status_code:
+            Response code. `None` stands for the request body
+        mime_type: Content type of the request body or the response
+
+    Returns:
+        The raw OpenAPI schema object
+    """
+    endpoint_schema = getattr(
+        schema.schema.paths[endpoint_name], method.lower()
+    )
+    if status_code is None:
+        content = endpoint_schema.requestBody.content
+    else:
+        content = endpoint_schema.responses[status_code].content
+    return content[mime_type].raw_element["schema"]
+
+
+def get_validator(
+    schema: Schema,
+    endpoint_name: str,
+    method: str,
+    status_code: Union[int, str, None],
+    mime_type: str,
+):
+    """Get a compiled validator for a request body or a response.
+
+    The validator is built on first use and then reused for the lifetime
+    of the `Schema` object.
+
+    Args:
+        schema: OpenAPI schema
+        endpoint_name: endpoint name
+        method: HTTP method name
+        status_code:
+            Response code. `None` stands for the request body
+        mime_type: Content type of the request body or the response
+
+    Returns:
+        A jsonschema validator instance or None if content of this type
+        is not validated
+    """
+    if mime_type not in VALIDATED_MIME_TYPES:
+        return None
+
+    key = (endpoint_name, method.lower(), status_code, mime_type)
+    validator = schema.validators.get(key)
+    if validator is not None:
+        return validator
+
+    with _compile_lock:
+        if key not in schema.validators:
+            schema.validators[key] = compile_validator(
+                get_object_schema(schema, *key), schema.references
+            )
+        return schema.validators[key]
+
+
+def get_item_validator(
+    schema: Schema,
+    endpoint_name: str,
+    method: str,
+    status_code: Union[int, str, None],
+    mime_type: str,
+) -> Union[Tuple[any, Dict[str, any]], None]:
+    """Get a validator for the items of an array response.
+
+    Used to validate large arrays one item at a time (see
+    `validate_content_stream`).
+
+    Args:
+        schema: OpenAPI schema
+        endpoint_name: endpoint name
+        method: HTTP method name
+        status_code:
+            Response code. `None` stands for the request body
+        mime_type: Content type of the request body or the response
+
+    Returns:
+        The item validator and the JSON schema of the array, or None if
+        the content is not a JSON array
+    """
+    validator = get_validator(
+        schema, endpoint_name, method, status_code, mime_type
+    )
+    if validator is None:
+        return None
+    array_schema = get_array_schema(validator)
+    if array_schema is None:
+        return None
+
+    key = (
+        endpoint_name,
+        method.lower(),
+        status_code,
+        mime_type,
+        "items",
+    )
+    item_validator = schema.validators.get(key)
+    if item_validator is None:
+        with _compile_lock:
+            if key not in schema.validators:
+                schema.validators[key] = create_item_validator(
+                    validator, array_schema
+                )
+            item_validator = schema.validators[key]
+    return item_validator, array_schema
+
+
+def iterate_validator_keys(
+    schema: Schema,
+    methods: Union[List[str], None] = None,
+) -> Iterator[Tuple[str, str, Union[int, str, None], str]]:
+    """Iterate over the keys of all validators the schema defines.
+
+    Args:
+        schema: OpenAPI schema
+        methods: Only include these HTTP methods. Default: all methods
+
+    Returns:
+        Iterator of (endpoint name, method, status code, mime type)
+    """
+    methods = (
+        None
+        if methods is None
+        else [method.lower() for method in methods]
+    )
+    for endpoint_name, endpoint_data in schema.schema.paths.items():
+        for method in HTTP_METHODS:
+            if methods is not None and method not in methods:
+                continue
+            endpoint_schema = getattr(endpoint_data, method, None)
+            if endpoint_schema is None:
+                continue
+
+            if endpoint_schema.requestBody is not None:
+                for mime_type in endpoint_schema.requestBody.content:
+                    yield endpoint_name, method, None, mime_type
+
+            for status_code, response_schema in (
+                endpoint_schema.responses or {}
+            ).items():
+                for mime_type in response_schema.content or {}:
+                    yield endpoint_name, method, status_code, mime_type
+
+
+def warm_up_validators(
+    schema: Schema,
+    methods: Union[List[str], None] = None,
+) -> int:
+    """Build all validators up front.
+
+    Useful before running a long test so that the schema work is not
+    spread across the first requests to each endpoint.
+
+    Args:
+        schema: OpenAPI schema
+        methods: Only build validators for these HTTP methods
+
+    Returns:
+        The number of validators available
+    """
+    for key in iterate_validator_keys(schema, methods):
+        get_validator(schema, *key)
+    return len(schema.validators)
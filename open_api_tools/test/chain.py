@@ -1,15 +1,33 @@
 # -*- coding: utf-8 -*-
 """Allow to test a chain of requests."""
+import asyncio
+import contextvars
+import inspect
 import json
-from typing import Callable, List, Dict, Union
+import urllib.parse as urlparse
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ThreadPoolExecutor,
+    wait,
+)
+from typing import Callable, List, Dict, Tuple, Union
+from urllib.parse import parse_qs
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from termcolor import colored
+import httpx
 
 from open_api_tools.common.load_schema import Schema
+from open_api_tools.common.sessions import (
+    SessionManager,
+    create_async_client,
+)
 from open_api_tools.test.test_endpoint import parse_parameters
 from open_api_tools.test.utils import create_request_payload
-from open_api_tools.validate.index import make_request
+from open_api_tools.validate.index import (
+    async_make_request,
+    make_request,
+)
 
 
 @dataclass
@@ -21,6 +39,11 @@ class Request:
     parameters: Union[
         None, Dict[str, any], Callable[[any, List[any]], Dict[str, any]]
     ] = None
+    # Name of the request, which other requests can depend on. Naming
+    # any request runs the chain as a graph (described in `README.md`)
+    name: Union[str, None] = None
+    # Names of earlier requests that must finish before this one starts
+    depends_on: Union[List[str], None] = None
 
 
 @dataclass
@@ -34,6 +57,9 @@ def chain(
     schema: Schema,
     definition: List[Union[Request, Validate]],
     before_request_send: Union[Callable[[str, any], any], None] = None,
+    sessions: Union[SessionManager, None] = None,
+    base_url: Union[str, None] = None,
+    concurrency: int = 4,
 ):
     """Create a chain of requests.
 
@@ -43,88 +69,648 @@ def chain(
             Chain definition. More info in `README.md`
         before_request_send:
             A pre-hook that allows to amend the request object
+        sessions:
+            Sessions to send the requests with (described in
+            `README.md`). By default, the shared sessions are used
+        base_url:
+            URL of the server to send the requests to. Must be one of
+            the servers in the schema. Default: the first server
+        concurrency:
+            Max number of requests sent at once, when the chain is a
+            graph
     """
 
     response = None
     request = {"requestBody": None}
 
-    base_url = schema.schema.servers[0].url
+    if base_url is None:
+        base_url = schema.schema.servers[0].url
+
+    if _is_graph(definition):
+        return _run_graph(
+            schema,
+            definition,
+            before_request_send,
+            sessions,
+            base_url,
+            concurrency,
+        )
 
     for index, line in enumerate(definition):
         if type(line) is Request:
-            print(
-                colored(f"[{index}/{len(definition)}] ", "cyan")
-                + colored(
-                    f"Fetching data from [{line.method}] {line.endpoint}",
-                    "blue",
-                )
+            request, body, request_url, endpoint_name = _prepare_line(
+                schema, definition, index, base_url, response, request
+            )
+            response = _send_line(
+                schema,
+                line,
+                body,
+                request_url,
+                endpoint_name,
+                before_request_send,
+                sessions,
             )
 
-            if line.endpoint not in schema.schema.paths:
-                raise Exception(
-                    f"{line.endpoint} endpoint does not exist in your OpenAPI "
-                    f"schema. Make sure to provide a URL without parameters "
-                    f"and with a trailing '/' if it is present in the "
-                    f"definition"
-                )
+        elif not _validate_line(definition, index, response):
+            return
+
 
-            parameters = parse_parameters(
-                endpoint_name=line.endpoint,
-                endpoint_data=schema.schema.paths[line.endpoint],
-                method=line.method.lower(),
-                generate_examples=False,
+async def async_chain(
+    schema: Schema,
+    definition: List[Union[Request, Validate]],
+    before_request_send: Union[Callable[[str, any], any], None] = None,
+    client: Union[httpx.AsyncClient, None] = None,
+    base_url: Union[str, None] = None,
+    concurrency: int = 4,
+):
+    """Asynchronous version of `chain`.
+
+    Responses passed to `parameters` functions and validators are
+    `httpx.Response` objects.
+
+    Args:
+        schema: A schema object
+        definition:
+            Chain definition. More info in `README.md`
+        before_request_send:
+            A pre-hook that allows to amend the request object
+        client:
+            The client to send the requests with. By default, a new
+            client is created for the chain
+        base_url:
+            URL of the server to send the requests to. Must be one of
+            the servers in the schema. Default: the first server
+        concurrency:
+            Max number of requests sent at once, when the chain is a
+            graph
+    """
+    if client is None:
+        async with create_async_client() as client:
+            return await async_chain(
+                schema,
+                definition,
+                before_request_send,
+                client,
+                base_url,
+                concurrency,
             )
 
-            if type(line.parameters) is dict:
-                request = line.parameters
-            elif callable(line.parameters):
-                request = line.parameters(parameters, response, request)
+    response = None
+    request = {"requestBody": None}
 
-            variation = [
-                request[parameter.name]
-                if parameter.name in request
-                else None
-                for parameter in parameters
-            ]
+    if base_url is None:
+        base_url = schema.schema.servers[0].url
 
-            body, request_url = create_request_payload(
-                line.endpoint, parameters, variation, base_url
+    if _is_graph(definition):
+        return await _async_run_graph(
+            schema,
+            definition,
+            before_request_send,
+            client,
+            base_url,
+            concurrency,
+        )
+
+    for index, line in enumerate(definition):
+        if type(line) is Request:
+            request, body, request_url, endpoint_name = _prepare_line(
+                schema, definition, index, base_url, response, request
+            )
+            response = await _async_send_line(
+                schema,
+                line,
+                body,
+                request_url,
+                endpoint_name,
+                before_request_send,
+                client,
             )
 
-            response = make_request(
-                request_url=request_url,
-                endpoint_name=line.endpoint,
-                method=line.method.lower(),
-                body=body,
-                schema=schema,
-                before_request_send=lambda request: before_request_send(
-                    line.endpoint, request
-                ),
+        elif not _validate_line(definition, index, response):
+            return
+
+
+def _send_line(
+    schema: Schema,
+    line: Request,
+    body,
+    request_url: str,
+    endpoint_name: str,
+    before_request_send: Union[Callable[[str, any], any], None],
+    sessions: Union[SessionManager, None],
+):
+    """Send the request of a `Request` line.
+
+    Returns:
+        The response object
+    """
+    response = make_request(
+        request_url=request_url,
+        endpoint_name=endpoint_name,
+        method=line.method.lower(),
+        body=body,
+        schema=schema,
+        before_request_send=None
+        if before_request_send is None
+        else lambda request: before_request_send(
+            endpoint_name, request
+        ),
+        session=None if sessions is None else sessions.get(request_url),
+    )
+    return _check_response(response)
+
+
+async def _async_send_line(
+    schema: Schema,
+    line: Request,
+    body,
+    request_url: str,
+    endpoint_name: str,
+    before_request_send: Union[Callable[[str, any], any], None],
+    client: httpx.AsyncClient,
+):
+    """Asynchronous version of `_send_line`."""
+    response = await async_make_request(
+        request_url=request_url,
+        endpoint_name=endpoint_name,
+        method=line.method.lower(),
+        body=body,
+        schema=schema,
+        before_request_send=None
+        if before_request_send is None
+        else lambda request: before_request_send(
+            endpoint_name, request
+        ),
+        client=client,
+    )
+    return _check_response(response)
+
+
+def _prepare_line(
+    schema: Schema,
+    definition: List[Union[Request, Validate]],
+    index: int,
+    base_url: str,
+    response,
+    request: Dict[str, any],
+    dependencies: Union[Dict[str, any], None] = None,
+):
+    """Compute the parameter values and the URL for a `Request` line.
+
+    Args:
+        dependencies:
+            When the chain is a graph, the responses the `parameters`
+            function asks for, by request name. Passed to it instead of
+            the previous response and parameter values. None if the
+            function asks for no named responses
+
+    Returns:
+        Parameter values, request body, request URL and endpoint name
+    """
+    line = definition[index]
+    print(
+        colored(f"[{index}/{len(definition)}] ", "cyan")
+        + colored(
+            f"Fetching data from [{line.method}] {line.endpoint}",
+            "blue",
+        )
+    )
+
+    endpoint_name = line.endpoint
+    # Values of the parameters that are part of a concrete path
+    url_parameters = {}
+    if endpoint_name not in schema.schema.paths:
+        parsed_url = urlparse.urlparse(line.endpoint)
+        match = schema.router.match_path(line.method, parsed_url.path)
+        if match is None:
+            raise Exception(
+                f"{line.endpoint} endpoint does not exist in your "
+                f"OpenAPI schema. Make sure to provide a URL with a "
+                f"trailing '/' if it is present in the definition"
+            )
+        endpoint_name, url_parameters = match
+        url_parameters.update(
+            (name, values[0])
+            for name, values in parse_qs(parsed_url.query).items()
+        )
+
+    parameters = parse_parameters(
+        endpoint_name=endpoint_name,
+        endpoint_data=schema.schema.paths[endpoint_name],
+        method=line.method.lower(),
+        generate_examples=False,
+    )
+
+    if type(line.parameters) is dict:
+        request = line.parameters
+    elif callable(line.parameters) and dependencies is not None:
+        request = line.parameters(parameters, **dependencies)
+    elif callable(line.parameters):
+        request = line.parameters(parameters, response, request)
+
+    values = {**request, **url_parameters}
+    variation = [
+        values[parameter.name] if parameter.name in values else None
+        for parameter in parameters
+    ]
+
+    body, request_url = create_request_payload(
+        endpoint_name, parameters, variation, base_url
+    )
+    return request, body, request_url, endpoint_name
+
+
+def _check_response(response):
+    """Raise an exception if the request failed.
+
+    Returns:
+        The response object
+    """
+    if response.type != "success":
+        raise Exception(
+            json.dumps(
+                response,
+                indent=4,
+                default=str,
+            )
+        )
+
+    return response.response
+
+
+def _validate_line(
+    definition: List[Union[Request, Validate]], index: int, response
+) -> bool:
+    """Run a `Validate` line.
+
+    Returns:
+        Whether to continue the chain
+    """
+    line = definition[index]
+    if type(line) is Validate:
+        print(
+            colored(f"[{index}/{len(definition)}] ", "cyan")
+            + colored(
+                "Validating the response",
+                "blue",
+            )
+        )
+        return line.validate(response)
+    else:
+        raise Exception(
+            f'Invalid chain line detected at index {index}:"'
+            f" {str(line)}"
+        )
+
+
+# Arguments of `parameters` functions that are never inferred as
+# dependencies, as they are the names of the sequential chain's
+# arguments (the parameter objects, the previous response and the
+# previous parameter values)
+_SEQUENTIAL_ARGUMENTS = {"parameters", "response", "request"}
+
+
+@dataclass
+class _Step:
+    """A `Request` line of a graph chain and its `Validate` lines."""
+
+    # Index of the `Request` line in the definition
+    index: int
+    request: Request
+    # Indices of the requests that must finish first
+    dependencies: List[int]
+    # Indices of the requests whose responses are passed to
+    # `parameters`, by argument name
+    arguments: Dict[str, int]
+    # Index of the request before this one, for `parameters` functions
+    # that ask for no named responses. They are called with its
+    # response and parameter values, like in a sequential chain
+    previous: Union[int, None] = None
+    validators: List[int] = field(default_factory=list)
+
+
+def _is_graph(definition: List[Union[Request, Validate]]) -> bool:
+    """Whether any request of the chain is named or has dependencies."""
+    return any(
+        type(line) is Request
+        and (line.name is not None or line.depends_on is not None)
+        for line in definition
+    )
+
+
+def _build_graph(
+    definition: List[Union[Request, Validate]],
+) -> List[_Step]:
+    """Find the dependencies of each request.
+
+    A request depends on the requests in its `depends_on`, and on the
+    requests whose names are arguments of its `parameters` function.
+    A `parameters` function that asks for no named responses depends on
+    the request before it instead. Requests may only depend on the ones
+    defined before them, so the graph has no cycles.
+    """
+    steps: List[_Step] = []
+    indices: Dict[str, int] = {}
+    for index, line in enumerate(definition):
+        if type(line) is Validate:
+            if not steps:
+                raise Exception(
+                    f"Validate line at index {index} must follow a "
+                    f"Request"
+                )
+            steps[-1].validators.append(index)
+            continue
+        if type(line) is not Request:
+            raise Exception(
+                f'Invalid chain line detected at index {index}:"'
+                f" {str(line)}"
             )
 
-            if response.type != "success":
+        for name in line.depends_on or []:
+            if name not in indices:
                 raise Exception(
-                    json.dumps(
-                        response,
-                        indent=4,
-                        default=str,
-                    )
+                    f"Request at index {index} depends on {name}, "
+                    f"which is not the name of a request before it"
                 )
+        dependencies = {indices[name] for name in line.depends_on or []}
+        arguments = {}
+        previous = None
+        if callable(line.parameters):
+            arguments = _named_arguments(line.parameters, indices)
+            if not arguments and steps:
+                previous = steps[-1].index
+                dependencies.add(previous)
+        steps.append(
+            _Step(
+                index=index,
+                request=line,
+                dependencies=sorted(
+                    dependencies | set(arguments.values())
+                ),
+                arguments=arguments,
+                previous=previous,
+            )
+        )
+
+        if line.name is not None:
+            if line.name in indices:
+                raise Exception(f"Duplicate request name: {line.name}")
+            indices[line.name] = index
+    return steps
+
+
+def _named_arguments(
+    function: Callable, indices: Dict[str, int]
+) -> Dict[str, int]:
+    """Find the requests whose responses a `parameters` function wants.
+
+    The first argument always receives the parameter objects, so only
+    the other arguments are looked at.
+
+    Args:
+        function: The `parameters` function
+        indices: Indices of the named requests before it, by name
+
+    Returns:
+        Indices of the requests, by argument name
+    """
+    try:
+        arguments = list(
+            inspect.signature(function).parameters.values()
+        )
+    except ValueError:
+        # Builtins and some C-implemented callables have no signature
+        return {}
+    return {
+        argument.name: indices[argument.name]
+        for argument in arguments[1:]
+        if argument.name in indices
+        and argument.name not in _SEQUENTIAL_ARGUMENTS
+        and argument.kind
+        in (argument.POSITIONAL_OR_KEYWORD, argument.KEYWORD_ONLY)
+    }
 
-            response = response.response
 
-        elif type(line) is Validate:
+class _GraphRun:
+    """Decide which requests of a graph chain to send next."""
+
+    def __init__(
+        self,
+        definition: List[Union[Request, Validate]],
+        concurrency: int,
+    ):
+        if concurrency < 1:
+            raise Exception("Concurrency must be positive")
+        self.definition = definition
+        self.steps = _build_graph(definition)
+        self.concurrency = concurrency
+        # Responses and parameter values of the finished requests, by
+        # index
+        self.responses: Dict[int, any] = {}
+        self.values: Dict[int, Dict[str, any]] = {}
+        # Errors of the failed requests, by index
+        self.failures: Dict[int, Exception] = {}
+        self.stopped = False
+        self._started = set()
+        self._running = 0
+
+    def next_steps(self) -> List[_Step]:
+        """Get the requests whose dependencies have finished.
+
+        No new requests are started after a request failed or a
+        validator returned false.
+        """
+        if self.stopped or self.failures:
+            return []
+        steps = [
+            step
+            for step in self.steps
+            if step.index not in self._started
+            and all(
+                dependency in self.responses
+                for dependency in step.dependencies
+            )
+        ][: self.concurrency - self._running]
+        for step in steps:
+            self._started.add(step.index)
+        self._running += len(steps)
+        return steps
+
+    def complete(self, step: _Step, future) -> None:
+        """Record the outcome of a request.
+
+        Args:
+            step: The request
+            future: The finished future or task that ran `step`
+        """
+        self._running -= 1
+        try:
+            values, response, passed = future.result()
+        except Exception as error:
+            self.failures[step.index] = error
+            return
+        self.values[step.index] = values
+        self.responses[step.index] = response
+        if not passed:
+            self.stopped = True
+
+    def inputs(
+        self, step: _Step
+    ) -> Tuple[any, Dict[str, any], Union[Dict[str, any], None]]:
+        """Get what to pass to the `parameters` function of a request.
+
+        Returns:
+            The previous response, the previous parameter values and
+            the named responses (None if the function asks for none),
+            as `_prepare_line` takes them
+        """
+        if step.previous is None:
+            arguments = {
+                name: self.responses[index]
+                for name, index in step.arguments.items()
+            }
+            return None, {"requestBody": None}, arguments or None
+        return (
+            self.responses[step.previous],
+            self.values[step.previous],
+            None,
+        )
+
+    def finish(self) -> None:
+        """Raise the error of the first failed request, if any.
+
+        The errors of other failed requests are printed first, in the
+        order of the definition.
+        """
+        if not self.failures:
+            return
+        first, *others = sorted(self.failures)
+        for index in others:
             print(
-                colored(f"[{index}/{len(definition)}] ", "cyan")
+                colored(f"[{index}/{len(self.definition)}] ", "cyan")
                 + colored(
-                    "Validating the response",
-                    "blue",
+                    f"Request failed: {self.failures[index]}", "red"
                 )
             )
-            if not line.validate(response):
-                return
-        else:
-            raise Exception(
-                f'Invalid chain line detected at index {index}:"'
-                f" {str(line)}"
+        raise self.failures[first]
+
+
+def _run_graph(
+    schema: Schema,
+    definition: List[Union[Request, Validate]],
+    before_request_send: Union[Callable[[str, any], any], None],
+    sessions: Union[SessionManager, None],
+    base_url: str,
+    concurrency: int,
+) -> None:
+    """Send the requests of a graph chain from a pool of threads."""
+    run = _GraphRun(definition, concurrency)
+
+    def run_step(
+        step: _Step, inputs: Tuple[any, Dict[str, any], any]
+    ) -> Tuple[Dict[str, any], any, bool]:
+        previous_response, previous_values, arguments = inputs
+        values, body, request_url, endpoint_name = _prepare_line(
+            schema,
+            definition,
+            step.index,
+            base_url,
+            previous_response,
+            previous_values,
+            dependencies=arguments,
+        )
+        response = _send_line(
+            schema,
+            step.request,
+            body,
+            request_url,
+            endpoint_name,
+            before_request_send,
+            sessions,
+        )
+        return (
+            values,
+            response,
+            all(
+                _validate_line(definition, index, response)
+                for index in step.validators
+            ),
+        )
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        pending = {}
+        while True:
+            for step in run.next_steps():
+                # In a copy of the context, for `instrument` blocks
+                future = executor.submit(
+                    contextvars.copy_context().run,
+                    run_step,
+                    step,
+                    run.inputs(step),
+                )
+                pending[future] = step
+            if not pending:
+                break
+            done, _pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                run.complete(pending.pop(future), future)
+    run.finish()
+
+
+async def _async_run_graph(
+    schema: Schema,
+    definition: List[Union[Request, Validate]],
+    before_request_send: Union[Callable[[str, any], any], None],
+    client: httpx.AsyncClient,
+    base_url: str,
+    concurrency: int,
+) -> None:
+    """Asynchronous version of `_run_graph`."""
+    run = _GraphRun(definition, concurrency)
+
+    async def run_step(
+        step: _Step, inputs: Tuple[any, Dict[str, any], any]
+    ) -> Tuple[Dict[str, any], any, bool]:
+        previous_response, previous_values, arguments = inputs
+        values, body, request_url, endpoint_name = _prepare_line(
+            schema,
+            definition,
+            step.index,
+            base_url,
+            previous_response,
+            previous_values,
+            dependencies=arguments,
+        )
+        response = await _async_send_line(
+            schema,
+            step.request,
+            body,
+            request_url,
+            endpoint_name,
+            before_request_send,
+            client,
+        )
+        return (
+            values,
+            response,
+            all(
+                _validate_line(definition, index, response)
+                for index in step.validators
+            ),
+        )
+
+    pending = {}
+    while True:
+        for step in run.next_steps():
+            task = asyncio.ensure_future(
+                run_step(step, run.inputs(step))
             )
+            pending[task] = step
+        if not pending:
+            break
+        done, _pending = await asyncio.wait(
+            pending, return_when=asyncio.FIRST_COMPLETED
+        )
+        for task in done:
+            run.complete(pending.pop(task), task)
+    run.finish()
@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+"""Generate test rows that cover all t-way parameter interactions."""
+
+import itertools
+import random
+from dataclasses import dataclass
+from typing import Dict, List, Set, Tuple, Union
+
+
+@dataclass
+class CoveringArray:
+    """Rows of value indexes, one index per parameter."""
+
+    rows: List[Tuple[int, ...]]
+    strength: int
+    covered_interactions: int
+    total_interactions: int
+
+    @property
+    def coverage(self) -> float:
+        """Share of t-way interactions covered by the rows."""
+        if self.total_interactions == 0:
+            return 1.0
+        return self.covered_interactions / self.total_interactions
+
+
+def generate_covering_array(
+    radices: List[int],
+    strength: int = 2,
+    max_rows: Union[int, None] = None,
+    candidates: int = 20,
+    random_generator: Union[random.Random, None] = None,
+) -> CoveringArray:
+    """Greedily build a covering array.
+
+    Every combination of values of any `strength` parameters appears in
+    at least one row (unless `max_rows` cuts the array short). Finding
+    the smallest such array is NP-hard, so this uses the AETG heuristic:
+    each row is the best of several greedily built candidates. Results
+    are usually close to the best known array sizes.
+
+    Args:
+        radices: Number of values for each parameter
+        strength:
+            Size of the interactions to cover (2 for pairwise)
+            Capped at the number of parameters
+        max_rows: Stop after this many rows
+        candidates: Number of candidate rows to try for each row
+        random_generator:
+            Generator for the random choices of the heuristic. Default:
+            the shared generator of the `random` module
+
+    Returns:
+        The rows and the achieved coverage
+    """
+    parameter_count = len(radices)
+    strength = max(1, min(strength, parameter_count))
+    random_generator = random_generator or random
+
+    if any(radix == 0 for radix in radices):
+        return CoveringArray([], strength, 0, 0)
+    if parameter_count == 0:
+        return CoveringArray([()], strength, 0, 0)
+
+    uncovered: Set[Tuple[Tuple[int, ...], Tuple[int, ...]]] = {
+        (combination, values)
+        for combination in itertools.combinations(
+            range(parameter_count), strength
+        )
+        for values in itertools.product(
+            *(range(radices[parameter]) for parameter in combination)
+        )
+    }
+    total_interactions = len(uncovered)
+
+    rows: List[Tuple[int, ...]] = []
+    while uncovered and (max_rows is None or len(rows) < max_rows):
+        best_row, best_covered = None, set()
+        # Start each candidate from an uncovered interaction to
+        # guarantee progress
+        seeds = random_generator.sample(
+            tuple(uncovered), min(candidates, len(uncovered))
+        )
+        for seed in seeds:
+            row = _build_row(
+                radices, strength, uncovered, seed, random_generator
+            )
+            covered = _covered_by(row, strength, uncovered)
+            if len(covered) > len(best_covered):
+                best_row, best_covered = row, covered
+        rows.append(best_row)
+        uncovered -= best_covered
+
+    return CoveringArray(
+        rows=rows,
+        strength=strength,
+        covered_interactions=total_interactions - len(uncovered),
+        total_interactions=total_interactions,
+    )
+
+
+def _build_row(
+    radices: List[int],
+    strength: int,
+    uncovered: Set[Tuple[Tuple[int, ...], Tuple[int, ...]]],
+    seed: Tuple[Tuple[int, ...], Tuple[int, ...]],
+    random_generator: random.Random,
+) -> Tuple[int, ...]:
+    """Build a row covering as many uncovered interactions as it can."""
+    row: Dict[int, int] = dict(zip(*seed))
+
+    remaining = [
+        parameter
+        for parameter in range(len(radices))
+        if parameter not in row
+    ]
+    random_generator.shuffle(remaining)
+
+    for parameter in remaining:
+        # Interactions between this parameter and the assigned ones
+        combinations = [
+            tuple(sorted(others + (parameter,)))
+            for others in itertools.combinations(row, strength - 1)
+        ]
+        best_values, best_score = [], -1
+        for value in range(radices[parameter]):
+            row[parameter] = value
+            score = sum(
+                (
+                    combination,
+                    tuple(row[other] for other in combination),
+                )
+                in uncovered
+                for combination in combinations
+            )
+            if score > best_score:
+                best_values, best_score = [value], score
+            elif score == best_score:
+                best_values.append(value)
+        row[parameter] = random_generator.choice(best_values)
+
+    return tuple(row[parameter] for parameter in range(len(radices)))
+
+
+def _covered_by(
+    row: Tuple[int, ...],
+    strength: int,
+    uncovered: Set[Tuple[Tuple[int, ...], Tuple[int, ...]]],
+) -> Set[Tuple[Tuple[int, ...], Tuple[int, ...]]]:
+    """Find the uncovered interactions that a row covers."""
+    return {
+        interaction
+        for interaction in (
+            (
+                combination,
+                tuple(row[parameter] for parameter in combination),
+            )
+            for combination in itertools.combinations(
+                range(len(row)), strength
+            )
+        )
+        if interaction in uncovered
+    }
@@ -1,12 +1,97 @@
 # -*- coding: utf-8 -*-
 """Run a comprehensive test on all defined endpoints."""
 
-from typing import Dict, List, Union, Callable
+import asyncio
+from collections import deque
+from typing import Dict, List, Tuple, Union, Callable
 from termcolor import colored
+import httpx
 
+from open_api_tools.common.instrumentation import Timings, instrument
 from open_api_tools.common.load_schema import Schema
+from open_api_tools.common.scheduler import RequestScheduler
+from open_api_tools.common.sessions import (
+    SessionConfig,
+    SessionManager,
+    create_async_client,
+)
+from open_api_tools.common.sharding import validate_shard
+from open_api_tools.common.validation_policy import ValidationPolicy
 from open_api_tools.validate.index import ErrorMessage
-from open_api_tools.test.test_endpoint import test_endpoint
+from open_api_tools.test.test_endpoint import (
+    async_run_endpoint_test,
+    async_schedule_endpoint_test,
+    run_endpoint_test,
+    schedule_endpoint_test,
+)
+
+
+class FailedRequestCounter:
+    """Count failed requests and tell whether to continue testing."""
+
+    def __init__(self, failed_request_limit: int):
+        """Create a counter.
+
+        Args:
+            failed_request_limit: Stop testing after this many errors
+        """
+        self.failed_request_limit = failed_request_limit
+        self.failed_requests = 0
+
+    @property
+    def exceeded(self) -> bool:
+        """Whether the limit of failed requests was exceeded."""
+        return self.failed_requests > self.failed_request_limit
+
+    def __call__(self) -> bool:
+        """Record a failed request.
+
+        Returns:
+            Whether to continue testing
+        """
+        self.failed_requests += 1
+        if self.exceeded:
+            print(
+                colored(
+                    "Amount of failed requests exceeded the limit (%s)"
+                    % self.failed_request_limit,
+                    "red",
+                )
+            )
+            return False
+        return True
+
+
+def list_endpoints(
+    schema: Schema, methods_to_test
+) -> List[Tuple[str, str]]:
+    """List the (endpoint name, method) pairs to test."""
+    if methods_to_test is None:
+        methods_to_test = ["GET"]
+
+    methods_to_test = [method.lower() for method in methods_to_test]
+
+    # Read the raw schema so that untested paths are never parsed
+    paths = schema.raw_spec["paths"]
+    return [
+        (endpoint_name, method)
+        for endpoint_name, endpoint_data in paths.items()
+        for method in methods_to_test
+        if endpoint_data.get(method) is not None
+    ]
+
+
+def _validate_sharding(
+    seed: Union[int, None], shard: Union[Tuple[int, int], None]
+) -> None:
+    if shard is None:
+        return
+    validate_shard(shard)
+    if seed is None:
+        raise Exception(
+            "Sharding requires a seed, so that all shards generate the "
+            "same test URLs"
+        )
 
 
 def full_test(
@@ -22,7 +107,15 @@ def full_test(
         None, Callable[[str, Dict[str, any], List[any]], List[any]]
     ] = None,
     before_request_send: Union[Callable[[str, any], any], None] = None,
-) -> None:
+    concurrency: int = 1,
+    endpoint_concurrency: Union[int, None] = None,
+    timings: Union[Timings, None] = None,
+    validation_policy: Union[ValidationPolicy, None] = None,
+    sessions: Union[SessionManager, None] = None,
+    seed: Union[int, None] = None,
+    shard: Union[Tuple[int, int], None] = None,
+    covering_strength: Union[int, None] = None,
+) -> Timings:
     """Run a comprehensive test on all API endpoints.
 
     Args:
@@ -32,7 +125,10 @@ def full_test(
             Max amount of test URLs to create for any single endpoint
         failed_request_limit:
             Stop testing the API after this many errors
-            (useful if multiple tested URLs return the same error message)
+            (useful if multiple tested URLs return the same error
+            message). With `concurrency`, requests that were sent
+            ahead of time are not cancelled, and the errors in their
+            responses are not reported (described in `README.md`)
         methods_to_test:
             Default: ['GET']
             List of HTTPS methods to test.
@@ -47,62 +143,321 @@ def full_test(
             Function that would be called in case of any errors
         before_request_send:
             A pre-hook that allows to amend the request object
+        concurrency:
+            Max number of requests in flight at once. Responses are
+            still processed in the same order as they would be with
+            concurrency set to 1
+        endpoint_concurrency:
+            Max number of requests in flight to a single endpoint at
+            once. Default: same as `concurrency`
+        timings:
+            Record the durations of each phase of the requests into this
+            object. Default: a new `Timings` object
+        validation_policy:
+            Only validate some of the items of array responses
+            (described in `README.md`)
+        sessions:
+            Sessions to send the requests with (described in
+            `README.md`). By default, sessions with a connection pool of
+            `concurrency` connections are created for the test
+        seed:
+            Seed for the random test values. With a seed, the same test
+            URLs are generated on every run
+        shard:
+            Only send the requests of this shard, given as the shard
+            number (starting from 1) and the shard count. Requires a
+            `seed`, so that all shards generate the same test URLs
+            (described in `README.md`)
+        covering_strength:
+            Instead of picking random combinations of parameter values,
+            pick combinations that cover every interaction between this
+            many parameters (2 for pairwise testing). Described in
+            `README.md`
 
     Returns:
-        None
+        Latency histograms for each phase of the requests (described in
+        `README.md`)
 
     Raises:
         AssertionError - if API schema is incorrect
         Exception - if generated URL does not meet the API schema requirements
     """
-    if methods_to_test is None:
-        methods_to_test = ["GET"]
-
-    methods_to_test = [method.lower() for method in methods_to_test]
+    if sessions is None:
+        with SessionManager(
+            SessionConfig(pool_size=max(concurrency, 10))
+        ) as sessions:
+            return full_test(
+                schema=schema,
+                max_urls_per_endpoint=max_urls_per_endpoint,
+                covering_strength=covering_strength,
+                failed_request_limit=failed_request_limit,
+                methods_to_test=methods_to_test,
+                parameter_constraints=parameter_constraints,
+                after_error_occurred=after_error_occurred,
+                after_examples_generated=after_examples_generated,
+                before_request_send=before_request_send,
+                concurrency=concurrency,
+                endpoint_concurrency=endpoint_concurrency,
+                timings=timings,
+                validation_policy=validation_policy,
+                sessions=sessions,
+                seed=seed,
+                shard=shard,
+            )
 
+    _validate_sharding(seed, shard)
     base_url = schema.schema.servers[0].url
+    endpoints = list_endpoints(schema, methods_to_test)
+    should_continue_on_fail = FailedRequestCounter(failed_request_limit)
 
-    failed_requests = 0
+    def schedule(endpoint_name, method, scheduler):
+        return schedule_endpoint_test(
+            endpoint_name=endpoint_name,
+            method=method,
+            base_url=base_url,
+            schema=schema,
+            max_urls_per_endpoint=max_urls_per_endpoint,
+            covering_strength=covering_strength,
+            after_examples_generated=after_examples_generated,
+            before_request_send=None
+            if before_request_send is None
+            else lambda request_object: before_request_send(
+                endpoint_name,
+                request_object,
+            ),
+            scheduler=scheduler,
+            validation_policy=validation_policy,
+            sessions=sessions,
+            seed=seed,
+            shard=shard,
+        )
 
-    def should_continue_on_fail() -> bool:
-        nonlocal failed_requests
+    def run(endpoint_test) -> bool:
+        if shard is not None and not endpoint_test.payloads:
+            return True
+        run_endpoint_test(
+            endpoint_test,
+            should_continue_on_fail=should_continue_on_fail,
+            parameter_constraints=parameter_constraints,
+            after_error_occurred=after_error_occurred,
+        )
+        return not should_continue_on_fail.exceeded
 
-        failed_requests += 1
-        if failed_requests > failed_request_limit:
-            print(
-                colored(
-                    "Amount of failed requests exceeded the limit (%s)"
-                    % failed_request_limit,
-                    "red",
-                )
+    def run_all() -> None:
+        if concurrency <= 1:
+            for endpoint_name, method in endpoints:
+                if not run(schedule(endpoint_name, method, None)):
+                    return
+            return
+
+        with RequestScheduler(
+            concurrency, endpoint_concurrency
+        ) as scheduler:
+            # Schedule requests for upcoming endpoints while the
+            # responses for the current one are processed, but don't
+            # queue more than needed to keep all workers busy
+            pending = deque()
+            remaining_endpoints = deque(endpoints)
+            while pending or remaining_endpoints:
+                while remaining_endpoints and (
+                    not pending
+                    or sum(len(test.payloads) for test in pending)
+                    < concurrency * 2
+                ):
+                    pending.append(
+                        schedule(
+                            *remaining_endpoints.popleft(), scheduler
+                        )
+                    )
+
+                if not run(pending.popleft()):
+                    return
+
+    if timings is None:
+        timings = Timings()
+    with instrument(timings):
+        run_all()
+    timings.print_summary()
+    if schema.validation_cache is not None:
+        schema.validation_cache.print_summary()
+    return timings
+
+
+async def async_full_test(
+    schema: Schema,
+    max_urls_per_endpoint: int = 50,
+    failed_request_limit: int = 100,
+    methods_to_test=None,
+    parameter_constraints: Union[
+        None, Dict[str, Callable[[bool, str, Dict[str, any]], bool]]
+    ] = None,
+    after_error_occurred: Callable[[ErrorMessage], None] = None,
+    after_examples_generated: Union[
+        None, Callable[[str, Dict[str, any], List[any]], List[any]]
+    ] = None,
+    before_request_send: Union[Callable[[str, any], any], None] = None,
+    concurrency: int = 100,
+    endpoint_concurrency: Union[int, None] = None,
+    client: Union[httpx.AsyncClient, None] = None,
+    timings: Union[Timings, None] = None,
+    validation_policy: Union[ValidationPolicy, None] = None,
+    session_config: Union[SessionConfig, None] = None,
+    seed: Union[int, None] = None,
+    shard: Union[Tuple[int, int], None] = None,
+    covering_strength: Union[int, None] = None,
+) -> Timings:
+    """Asynchronous version of `full_test`.
+
+    Requests are sent as asyncio tasks. Responses are processed in the
+    same order as in `full_test`.
+
+    Args:
+        schema:
+            The schema object
+        max_urls_per_endpoint:
+            Max amount of test URLs to create for any single endpoint
+        failed_request_limit:
+            Stop testing the API after this many errors. As in
+            `full_test`, requests that were sent ahead of time are not
+            cancelled, and the errors in their responses are not
+            reported
+        methods_to_test:
+            Default: ['GET']
+            List of HTTPS methods to test.
+        parameter_constraints:
+            Described in `README.md`
+        after_examples_generated:
+            Described in `README.md`
+        after_error_occurred:
+            Function that would be called in case of any errors
+        before_request_send:
+            A pre-hook that allows to amend the request object
+        concurrency:
+            Max number of requests in flight at once
+        endpoint_concurrency:
+            Max number of requests in flight to a single endpoint at
+            once. Default: same as `concurrency`
+        client:
+            The client to send the requests with. By default, a client
+            is created from `session_config`
+        timings:
+            Record the durations of each phase of the requests into this
+            object. Default: a new `Timings` object
+        validation_policy:
+            Only validate some of the items of array responses
+            (described in `README.md`)
+        session_config:
+            Connection settings for the client (described in
+            `README.md`). Default: a connection pool of `concurrency`
+            connections
+        seed:
+            Seed for the random test values
+        shard:
+            Only send the requests of this shard (requires a `seed`)
+        covering_strength:
+            Instead of picking random combinations of parameter values,
+            pick combinations that cover every interaction between this
+            many parameters (2 for pairwise testing). Described in
+            `README.md`
+
+    Returns:
+        Latency histograms for each phase of the requests
+
+    Raises:
+        AssertionError - if API schema is incorrect
+        Exception - if generated URL does not meet the API schema
+        requirements
+    """
+    if client is None:
+        if session_config is None:
+            session_config = SessionConfig(pool_size=concurrency)
+        async with create_async_client(session_config) as client:
+            return await async_full_test(
+                schema=schema,
+                max_urls_per_endpoint=max_urls_per_endpoint,
+                covering_strength=covering_strength,
+                failed_request_limit=failed_request_limit,
+                methods_to_test=methods_to_test,
+                parameter_constraints=parameter_constraints,
+                after_error_occurred=after_error_occurred,
+                after_examples_generated=after_examples_generated,
+                before_request_send=before_request_send,
+                concurrency=concurrency,
+                endpoint_concurrency=endpoint_concurrency,
+                client=client,
+                timings=timings,
+                validation_policy=validation_policy,
+                seed=seed,
+                shard=shard,
             )
-            return False
-        return True
 
-    for endpoint_name, endpoint_data in schema.schema.paths.items():
-
-        for method in methods_to_test:
-            if (
-                hasattr(endpoint_data, method)
-                and getattr(endpoint_data, method) is not None
-            ):
-                test_endpoint(
-                    endpoint_name=endpoint_name,
-                    method=method,
-                    base_url=base_url,
+    _validate_sharding(seed, shard)
+    base_url = schema.schema.servers[0].url
+    endpoints = deque(list_endpoints(schema, methods_to_test))
+    should_continue_on_fail = FailedRequestCounter(failed_request_limit)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    def schedule(endpoint_name, method):
+        return async_schedule_endpoint_test(
+            endpoint_name=endpoint_name,
+            method=method,
+            base_url=base_url,
+            schema=schema,
+            max_urls_per_endpoint=max_urls_per_endpoint,
+            covering_strength=covering_strength,
+            client=client,
+            semaphore=semaphore,
+            endpoint_concurrency=endpoint_concurrency,
+            validation_policy=validation_policy,
+            seed=seed,
+            shard=shard,
+            after_examples_generated=after_examples_generated,
+            before_request_send=None
+            if before_request_send is None
+            else lambda request_object: before_request_send(
+                endpoint_name,
+                request_object,
+            ),
+        )
+
+    if timings is None:
+        timings = Timings()
+    pending = deque()
+    endpoint_test = None
+    try:
+        with instrument(timings):
+            while pending or endpoints:
+                # Same look ahead as in `full_test`
+                while endpoints and (
+                    not pending
+                    or sum(len(test.payloads) for test in pending)
+                    < concurrency * 2
+                ):
+                    pending.append(schedule(*endpoints.popleft()))
+
+                endpoint_test = pending.popleft()
+                if shard is not None and not endpoint_test.payloads:
+                    continue
+                await async_run_endpoint_test(
+                    endpoint_test,
                     should_continue_on_fail=should_continue_on_fail,
-                    schema=schema,
-                    max_urls_per_endpoint=max_urls_per_endpoint,
                     parameter_constraints=parameter_constraints,
                     after_error_occurred=after_error_occurred,
-                    after_examples_generated=after_examples_generated,
-                    before_request_send=None
-                    if before_request_send is None
-                    else lambda request_object: before_request_send(
-                        endpoint_name,
-                        request_object,
-                    ),
                 )
+                if should_continue_on_fail.exceeded:
+                    break
+    finally:
+        # On an early exit, the requests of the current endpoint that
+        # were not awaited yet are still in flight, as are the ones of
+        # the upcoming endpoints. Stop them before the client is closed
+        if endpoint_test is not None:
+            pending.appendleft(endpoint_test)
+        tasks = [task for test in pending for task in test.results]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
 
-                if failed_requests > failed_request_limit:
-                    return
+    timings.print_summary()
+    if schema.validation_cache is not None:
+        schema.validation_cache.print_summary()
+    return timings
@@ -0,0 +1,346 @@
+# -*- coding: utf-8 -*-
+"""Generate load against the API using the requests from the schema."""
+
+import contextvars
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Tuple, Union
+from termcolor import colored
+
+from open_api_tools.common.instrumentation import (
+    PERCENTILES,
+    Timings,
+    instrument,
+    measure,
+)
+from open_api_tools.common.load_schema import Schema
+from open_api_tools.common.sessions import SessionConfig, SessionManager
+from open_api_tools.test.full_test import list_endpoints
+from open_api_tools.test.test_endpoint import generate_endpoint_test
+from open_api_tools.validate.index import (
+    ErrorMessage,
+    file_request,
+    prepare_request,
+)
+
+
+@dataclass
+class LoadTestRequest:
+    """A prepared request that is sent repeatedly during a load test."""
+
+    endpoint_name: str
+    method: str
+    request_url: str
+    request: any
+    # Response codes the endpoint defines
+    response_codes: List[any]
+
+
+@dataclass
+class LoadTestResult:
+    """Outcome of a load test."""
+
+    # How long the test ran for, in seconds
+    duration: float
+    requests: int = 0
+    # Requests that raised an exception, returned an undefined response
+    # code or failed validation
+    errors: int = 0
+    # Responses that were validated against the schema
+    validated: int = 0
+    # Validated responses that did not meet the schema
+    invalid: int = 0
+    timings: Timings = field(default_factory=Timings, repr=False)
+
+    @property
+    def throughput(self) -> float:
+        """Requests per second."""
+        return self.requests / self.duration if self.duration else 0.0
+
+    @property
+    def error_rate(self) -> float:
+        """Share of requests that failed."""
+        return self.errors / self.requests if self.requests else 0.0
+
+    def to_dict(self) -> Dict[str, any]:
+        """Summarize the result (latencies are in milliseconds)."""
+        latency = self.timings.by_phase().get("send")
+        return {
+            "duration": self.duration,
+            "requests": self.requests,
+            "errors": self.errors,
+            "validated": self.validated,
+            "invalid": self.invalid,
+            "throughput": self.throughput,
+            "error_rate": self.error_rate,
+            "latency": None if latency is None else latency.to_dict(),
+        }
+
+    def print_summary(self) -> None:
+        """Print the throughput, error rate and latency percentiles."""
+        print(
+            colored("Load test: ", "cyan")
+            + f"{self.requests} requests in {self.duration:.1f}s "
+            f"({self.throughput:.1f} requests/s), "
+            f"{self.errors} errors ({self.error_rate:.2%}), "
+            f"{self.invalid} of {self.validated} validated responses "
+            "were invalid"
+        )
+        latency = self.timings.by_phase().get("send")
+        if latency is not None:
+            percentiles = ", ".join(
+                f"p{percentile}="
+                f"{latency.percentile(percentile) * 1000:.2f}"
+                for percentile in PERCENTILES
+            )
+            print(
+                colored("Latency (ms): ", "cyan")
+                + f"{percentiles}, max={latency.max / 1000:.2f}"
+            )
+
+
+def prepare_load_test_requests(
+    schema: Schema,
+    methods_to_test=None,
+    max_urls_per_endpoint: int = 50,
+    after_examples_generated: Union[
+        None, Callable[[str, Dict[str, any], List[any]], List[any]]
+    ] = None,
+    before_request_send: Union[Callable[[str, any], any], None] = None,
+) -> List[LoadTestRequest]:
+    """Generate and prepare the requests to send during a load test.
+
+    The requests are generated the same way as in `full_test`. Requests
+    that fail validation are left out.
+
+    Args:
+        schema: The schema object
+        methods_to_test:
+            Default: ['GET']
+            List of HTTPS methods to send requests to
+        max_urls_per_endpoint:
+            Max amount of URLs to create for any single endpoint
+        after_examples_generated:
+            Described in `README.md`
+        before_request_send:
+            A pre-hook that allows to amend the request object
+
+    Returns:
+        The prepared requests
+    """
+    base_url = schema.schema.servers[0].url
+    test_requests = []
+    for endpoint_name, method in list_endpoints(
+        schema, methods_to_test
+    ):
+        endpoint_test = generate_endpoint_test(
+            endpoint_name=endpoint_name,
+            method=method,
+            base_url=base_url,
+            schema=schema,
+            max_urls_per_endpoint=max_urls_per_endpoint,
+            after_examples_generated=after_examples_generated,
+        )
+        response_codes = list(
+            getattr(
+                schema.schema.paths[endpoint_name], method
+            ).responses
+        )
+        for body, request_url in endpoint_test.payloads:
+            response = prepare_request(
+                schema=schema,
+                request_url=request_url,
+                endpoint_name=endpoint_name,
+                method=method,
+                body=body,
+                before_request_send=None
+                if before_request_send is None
+                else lambda request_object: before_request_send(
+                    endpoint_name, request_object
+                ),
+            )
+            if response.type != "success":
+                continue
+            test_requests.append(
+                LoadTestRequest(
+                    endpoint_name=endpoint_name,
+                    method=method,
+                    request_url=request_url,
+                    request=response.request,
+                    response_codes=response_codes,
+                )
+            )
+    return test_requests
+
+
+def load_test(
+    schema: Schema,
+    duration: float = 60,
+    concurrency: int = 10,
+    rate: Union[float, None] = None,
+    validate_fraction: float = 0.1,
+    methods_to_test=None,
+    max_urls_per_endpoint: int = 50,
+    after_examples_generated: Union[
+        None, Callable[[str, Dict[str, any], List[any]], List[any]]
+    ] = None,
+    before_request_send: Union[Callable[[str, any], any], None] = None,
+    after_error_occurred: Callable[[ErrorMessage], None] = None,
+    sessions: Union[SessionManager, None] = None,
+) -> LoadTestResult:
+    """Send requests to the API for a fixed amount of time.
+
+    Requests are generated from the schema like in `full_test`, prepared
+    once, and then sent round-robin by `concurrency` threads until
+    `duration` runs out.
+
+    Args:
+        schema:
+            The schema object
+        duration:
+            How long to send requests for, in seconds
+        concurrency:
+            Number of requests in flight at once
+        rate:
+            Max number of requests to send per second.
+            Default: as many as `concurrency` allows
+        validate_fraction:
+            Share of responses to validate against the schema (between 0
+            and 1). For the rest, only the response code is checked
+        methods_to_test:
+            Default: ['GET']
+            List of HTTPS methods to send requests to
+        max_urls_per_endpoint:
+            Max amount of URLs to create for any single endpoint
+        after_examples_generated:
+            Described in `README.md`
+        before_request_send:
+            A pre-hook that allows to amend the request object
+        after_error_occurred:
+            Function that would be called in case of a validation error
+        sessions:
+            Sessions to send the requests with. By default, sessions
+            with a connection pool of `concurrency` connections are
+            created for the test
+
+    Returns:
+        Throughput, error rate and latencies
+    """
+    if concurrency < 1:
+        raise Exception("concurrency must be a positive number")
+
+    if sessions is None:
+        with SessionManager(
+            SessionConfig(pool_size=max(concurrency, 10))
+        ) as sessions:
+            return load_test(
+                schema=schema,
+                duration=duration,
+                concurrency=concurrency,
+                rate=rate,
+                validate_fraction=validate_fraction,
+                methods_to_test=methods_to_test,
+                max_urls_per_endpoint=max_urls_per_endpoint,
+                after_examples_generated=after_examples_generated,
+                before_request_send=before_request_send,
+                after_error_occurred=after_error_occurred,
+                sessions=sessions,
+            )
+
+    test_requests = prepare_load_test_requests(
+        schema=schema,
+        methods_to_test=methods_to_test,
+        max_urls_per_endpoint=max_urls_per_endpoint,
+        after_examples_generated=after_examples_generated,
+        before_request_send=before_request_send,
+    )
+    if not test_requests:
+        raise Exception("No valid requests to send")
+
+    prepared_requests = [
+        sessions.get(request.request_url).prepare_request(
+            request.request
+        )
+        for request in test_requests
+    ]
+
+    lock = threading.Lock()
+    result = LoadTestResult(duration=duration)
+    counter = 0
+    start = time.perf_counter()
+    deadline = start + duration
+
+    def next_request() -> Union[Tuple[int, float], None]:
+        """Pick the next request and when to send it."""
+        nonlocal counter
+        with lock:
+            index = counter
+            counter += 1
+        send_at = start if rate is None else start + index / rate
+        if max(send_at, time.perf_counter()) >= deadline:
+            return None
+        return index % len(test_requests), send_at
+
+    def send(index: int) -> bool:
+        """Send a request and tell whether it succeeded."""
+        request = test_requests[index]
+        session = sessions.get(request.request_url)
+        if random.random() < validate_fraction:
+            response = file_request(
+                schema=schema,
+                request_url=request.request_url,
+                endpoint_name=request.endpoint_name,
+                request=request.request,
+                after_error_occurred=after_error_occurred,
+                session=session,
+            )
+            with lock:
+                result.validated += 1
+                if response.type != "success":
+                    result.invalid += 1
+            return response.type == "success"
+
+        with measure(request.endpoint_name, request.method, "send"):
+            response = session.send(prepared_requests[index].copy())
+        return response.status_code in request.response_codes
+
+    def worker() -> None:
+        while True:
+            next_send = next_request()
+            if next_send is None:
+                return
+            index, send_at = next_send
+            delay = send_at - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            try:
+                succeeded = send(index)
+            except Exception as error:
+                print(colored(f"Request failed: {error}", "yellow"))
+                succeeded = False
+            with lock:
+                result.requests += 1
+                if not succeeded:
+                    result.errors += 1
+
+    with instrument(result.timings):
+        # Each thread gets its own copy of the context, to take the
+        # measurements for `result.timings`
+        threads = [
+            threading.Thread(
+                target=contextvars.copy_context().run,
+                args=(worker,),
+                daemon=True,
+            )
+            for _index in range(concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    result.duration = time.perf_counter() - start
+    result.print_summary()
+    return result
@@ -0,0 +1,335 @@
+# -*- coding: utf-8 -*-
+"""Send the same test requests to several servers and compare them."""
+
+import copy
+import json
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Tuple, Union
+from termcolor import colored
+
+from open_api_tools.common.instrumentation import LatencyHistogram
+from open_api_tools.common.load_schema import Schema
+from open_api_tools.common.scheduler import RequestScheduler
+from open_api_tools.common.sessions import SessionConfig, SessionManager
+from open_api_tools.common.validation_policy import ValidationPolicy
+from open_api_tools.test.full_test import list_endpoints
+from open_api_tools.test.test_endpoint import generate_endpoint_test
+from open_api_tools.validate.index import (
+    ErrorMessage,
+    file_request,
+    prepare_request,
+)
+
+
+@dataclass
+class ServerResult:
+    """Outcome of the test requests sent to one server."""
+
+    url: str
+    passed: int = 0
+    failed: int = 0
+    errors: List[ErrorMessage] = field(default_factory=list, repr=False)
+    latency: LatencyHistogram = field(
+        default_factory=LatencyHistogram, repr=False
+    )
+
+    @property
+    def requests(self) -> int:
+        """Number of requests sent to the server."""
+        return self.passed + self.failed
+
+    def to_dict(self) -> Dict[str, any]:
+        """Summarize the result (latencies are in milliseconds)."""
+        return {
+            "url": self.url,
+            "requests": self.requests,
+            "passed": self.passed,
+            "failed": self.failed,
+            "latency": self.latency.to_dict(),
+        }
+
+
+@dataclass
+class MultiServerResult:
+    """Outcome of `multi_server_test`."""
+
+    servers: Dict[str, ServerResult]
+    # Requests that did not pass validation before being sent
+    invalid_requests: List[ErrorMessage] = field(default_factory=list)
+    # Requests whose outcome was not the same on all servers, as
+    # (method, URL relative to the server, {server: outcome type})
+    differences: List[Tuple[str, str, Dict[str, str]]] = field(
+        default_factory=list
+    )
+
+    def to_dict(self) -> Dict[str, any]:
+        """Summarize the result."""
+        return {
+            "servers": [
+                result.to_dict() for result in self.servers.values()
+            ],
+            "invalid_requests": len(self.invalid_requests),
+            "differences": [
+                {"method": method, "url": url, "outcomes": outcomes}
+                for method, url, outcomes in self.differences
+            ],
+        }
+
+    def print_summary(self) -> None:
+        """Print a comparison of the servers."""
+        print(colored("Servers:", "cyan"))
+        for result in self.servers.values():
+            latency = ", ".join(
+                "-" if value is None else f"{value * 1000:.2f}"
+                for value in (
+                    result.latency.percentile(50),
+                    result.latency.percentile(95),
+                )
+            )
+            print(
+                colored(
+                    f"  {result.url}: ",
+                    "red" if result.failed else "green",
+                )
+                + f"{result.passed} passed, {result.failed} failed, "
+                f"p50/p95 latency (ms): {latency}"
+            )
+        if self.invalid_requests:
+            print(
+                colored(
+                    f"{len(self.invalid_requests)} generated requests "
+                    "did not meet the schema and were not sent",
+                    "yellow",
+                )
+            )
+        for method, url, outcomes in self.differences:
+            print(
+                colored("Outcome differs: ", "yellow")
+                + f"[{method}] {url} "
+                + ", ".join(
+                    f"{server}: {outcome}"
+                    for server, outcome in outcomes.items()
+                )
+            )
+
+
+def rebase_url(url: str, base_url: str, server: str) -> str:
+    """Move a URL from one server to another.
+
+    Args:
+        url: URL on the `base_url` server
+        base_url: URL of the server the URL was generated for
+        server: URL of the server to move the URL to
+
+    Returns:
+        The URL on `server`. URLs outside of `base_url` are not changed
+    """
+    if not url.startswith(base_url):
+        return url
+    return server + url[len(base_url) :]
+
+
+def multi_server_test(
+    schema: Schema,
+    servers: Union[List[str], None] = None,
+    max_urls_per_endpoint: int = 50,
+    methods_to_test=None,
+    after_error_occurred: Callable[[ErrorMessage], None] = None,
+    after_examples_generated: Union[
+        None, Callable[[str, Dict[str, any], List[any]], List[any]]
+    ] = None,
+    before_request_send: Union[Callable[[str, any], any], None] = None,
+    concurrency: int = 4,
+    validation_policy: Union[ValidationPolicy, None] = None,
+    sessions: Union[SessionManager, None] = None,
+    covering_strength: Union[int, None] = None,
+) -> MultiServerResult:
+    """Send the same test requests to several servers at once.
+
+    The requests are generated and validated only once, for the first
+    server in the schema, and are then sent to every server. All servers
+    are tested in parallel.
+
+    Args:
+        schema:
+            The schema object
+        servers:
+            URLs of the servers to test, in the same form as the URLs in
+            the schema's `servers` section.
+            Default: all servers in the schema
+        max_urls_per_endpoint:
+            Max amount of test URLs to create for any single endpoint
+        methods_to_test:
+            Default: ['GET']
+            List of HTTPS methods to test
+        after_error_occurred:
+            Function that would be called in case of any errors
+        after_examples_generated:
+            Described in `README.md`
+        before_request_send:
+            A pre-hook that allows to amend the request object. Called
+            once per request, not once per server
+        concurrency:
+            Max number of requests in flight to each server at once
+        validation_policy:
+            Only validate some of the items of array responses
+            (described in `README.md`)
+        sessions:
+            Sessions to send the requests with. By default, sessions
+            with a connection pool of `concurrency` connections are
+            created for the test
+        covering_strength:
+            Pick combinations of parameter values with a covering array
+            of this strength (described in `README.md`)
+
+    Returns:
+        Pass/fail counts and latencies for each server
+    """
+    if concurrency < 1:
+        raise Exception("concurrency must be a positive number")
+
+    if sessions is None:
+        with SessionManager(
+            SessionConfig(pool_size=max(concurrency, 10))
+        ) as sessions:
+            return multi_server_test(
+                schema=schema,
+                servers=servers,
+                max_urls_per_endpoint=max_urls_per_endpoint,
+                covering_strength=covering_strength,
+                methods_to_test=methods_to_test,
+                after_error_occurred=after_error_occurred,
+                after_examples_generated=after_examples_generated,
+                before_request_send=before_request_send,
+                concurrency=concurrency,
+                validation_policy=validation_policy,
+                sessions=sessions,
+            )
+
+    if after_error_occurred is None:
+        after_error_occurred = lambda _error: None
+
+    base_url = schema.schema.servers[0].url
+    if servers is None:
+        servers = [server.url for server in schema.schema.servers]
+    if not servers:
+        raise Exception("No servers to test")
+
+    result = MultiServerResult(
+        servers={server: ServerResult(url=server) for server in servers}
+    )
+
+    print(colored("Generating the test requests", "cyan"))
+    test_requests = []
+    for endpoint_name, method in list_endpoints(
+        schema, methods_to_test
+    ):
+        endpoint_test = generate_endpoint_test(
+            endpoint_name=endpoint_name,
+            method=method,
+            base_url=base_url,
+            schema=schema,
+            max_urls_per_endpoint=max_urls_per_endpoint,
+            covering_strength=covering_strength,
+            after_examples_generated=after_examples_generated,
+        )
+        for body, request_url in endpoint_test.payloads:
+            response = prepare_request(
+                schema=schema,
+                request_url=request_url,
+                endpoint_name=endpoint_name,
+                method=endpoint_test.method,
+                body=body,
+                after_error_occurred=after_error_occurred,
+                before_request_send=None
+                if before_request_send is None
+                else lambda request_object: before_request_send(
+                    endpoint_name, request_object
+                ),
+            )
+            if response.type != "success":
+                result.invalid_requests.append(response)
+                continue
+            test_requests.append(
+                (endpoint_name, request_url, response.request)
+            )
+
+    def send(server, endpoint_name, request_url, request):
+        server_request = copy.copy(request)
+        server_request.url = rebase_url(request.url, base_url, server)
+        server_request_url = rebase_url(request_url, base_url, server)
+        try:
+            return file_request(
+                schema=schema,
+                request_url=server_request_url,
+                endpoint_name=endpoint_name,
+                request=server_request,
+                validation_policy=validation_policy,
+                session=sessions.get(server_request_url),
+            )
+        except Exception as error:
+            return ErrorMessage(
+                type="request_failed",
+                title="Request Failed",
+                error_status=str(error),
+                url=server_request_url,
+                extra={"error": repr(error)},
+            )
+
+    print(
+        colored(
+            f"Sending {len(test_requests)} requests to {len(servers)} "
+            "servers",
+            "cyan",
+        )
+    )
+    with RequestScheduler(
+        concurrency * len(servers), concurrency
+    ) as scheduler:
+        futures = [
+            {
+                server: scheduler.submit(server, send, server, *request)
+                for server in servers
+            }
+            for request in test_requests
+        ]
+
+        for (_endpoint_name, request_url, request), outcomes in zip(
+            test_requests, futures
+        ):
+            outcome_types = {}
+            for server, future in outcomes.items():
+                response = future.result()
+                server_result = result.servers[server]
+                outcome_types[server] = response.type
+
+                # Set for every response that was received
+                elapsed = getattr(response, "elapsed", None)
+                if elapsed is not None:
+                    server_result.latency.record(elapsed)
+
+                if response.type == "success":
+                    server_result.passed += 1
+                    continue
+
+                server_result.failed += 1
+                server_result.errors.append(response)
+                after_error_occurred(response)
+                print(
+                    colored(
+                        json.dumps(response, indent=4, default=str),
+                        "yellow",
+                    )
+                )
+
+            if len(set(outcome_types.values())) > 1:
+                result.differences.append(
+                    (
+                        request.method.upper(),
+                        request_url[len(base_url) :],
+                        outcome_types,
+                    )
+                )
+
+    result.print_summary()
+    return result
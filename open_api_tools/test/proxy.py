@@ -0,0 +1,434 @@
+# -*- coding: utf-8 -*-
+"""A reverse proxy that validates the traffic that passes through it."""
+
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Union
+from requests import Request
+from requests.structures import CaseInsensitiveDict
+from termcolor import colored
+
+from open_api_tools.common.instrumentation import (
+    LatencyHistogram,
+    PERCENTILES,
+    instrument,
+)
+from open_api_tools.common.load_schema import Schema
+from open_api_tools.common.sessions import SessionConfig, create_session
+from open_api_tools.common.traffic_archive import (
+    RecordedExchange,
+    RecordedResponse,
+)
+from open_api_tools.common.validation_policy import ValidationPolicy
+from open_api_tools.test.validate_logs import (
+    UNMATCHED,
+    LogValidationResult,
+    validate_exchange,
+)
+from open_api_tools.validate.index import ErrorMessage
+
+# Headers that only apply to a single connection, so they are not
+# forwarded (RFC 7230, section 6.1)
+HOP_BY_HOP_HEADERS = {
+    "connection",
+    "keep-alive",
+    "proxy-authenticate",
+    "proxy-authorization",
+    "te",
+    "trailer",
+    "transfer-encoding",
+    "upgrade",
+}
+
+
+@dataclass
+class ProxyStats:
+    """Counters of a running proxy."""
+
+    # Requests that were forwarded and answered by the server
+    forwarded: int = 0
+    # Requests that could not be forwarded (the client got a 502)
+    upstream_errors: int = 0
+    # Requests that were not validated because the queue was full
+    dropped: int = 0
+    # Time it took the server to respond
+    forward_latency: LatencyHistogram = field(
+        default_factory=LatencyHistogram, repr=False
+    )
+    # Number of entries and errors of each endpoint
+    validation: LogValidationResult = field(
+        default_factory=LogValidationResult
+    )
+
+    @property
+    def validated(self) -> int:
+        """Number of requests that were validated."""
+        return sum(self.validation.entries.values())
+
+    def to_dict(self) -> Dict[str, any]:
+        """Serialize the counters."""
+        return {
+            "forwarded": self.forwarded,
+            "upstream_errors": self.upstream_errors,
+            "dropped": self.dropped,
+            "validated": self.validated,
+            "forward_latency": self.forward_latency.to_dict(),
+            "validation": self.validation.to_dict(),
+        }
+
+    def snapshot(self) -> "ProxyStats":
+        """Copy the counters that `print_summary` shows.
+
+        Copying is cheap compared to printing, so the proxy's lock only
+        needs to be held for the copy.
+        """
+        forward_latency = LatencyHistogram()
+        forward_latency.merge(self.forward_latency)
+        validation = LogValidationResult(
+            duration=self.validation.duration
+        )
+        validation.merge(self.validation)
+        return ProxyStats(
+            forwarded=self.forwarded,
+            upstream_errors=self.upstream_errors,
+            dropped=self.dropped,
+            forward_latency=forward_latency,
+            validation=validation,
+        )
+
+    def print_summary(self) -> None:
+        """Print the counters and the errors of each endpoint."""
+        latency = ""
+        if self.forward_latency.count:
+            histogram = self.forward_latency
+            latency = "\n  forward latency (ms): " + ", ".join(
+                f"p{percentile}="
+                f"{histogram.percentile(percentile) * 1000:.2f}"
+                for percentile in PERCENTILES
+            )
+        print(
+            colored("Proxy: ", "cyan")
+            + f"forwarded {self.forwarded}, validated "
+            f"{self.validated}, dropped {self.dropped}, upstream "
+            f"errors {self.upstream_errors}, {self.validation.errors} "
+            f"validation errors" + latency
+        )
+        self.validation.print_endpoints()
+
+
+class ValidatingProxy:
+    """Forward requests to a server and validate the traffic.
+
+    Requests are forwarded right away. Each request and its response are
+    then put on a bounded queue, and validated by a pool of threads, so
+    the validation does not delay the responses. When the validation
+    falls behind and the queue is full, the request is not validated and
+    is counted as dropped instead.
+    """
+
+    def __init__(
+        self,
+        schema: Schema,
+        upstream: str,
+        host: str = "127.0.0.1",
+        port: int = 8080,
+        queue_size: int = 1000,
+        validation_threads: int = 2,
+        stats_interval: Union[float, None] = 60,
+        validation_policy: Union[ValidationPolicy, None] = None,
+        session_config: Union[SessionConfig, None] = None,
+        after_error_occurred: Callable[[ErrorMessage], None] = None,
+    ):
+        """Create the proxy.
+
+        Args:
+            schema: The schema object
+            upstream:
+                URL of the server to forward the requests to (e.x
+                "http://localhost:8000"). The path of each request is
+                appended to it
+            host: Address to listen on
+            port: Port to listen on. 0 picks a free port
+            queue_size:
+                Max number of requests waiting to be validated
+            validation_threads: Number of threads that validate requests
+            stats_interval:
+                Print the statistics every this many seconds. None only
+                prints them when the proxy stops
+            validation_policy:
+                Only validate some of the items of array responses
+                (described in `README.md`)
+            session_config:
+                Connection settings for the server. Default:
+                `SessionConfig()`
+            after_error_occurred:
+                Function to call for each error. It is called from the
+                validation threads
+        """
+        if queue_size < 1:
+            raise Exception("Queue size must be positive")
+        if validation_threads < 1:
+            raise Exception(
+                "Number of validation threads must be positive"
+            )
+
+        self.schema = schema
+        self.upstream = upstream.rstrip("/")
+        self.stats_interval = stats_interval
+        self.validation_policy = validation_policy
+        self.after_error_occurred = after_error_occurred
+        self.stats = ProxyStats()
+
+        self._session = create_session(
+            session_config or SessionConfig()
+        )
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._validation_threads = validation_threads
+
+        self._server = ThreadingHTTPServer(
+            (host, port),
+            type("Handler", (_ProxyHandler,), {"proxy": self}),
+        )
+        self._server.daemon_threads = True
+
+    @property
+    def address(self) -> str:
+        """URL of the proxy."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *_args):
+        self.stop()
+
+    def start(self) -> None:
+        """Start accepting requests in background threads."""
+        self._threads = [
+            threading.Thread(target=self._validate, daemon=True)
+            for _index in range(self._validation_threads)
+        ]
+        self._threads.append(
+            threading.Thread(
+                target=self._server.serve_forever, daemon=True
+            )
+        )
+        if self.stats_interval is not None:
+            self._threads.append(
+                threading.Thread(target=self._print_stats, daemon=True)
+            )
+        for thread in self._threads:
+            thread.start()
+        print(
+            colored("Proxy: ", "cyan")
+            + f"forwarding {self.address} to {self.upstream}"
+        )
+
+    def serve_forever(self) -> None:
+        """Run the proxy until it is interrupted (e.x with Ctrl+C)."""
+        self.start()
+        try:
+            while not self._stopped.wait(1):
+                pass
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    def stop(self) -> None:
+        """Stop the proxy, validate the queued requests and report."""
+        if not self._threads:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._stopped.set()
+        for _index in range(self._validation_threads):
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        self._session.close()
+        self.stats.print_summary()
+
+    def queue_validation(self, exchange: RecordedExchange) -> None:
+        """Queue a forwarded request for validation, or drop it."""
+        try:
+            self._queue.put_nowait(exchange)
+        except queue.Full:
+            with self._lock:
+                self.stats.dropped += 1
+
+    def _validate(self) -> None:
+        with instrument(self.stats.validation.timings):
+            self._validate_queue()
+
+    def _validate_queue(self) -> None:
+        errors: List[ErrorMessage] = []
+        while True:
+            exchange = self._queue.get()
+            if exchange is None:
+                return
+            errors.clear()
+            try:
+                endpoint_name = validate_exchange(
+                    schema=self.schema,
+                    exchange=exchange,
+                    after_error_occurred=errors.append,
+                    validation_policy=self.validation_policy,
+                )
+            except Exception as error:
+                print(
+                    colored(
+                        f"Failed to validate "
+                        f"[{exchange.method.upper()}] "
+                        f"{exchange.request_url}: {error}",
+                        "red",
+                    )
+                )
+                with self._lock:
+                    self.stats.validation.add_failed(
+                        f"[{exchange.method.upper()}] "
+                        f"{exchange.request_url}: {error!r}"
+                    )
+                continue
+
+            endpoint = (
+                UNMATCHED
+                if endpoint_name is None
+                else f"{exchange.method.upper()} {endpoint_name}"
+            )
+            with self._lock:
+                self.stats.validation.add_entry(endpoint)
+                for error in errors:
+                    self.stats.validation.add_error(endpoint, error)
+            if self.after_error_occurred is not None:
+                for error in errors:
+                    self.after_error_occurred(error)
+
+    def _print_stats(self) -> None:
+        while not self._stopped.wait(self.stats_interval):
+            # Print outside of the lock, which the forwarding threads
+            # take for every request
+            with self._lock:
+                stats = self.stats.snapshot()
+            stats.print_summary()
+
+
+class _ProxyHandler(BaseHTTPRequestHandler):
+    """Forward a request to the server of a `ValidatingProxy`.
+
+    Request bodies must have a `Content-Length` (chunked uploads are not
+    supported).
+    """
+
+    # Keep connections to the clients open
+    protocol_version = "HTTP/1.1"
+    proxy: ValidatingProxy = None
+
+    def log_message(self, *_args):
+        # Don't print a line per request
+        pass
+
+    def do_request(self):
+        proxy = self.proxy
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        headers = {
+            name: value
+            for name, value in self.headers.items()
+            if name.lower() not in HOP_BY_HOP_HEADERS
+            and name.lower() != "host"
+        }
+        headers["X-Forwarded-For"] = self.client_address[0]
+        url = proxy.upstream + self.path
+        # Prepared without the session, so that no headers are added
+        request = Request(
+            method=self.command, url=url, headers=headers, data=body
+        ).prepare()
+
+        start = time.perf_counter()
+        try:
+            response = proxy._session.send(
+                request, allow_redirects=False
+            )
+        except Exception as error:
+            with proxy._lock:
+                proxy.stats.upstream_errors += 1
+            self._respond(
+                502,
+                {"Content-Type": "text/plain"},
+                f"Failed to forward the request: {error}".encode(),
+            )
+            return
+        elapsed = time.perf_counter() - start
+
+        # The content was decoded by `requests`
+        response_headers = {
+            name: value
+            for name, value in response.headers.items()
+            if name.lower() not in HOP_BY_HOP_HEADERS
+            and name.lower()
+            not in ("content-encoding", "content-length")
+        }
+        self._respond(
+            response.status_code, response_headers, response.content
+        )
+
+        with proxy._lock:
+            proxy.stats.forwarded += 1
+            proxy.stats.forward_latency.record(elapsed)
+        proxy.queue_validation(
+            RecordedExchange(
+                endpoint_name=None,
+                method=self.command.lower(),
+                request_url=url,
+                request_headers=headers,
+                request_body=body,
+                response=RecordedResponse(
+                    url=url,
+                    status_code=response.status_code,
+                    headers=CaseInsensitiveDict(response.headers),
+                    content=response.content,
+                    elapsed=elapsed,
+                ),
+            )
+        )
+
+    do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = do_request
+    do_HEAD = do_OPTIONS = do_request
+
+    def _respond(
+        self, status_code: int, headers: Dict[str, str], content: bytes
+    ) -> None:
+        self.send_response(status_code)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        if self.command != "HEAD":
+            self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(content)
+
+
+def run_proxy(schema: Schema, upstream: str, **options) -> ProxyStats:
+    """Run a validating proxy until it is interrupted (e.x with Ctrl+C).
+
+    Args:
+        schema: The schema object
+        upstream: URL of the server to forward the requests to
+        options: Other arguments for `ValidatingProxy`
+
+    Returns:
+        The statistics
+    """
+    proxy = ValidatingProxy(schema, upstream, **options)
+    proxy.serve_forever()
+    return proxy.stats
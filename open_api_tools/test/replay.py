@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+"""Validate recorded responses against the schema, offline."""
+
+import dataclasses
+import json
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Union
+from termcolor import colored
+
+from open_api_tools.common.instrumentation import (
+    Timings,
+    instrument,
+    measure,
+)
+from open_api_tools.common.load_schema import Schema
+from open_api_tools.common.traffic_archive import TrafficArchive
+from open_api_tools.common.validation_policy import ValidationPolicy
+from open_api_tools.test.validate_logs import validate_recorded_request
+from open_api_tools.validate.index import (
+    ErrorMessage,
+    validate_latency,
+    validate_response,
+)
+
+
+@dataclass
+class ReplayResult:
+    """Outcome of validating an archive."""
+
+    # Number of recorded responses that were validated
+    responses: int = 0
+    errors: List[ErrorMessage] = field(default_factory=list)
+    # How long the validation took, in seconds
+    duration: float = 0
+    timings: Timings = field(default_factory=Timings, repr=False)
+
+    def to_dict(self) -> Dict[str, any]:
+        """Summarize the result."""
+        return {
+            "responses": self.responses,
+            "duration": self.duration,
+            "errors": [
+                json.loads(
+                    json.dumps(dataclasses.asdict(error), default=str)
+                )
+                for error in self.errors
+            ],
+            "timings": self.timings.to_dict(),
+        }
+
+    def print_summary(self) -> None:
+        """Print the number of responses and errors."""
+        print(
+            colored("Replay: ", "cyan")
+            + f"validated {self.responses} responses in "
+            f"{self.duration:.2f}s, {len(self.errors)} errors"
+        )
+
+
+def replay(
+    schema: Schema,
+    archive_path: str,
+    after_error_occurred: Callable[[ErrorMessage], None] = None,
+    validation_policy: Union[ValidationPolicy, None] = None,
+) -> ReplayResult:
+    """Validate the requests and responses stored in an archive.
+
+    The archive is recorded by setting `schema.traffic_recorder`
+    (described in `README.md`). Requests go through the checks of
+    `prepare_request` (the URL, the parameters, the body and the
+    security), and responses through those of `file_request`. Response
+    times are checked against the `x-max-latency-ms` budgets using the
+    recorded times.
+
+    Args:
+        schema: The schema object
+        archive_path: Location of the archive
+        after_error_occurred:
+            Function that would be called in case of any errors
+        validation_policy:
+            Only validate some of the items of array responses
+            (described in `README.md`)
+
+    Returns:
+        The number of validated responses and the errors
+    """
+    if after_error_occurred is None:
+        after_error_occurred = lambda _error: None
+
+    result = ReplayResult()
+
+    def report(error: ErrorMessage) -> None:
+        result.errors.append(error)
+        after_error_occurred(error)
+        print(
+            colored(json.dumps(error, indent=4, default=str), "yellow")
+        )
+
+    start = time.perf_counter()
+    with TrafficArchive(archive_path) as archive, instrument(
+        result.timings
+    ):
+        for exchange in archive:
+            result.responses += 1
+            match = schema.router.match(
+                exchange.method, exchange.request_url
+            )
+            endpoint = schema.raw_spec["paths"].get(
+                exchange.endpoint_name
+            )
+            if endpoint is None or exchange.method not in endpoint:
+                # The endpoint may have been renamed since the recording
+                if match is None:
+                    report(
+                        ErrorMessage(
+                            type="unknown_endpoint",
+                            title="Unknown Endpoint",
+                            error_status=(
+                                f"[{exchange.method.upper()}] "
+                                f"{exchange.endpoint_name} is not "
+                                f"defined in the schema"
+                            ),
+                            url=exchange.request_url,
+                        )
+                    )
+                    continue
+                exchange.endpoint_name = match.endpoint_name
+
+            if exchange.request_headers is not None:
+                with measure(
+                    exchange.endpoint_name, exchange.method, "prepare"
+                ):
+                    error = validate_recorded_request(
+                        schema,
+                        exchange,
+                        exchange.endpoint_name,
+                        # Recorded from a server that is not in the
+                        # schema
+                        exchange.request_url
+                        if match is None
+                        else match.request_url,
+                    )
+                if error is not None:
+                    report(error)
+
+            with measure(
+                exchange.endpoint_name,
+                exchange.method,
+                "validate_response",
+            ):
+                response = validate_response(
+                    schema=schema,
+                    request_url=exchange.request_url,
+                    endpoint_name=exchange.endpoint_name,
+                    method=exchange.method,
+                    response=exchange.response,
+                    after_error_occurred=report,
+                    validation_policy=validation_policy,
+                )
+            if (
+                response.type == "success"
+                and exchange.response.elapsed is not None
+            ):
+                error = validate_latency(
+                    schema=schema,
+                    request_url=exchange.request_url,
+                    endpoint_name=exchange.endpoint_name,
+                    method=exchange.method,
+                    elapsed=exchange.response.elapsed,
+                )
+                if error is not None:
+                    report(error)
+
+    result.duration = time.perf_counter() - start
+    result.print_summary()
+    return result
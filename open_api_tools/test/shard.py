@@ -0,0 +1,317 @@
+# -*- coding: utf-8 -*-
+"""Split `full_test` into shards and combine their results."""
+
+import contextlib
+import dataclasses
+import json
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple, Union
+from termcolor import colored
+
+from open_api_tools.common.instrumentation import Timings
+from open_api_tools.common.load_schema import Schema, load_schema
+from open_api_tools.common.sessions import SessionConfig, SessionManager
+from open_api_tools.common.sharding import validate_shard
+from open_api_tools.test.full_test import full_test
+from open_api_tools.validate.index import ErrorMessage
+
+
+@dataclass
+class ShardResult:
+    """Outcome of one or more shards of a test run."""
+
+    shard_count: int
+    # Numbers of the shards the result covers
+    shards: List[int]
+    # The errors, as dictionaries (see `ErrorMessage`)
+    errors: List[Dict[str, any]] = field(default_factory=list)
+    timings: Timings = field(default_factory=Timings, repr=False)
+    # Seed of the random test values. Shards only split the same test
+    # requests between them if they use the same seed
+    seed: Union[int, None] = None
+
+    @property
+    def requests(self) -> int:
+        """Number of requests that were sent."""
+        send = self.timings.by_phase().get("send")
+        return 0 if send is None else send.count
+
+    @property
+    def missing_shards(self) -> List[int]:
+        """Numbers of the shards that are not covered by the result."""
+        return sorted(
+            set(range(1, self.shard_count + 1)) - set(self.shards)
+        )
+
+    def record_error(self, error: ErrorMessage) -> None:
+        """Add an error to the result.
+
+        Args:
+            error: The error
+        """
+        self.errors.append(
+            json.loads(
+                json.dumps(dataclasses.asdict(error), default=str)
+            )
+        )
+
+    def merge(self, other: "ShardResult") -> None:
+        """Add the result of other shards to this one.
+
+        Args:
+            other: The result to merge
+
+        Raises:
+            Exception - if the results are of runs with a different
+            shard count or seed, or cover the same shards
+        """
+        if other.shard_count != self.shard_count:
+            raise Exception(
+                f"Can't merge results of runs split into a different "
+                f"number of shards ({self.shard_count} and "
+                f"{other.shard_count})"
+            )
+        if other.seed != self.seed:
+            raise Exception(
+                f"Can't merge results of runs with different seeds "
+                f"({self.seed} and {other.seed}), as they sent "
+                f"different test requests"
+            )
+        duplicate_shards = set(self.shards) & set(other.shards)
+        if duplicate_shards:
+            raise Exception(
+                f"Results of shards {sorted(duplicate_shards)} were "
+                f"provided more than once"
+            )
+        self.shards = sorted(self.shards + other.shards)
+        self.errors += other.errors
+        self.timings.merge(other.timings)
+
+    def to_dict(self) -> Dict[str, any]:
+        """Serialize the result."""
+        return {
+            "shard_count": self.shard_count,
+            "shards": self.shards,
+            "seed": self.seed,
+            "requests": self.requests,
+            "errors": self.errors,
+            "timings": self.timings.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, result: Dict[str, any]) -> "ShardResult":
+        """Restore a result serialized by `to_dict`."""
+        return cls(
+            shard_count=result["shard_count"],
+            shards=result["shards"],
+            errors=result["errors"],
+            timings=Timings.from_dict(result["timings"]),
+            seed=result["seed"],
+        )
+
+    def dump(self, path: str) -> None:
+        """Write the result to a JSON file.
+
+        Args:
+            path: Where to write the file
+        """
+        with open(path, "w") as file:
+            json.dump(self.to_dict(), file, indent=2)
+
+    @classmethod
+    def load(cls, path: str) -> "ShardResult":
+        """Read a result written by `dump`.
+
+        Args:
+            path: Location of the file
+        """
+        with open(path) as file:
+            return cls.from_dict(json.load(file))
+
+    def print_summary(self) -> None:
+        """Print the number of requests and errors per error type."""
+        error_types: Dict[str, int] = {}
+        for error in self.errors:
+            error_types[error["type"]] = (
+                error_types.get(error["type"], 0) + 1
+            )
+        print(
+            colored("Shards: ", "cyan")
+            + f"{len(self.shards)} of {self.shard_count}, "
+            f"{self.requests} requests, {len(self.errors)} errors"
+            + "".join(
+                f"\n  {error_type}: {count}"
+                for error_type, count in sorted(error_types.items())
+            )
+        )
+        if self.missing_shards:
+            print(
+                colored(
+                    f"Missing results for shards {self.missing_shards}",
+                    "yellow",
+                )
+            )
+        self.timings.print_summary()
+
+
+def run_shard(
+    schema: Schema,
+    shard: Tuple[int, int],
+    seed: int = 0,
+    results_path: Union[str, None] = None,
+    **options,
+) -> ShardResult:
+    """Run one shard of `full_test`.
+
+    Args:
+        schema: The schema object
+        shard: The shard number (starting from 1) and the shard count
+        seed:
+            Seed for the random test values. All shards of a run must
+            use the same seed
+        results_path: Write the result to this JSON file
+        options: Other arguments for `full_test`
+
+    Returns:
+        The result of the shard
+    """
+    validate_shard(shard)
+    result = ShardResult(
+        shard_count=shard[1], shards=[shard[0]], seed=seed
+    )
+    after_error_occurred = options.pop("after_error_occurred", None)
+
+    def record_error(error: ErrorMessage) -> None:
+        result.record_error(error)
+        if after_error_occurred is not None:
+            after_error_occurred(error)
+
+    full_test(
+        schema=schema,
+        after_error_occurred=record_error,
+        timings=result.timings,
+        seed=seed,
+        shard=shard,
+        **options,
+    )
+    if results_path is not None:
+        result.dump(results_path)
+    return result
+
+
+def merge_shard_results(paths: List[str]) -> ShardResult:
+    """Combine the result files of the shards of a run into one result.
+
+    Args:
+        paths: Locations of the files written by `run_shard`
+
+    Returns:
+        The combined result
+    """
+    if not paths:
+        raise Exception("No shard results to merge")
+
+    result = ShardResult.load(paths[0])
+    for path in paths[1:]:
+        result.merge(ShardResult.load(path))
+    return result
+
+
+def _run_shard_process(
+    schema_location: str,
+    cache_directory: Union[str, None],
+    shard: Tuple[int, int],
+    seed: int,
+    results_path: str,
+    log_path: str,
+    session_config: Union[SessionConfig, None],
+    options: Dict[str, any],
+) -> str:
+    with open(log_path, "w") as log, contextlib.redirect_stdout(
+        log
+    ), SessionManager(session_config) as sessions:
+        run_shard(
+            schema=load_schema(schema_location, cache_directory),
+            shard=shard,
+            seed=seed,
+            results_path=results_path,
+            sessions=sessions,
+            **options,
+        )
+    return results_path
+
+
+def sharded_full_test(
+    schema_location: str,
+    processes: Union[int, None] = None,
+    shard_count: Union[int, None] = None,
+    seed: int = 0,
+    results_directory: Union[str, None] = None,
+    cache_directory: Union[str, None] = None,
+    session_config: Union[SessionConfig, None] = None,
+    **options,
+) -> ShardResult:
+    """Run all shards of `full_test` in a pool of processes.
+
+    Each process loads the schema on its own, so `options` may only
+    contain values that can be pickled (e.x hooks must be module-level
+    functions).
+
+    Args:
+        schema_location: Location of the schema (see `load_schema`)
+        processes: Number of processes. Default: number of CPUs
+        shard_count: Number of shards. Default: same as `processes`
+        seed: Seed for the random test values
+        results_directory:
+            Where to write the result file and the output of each shard.
+            Default: a temporary directory
+        cache_directory: Schema cache directory (see `load_schema`)
+        session_config:
+            Connection settings for the sessions of each process.
+            Default: `SessionConfig()`
+        options: Other arguments for `full_test`
+
+    Returns:
+        The combined result
+    """
+    if processes is None:
+        processes = os.cpu_count() or 1
+    if shard_count is None:
+        shard_count = processes
+    if results_directory is None:
+        results_directory = tempfile.mkdtemp(prefix="open_api_tools-")
+    os.makedirs(results_directory, exist_ok=True)
+
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        futures = [
+            executor.submit(
+                _run_shard_process,
+                schema_location,
+                cache_directory,
+                (number, shard_count),
+                seed,
+                os.path.join(
+                    results_directory,
+                    f"shard-{number}-of-{shard_count}.json",
+                ),
+                os.path.join(
+                    results_directory,
+                    f"shard-{number}-of-{shard_count}.log",
+                ),
+                session_config,
+                options,
+            )
+            for number in range(1, shard_count + 1)
+        ]
+        paths = [future.result() for future in futures]
+
+    print(
+        colored("Shard results and output: ", "cyan")
+        + results_directory
+    )
+    result = merge_shard_results(paths)
+    result.print_summary()
+    return result
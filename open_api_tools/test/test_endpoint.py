@@ -1,18 +1,40 @@
 # -*- coding: utf-8 -*-
-from typing import Dict, List, Union, Callable
+import asyncio
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple, Union, Callable
 from termcolor import colored
 import string
 import random
-import itertools
 import json
+import math
+import httpx
 
 from open_api_tools.common.load_schema import Schema
+from open_api_tools.common.scheduler import RequestScheduler
+from open_api_tools.common.sessions import SessionManager
+from open_api_tools.common.sharding import shard_of
+from open_api_tools.common.validation_policy import ValidationPolicy
+from open_api_tools.test.covering_array import (
+    CoveringArray,
+    generate_covering_array,
+)
 from open_api_tools.test.utils import (
     ParameterData,
+    count_variations,
     create_request_payload,
+    distinct_values,
+    sample_variations,
     validate_parameter_data,
 )
-from open_api_tools.validate.index import ErrorMessage, make_request
+from open_api_tools.validate.index import (
+    P95_LATENCY_EXTENSION,
+    ErrorMessage,
+    async_file_request,
+    file_request,
+    get_latency_budget,
+    make_request,
+    prepare_request,
+)
 
 
 class InlineClass(object):
@@ -28,6 +50,7 @@ def parse_parameters(
     after_examples_generated: Union[
         None, Callable[[str, Dict[str, any], List[any]], List[any]]
     ] = None,
+    random_generator: Union[random.Random, None] = None,
 ):
     """Parse endpoint's parameters.
 
@@ -41,7 +64,11 @@ def parse_parameters(
         after_examples_generated:
             An examples generated post-hook
             (described in `README.md`)
+        random_generator:
+            Generator for the example values. Default: the shared
+            generator of the `random` module
     """
+    random_generator = random_generator or random
 
     parameters: List[ParameterData] = [
         InlineClass(
@@ -87,9 +114,12 @@ def parse_parameters(
                 if letters:
                     parameter_data.examples = [
                         "".join(
-                            random.choice(letters) for _i in range(10)
+                            random_generator.choice(letters)
+                            for _i in range(10)
+                        )
+                        for _ii in range(
+                            random_generator.randint(1, length)
                         )
-                        for _ii in range(random.randint(1, length))
                     ]
 
             if parameter_data.type == "boolean":
@@ -113,54 +143,75 @@ def parse_parameters(
     return parameters
 
 
-def test_endpoint(
+@dataclass
+class EndpointTest:
+    """Test requests generated for a single endpoint."""
+
+    endpoint_name: str
+    method: str
+    parameters: List[ParameterData]
+    # How many combinations of parameter examples there are
+    variation_count: int
+    parameter_variations: List[List[any]]
+    payloads: List[Tuple[any, str]]
+    # For each payload, a function (or an awaitable, when testing
+    # asynchronously) that returns the response and the list of errors
+    # that occurred
+    results: List[any] = field(default_factory=list)
+    # Only set when the variations were picked with a covering array
+    covering_array: Union[CoveringArray, None] = None
+    # Budget for the 95th percentile of the response times, in
+    # milliseconds (from the `x-p95-latency-ms` extension)
+    p95_latency_ms: Union[float, None] = None
+
+
+def generate_endpoint_test(
     endpoint_name: str,
     method: str,
     base_url: str,
-    should_continue_on_fail: Callable[[], bool],
     schema: Schema,
     max_urls_per_endpoint: int,
-    parameter_constraints: Union[
-        None, Dict[str, Callable[[bool, str, Dict[str, any]], bool]]
-    ] = None,
-    after_error_occurred: Callable[[ErrorMessage], None] = None,
     after_examples_generated: Union[
         None, Callable[[str, Dict[str, any], List[any]], List[any]]
     ] = None,
-    before_request_send: Union[Callable[[any], any], None] = None,
-) -> None:
-    """Full test for a single endpoint.
-
-    Generates test URLs and validates the responses
+    seed: Union[int, None] = None,
+    shard: Union[Tuple[int, int], None] = None,
+    covering_strength: Union[int, None] = None,
+) -> EndpointTest:
+    """Generate test URLs for an endpoint.
 
     Args:
         endpoint_name: Endpoint name
         method: HTTP method
         base_url: Server URL
-        should_continue_on_fail:
-            function that would say whether to continue testing
         schema: the schema object
         max_urls_per_endpoint: max number of URLs to test
-        parameter_constraints:
-            Parameter Constraints dictionary
-            (described in `README.md`)
-        after_error_occurred:
-            After error occurred hook
-            (described in `README.md`)
         after_examples_generated:
             After examples generated hook
             (described in `README.md`)
-        before_request_send:
-            Before request send hook
-            (described in `README.md`)
+        seed:
+            Seed for the random test values. With a seed, the same test
+            URLs are generated for the endpoint on every run
+        shard:
+            Only keep the test URLs of this shard, given as the shard
+            number (starting from 1) and the shard count (described in
+            `README.md`)
+        covering_strength:
+            Generate a covering array of this strength instead of
+            picking random combinations of parameter values (described
+            in `README.md`)
+
+    Returns:
+        The test, without any requests scheduled
     """
-    print(
-        colored(
-            "Testing [{}] `{}`".format(method, endpoint_name), "red"
-        )
-    )
-
     method = method.lower()
+    # A generator of its own, so that seeding it does not affect other
+    # users of the `random` module
+    random_generator = (
+        random
+        if seed is None
+        else random.Random(f"{seed} {method} {endpoint_name}")
+    )
 
     if base_url is None or base_url == "" or base_url == "/":
         raise Exception(
@@ -169,140 +220,691 @@ def test_endpoint(
             "accepted)"
         )
 
-    if parameter_constraints is None:
-        parameter_constraints = {}
-
     parameters = parse_parameters(
         endpoint_name=endpoint_name,
         endpoint_data=schema.schema.paths[endpoint_name],
         method=method,
         generate_examples=True,
         after_examples_generated=after_examples_generated,
+        random_generator=random_generator,
     )
 
-    parameter_names = list(map(lambda p: p.name, parameters))
+    covering_array = None
+    if covering_strength is None:
+        # picking url variations based on parameters, without creating
+        # all the possible combinations
+        parameter_variations = list(
+            sample_variations(
+                parameters, max_urls_per_endpoint, random_generator
+            )
+        )
+    else:
+        # Repeated examples (like the two `None` request bodies) would
+        # be covered as different values, and produce duplicate rows
+        levels = [
+            distinct_values(parameter.examples)
+            for parameter in parameters
+        ]
+        covering_array = generate_covering_array(
+            [len(values) for values in levels],
+            strength=covering_strength,
+            max_rows=max_urls_per_endpoint,
+            random_generator=random_generator,
+        )
+        parameter_variations = [
+            tuple(
+                values[value_index]
+                for values, value_index in zip(levels, row)
+            )
+            for row in covering_array.rows
+        ]
+    if shard is not None:
+        parameter_variations = [
+            variation
+            for index, variation in enumerate(parameter_variations)
+            if shard_of(endpoint_name, method, index, shard[1])
+            == shard[0]
+        ]
+    payloads = [
+        create_request_payload(
+            endpoint_name, parameters, variation, base_url
+        )
+        for variation in parameter_variations
+    ]
+
+    return EndpointTest(
+        endpoint_name=endpoint_name,
+        method=method,
+        parameters=parameters,
+        variation_count=count_variations(parameters),
+        parameter_variations=parameter_variations,
+        payloads=payloads,
+        covering_array=covering_array,
+        p95_latency_ms=get_latency_budget(
+            schema, endpoint_name, method, P95_LATENCY_EXTENSION
+        ),
+    )
+
+
+def schedule_endpoint_test(
+    endpoint_name: str,
+    method: str,
+    base_url: str,
+    schema: Schema,
+    max_urls_per_endpoint: int,
+    after_examples_generated: Union[
+        None, Callable[[str, Dict[str, any], List[any]], List[any]]
+    ] = None,
+    before_request_send: Union[Callable[[any], any], None] = None,
+    scheduler: Union[RequestScheduler, None] = None,
+    validation_policy: Union[ValidationPolicy, None] = None,
+    sessions: Union[SessionManager, None] = None,
+    seed: Union[int, None] = None,
+    shard: Union[Tuple[int, int], None] = None,
+    covering_strength: Union[int, None] = None,
+) -> EndpointTest:
+    """Generate test URLs for an endpoint and schedule the requests.
+
+    Without a scheduler, each request is only sent once its result is
+    requested. With a scheduler, requests are prepared right away (in
+    order) and are sent concurrently.
+
+    Args:
+        endpoint_name: Endpoint name
+        method: HTTP method
+        base_url: Server URL
+        schema: the schema object
+        max_urls_per_endpoint: max number of URLs to test
+        after_examples_generated:
+            After examples generated hook
+            (described in `README.md`)
+        before_request_send:
+            Before request send hook
+            (described in `README.md`)
+        scheduler: Scheduler to send the requests with
+        validation_policy:
+            Only validate some of the items of array responses
+            (described in `README.md`)
+        sessions:
+            Sessions to send the requests with.
+            Default: the shared sessions
+        seed: Seed for the random test values
+        shard: Only send the requests of this shard
+        covering_strength:
+            Generate a covering array of this strength instead of
+            picking random combinations of parameter values (described
+            in `README.md`)
+
+    Returns:
+        The scheduled test
+    """
+    endpoint_test = generate_endpoint_test(
+        endpoint_name=endpoint_name,
+        method=method,
+        base_url=base_url,
+        schema=schema,
+        max_urls_per_endpoint=max_urls_per_endpoint,
+        covering_strength=covering_strength,
+        after_examples_generated=after_examples_generated,
+        seed=seed,
+        shard=shard,
+    )
+    method = endpoint_test.method
+    session = None if sessions is None else sessions.get(base_url)
+
+    def send(body, request_url):
+        errors = []
+        response = make_request(
+            request_url=request_url,
+            endpoint_name=endpoint_name,
+            method=method,
+            body=body,
+            schema=schema,
+            before_request_send=before_request_send,
+            after_error_occurred=errors.append,
+            validation_policy=validation_policy,
+            session=session,
+        )
+        return response, errors
+
+    def schedule(body, request_url):
+        errors = []
+        response = prepare_request(
+            request_url=request_url,
+            endpoint_name=endpoint_name,
+            method=method,
+            body=body,
+            schema=schema,
+            before_request_send=before_request_send,
+            after_error_occurred=errors.append,
+        )
+        if response.type != "success":
+            return lambda: (response, errors)
+
+        def file(request):
+            return (
+                file_request(
+                    schema=schema,
+                    request=request,
+                    endpoint_name=endpoint_name,
+                    request_url=request_url,
+                    after_error_occurred=errors.append,
+                    validation_policy=validation_policy,
+                    session=session,
+                ),
+                errors,
+            )
+
+        return scheduler.submit(
+            f"{method} {endpoint_name}", file, response.request
+        ).result
+
+    endpoint_test.results = [
+        (lambda payload=payload: send(*payload))
+        if scheduler is None
+        else schedule(*payload)
+        for payload in endpoint_test.payloads
+    ]
+    return endpoint_test
+
+
+def async_schedule_endpoint_test(
+    endpoint_name: str,
+    method: str,
+    base_url: str,
+    schema: Schema,
+    max_urls_per_endpoint: int,
+    client: httpx.AsyncClient,
+    semaphore: asyncio.Semaphore,
+    endpoint_concurrency: Union[int, None] = None,
+    after_examples_generated: Union[
+        None, Callable[[str, Dict[str, any], List[any]], List[any]]
+    ] = None,
+    before_request_send: Union[Callable[[any], any], None] = None,
+    validation_policy: Union[ValidationPolicy, None] = None,
+    seed: Union[int, None] = None,
+    shard: Union[Tuple[int, int], None] = None,
+    covering_strength: Union[int, None] = None,
+) -> EndpointTest:
+    """Generate test URLs for an endpoint and start sending requests.
+
+    Must be called from within a running event loop. Requests are
+    prepared right away (in order) and are sent as asyncio tasks.
+
+    Args:
+        endpoint_name: Endpoint name
+        method: HTTP method
+        base_url: Server URL
+        schema: the schema object
+        max_urls_per_endpoint: max number of URLs to test
+        client: The client to send the requests with
+        semaphore: Limits the number of requests in flight overall
+        endpoint_concurrency:
+            Max number of requests in flight to this endpoint
+        after_examples_generated:
+            After examples generated hook
+            (described in `README.md`)
+        before_request_send:
+            Before request send hook
+            (described in `README.md`)
+        validation_policy:
+            Only validate some of the items of array responses
+        seed: Seed for the random test values
+        shard: Only send the requests of this shard
+        covering_strength:
+            Generate a covering array of this strength instead of
+            picking random combinations of parameter values (described
+            in `README.md`)
+
+    Returns:
+        The scheduled test
+    """
+    endpoint_test = generate_endpoint_test(
+        endpoint_name=endpoint_name,
+        method=method,
+        base_url=base_url,
+        schema=schema,
+        max_urls_per_endpoint=max_urls_per_endpoint,
+        covering_strength=covering_strength,
+        after_examples_generated=after_examples_generated,
+        seed=seed,
+        shard=shard,
+    )
+    method = endpoint_test.method
+    endpoint_semaphore = asyncio.Semaphore(
+        endpoint_concurrency or len(endpoint_test.payloads) or 1
+    )
+
+    async def file(request, request_url, errors):
+        async with endpoint_semaphore, semaphore:
+            response = await async_file_request(
+                schema=schema,
+                request=request,
+                endpoint_name=endpoint_name,
+                request_url=request_url,
+                after_error_occurred=errors.append,
+                client=client,
+                validation_policy=validation_policy,
+            )
+        return response, errors
+
+    async def failed(response, errors):
+        return response, errors
+
+    def schedule(body, request_url):
+        errors = []
+        response = prepare_request(
+            request_url=request_url,
+            endpoint_name=endpoint_name,
+            method=method,
+            body=body,
+            schema=schema,
+            before_request_send=before_request_send,
+            after_error_occurred=errors.append,
+        )
+        return asyncio.ensure_future(
+            file(response.request, request_url, errors)
+            if response.type == "success"
+            else failed(response, errors)
+        )
+
+    endpoint_test.results = [
+        schedule(*payload) for payload in endpoint_test.payloads
+    ]
+    return endpoint_test
+
+
+def run_endpoint_test(
+    endpoint_test: EndpointTest,
+    should_continue_on_fail: Callable[[], bool],
+    parameter_constraints: Union[
+        None, Dict[str, Callable[[bool, str, Dict[str, any]], bool]]
+    ] = None,
+    after_error_occurred: Callable[[ErrorMessage], None] = None,
+) -> None:
+    """Collect the responses of a scheduled test and validate them.
+
+    Responses are processed in the order the requests were generated,
+    no matter in which order they arrive.
+
+    Args:
+        endpoint_test: the scheduled test
+        should_continue_on_fail:
+            function that would say whether to continue testing
+        parameter_constraints:
+            Parameter Constraints dictionary
+            (described in `README.md`)
+        after_error_occurred:
+            After error occurred hook
+            (described in `README.md`)
+    """
+    if after_error_occurred is None:
+        after_error_occurred = lambda _error: None
+
+    _print_endpoint_test(endpoint_test)
+
+    responses: Dict[int, object] = {}
+    latencies: List[float] = []
+    for index, result in enumerate(endpoint_test.results):
+        _print_request(endpoint_test, index)
+        if not _handle_response(
+            *result(),
+            index=index,
+            responses=responses,
+            latencies=latencies,
+            should_continue_on_fail=should_continue_on_fail,
+            after_error_occurred=after_error_occurred,
+        ):
+            return
+
+    _check_constraints(
+        endpoint_test,
+        responses,
+        parameter_constraints,
+        after_error_occurred,
+    )
+    _check_latency_percentile(
+        endpoint_test,
+        latencies,
+        should_continue_on_fail,
+        after_error_occurred,
+    )
+
+
+async def async_run_endpoint_test(
+    endpoint_test: EndpointTest,
+    should_continue_on_fail: Callable[[], bool],
+    parameter_constraints: Union[
+        None, Dict[str, Callable[[bool, str, Dict[str, any]], bool]]
+    ] = None,
+    after_error_occurred: Callable[[ErrorMessage], None] = None,
+) -> None:
+    """Asynchronous version of `run_endpoint_test`.
+
+    Args:
+        endpoint_test:
+            the test scheduled by `async_schedule_endpoint_test`
+        should_continue_on_fail:
+            function that would say whether to continue testing
+        parameter_constraints:
+            Parameter Constraints dictionary
+            (described in `README.md`)
+        after_error_occurred:
+            After error occurred hook
+            (described in `README.md`)
+    """
+    if after_error_occurred is None:
+        after_error_occurred = lambda _error: None
+
+    _print_endpoint_test(endpoint_test)
 
-    # creating url variations based on parameters
-    parameter_variations = list(
-        itertools.product(*map(lambda p: p.examples, parameters))
+    responses: Dict[int, object] = {}
+    latencies: List[float] = []
+    for index, result in enumerate(endpoint_test.results):
+        _print_request(endpoint_test, index)
+        if not _handle_response(
+            *(await result),
+            index=index,
+            responses=responses,
+            latencies=latencies,
+            should_continue_on_fail=should_continue_on_fail,
+            after_error_occurred=after_error_occurred,
+        ):
+            return
+
+    _check_constraints(
+        endpoint_test,
+        responses,
+        parameter_constraints,
+        after_error_occurred,
+    )
+    _check_latency_percentile(
+        endpoint_test,
+        latencies,
+        should_continue_on_fail,
+        after_error_occurred,
     )
 
-    payloads = list(
-        map(
-            lambda variation: create_request_payload(
-                endpoint_name, parameters, variation, base_url
+
+def _print_endpoint_test(endpoint_test: EndpointTest) -> None:
+    print(
+        colored(
+            "Testing [{}] `{}`".format(
+                endpoint_test.method, endpoint_test.endpoint_name
             ),
-            parameter_variations,
+            "red",
         )
     )
 
     print(
         "Created %d test URLs for the `%s` endpoint"
-        % (len(payloads), endpoint_name)
+        % (endpoint_test.variation_count, endpoint_test.endpoint_name)
     )
 
-    # if more than `max_urls_per_endpoint` urls, take a random sample
-    if len(payloads) > max_urls_per_endpoint:
-        payloads, parameter_variations = zip(
-            *random.sample(
-                list(zip(payloads, parameter_variations)),
-                max_urls_per_endpoint,
+    covering_array = endpoint_test.covering_array
+    if covering_array is not None:
+        print(
+            "Picked %d test URLs that cover %d of %d (%.1f%%) %d-way "
+            "parameter interactions"
+            % (
+                len(endpoint_test.payloads),
+                covering_array.covered_interactions,
+                covering_array.total_interactions,
+                covering_array.coverage * 100,
+                covering_array.strength,
             )
         )
+    elif endpoint_test.variation_count > len(endpoint_test.payloads):
         print(
             "Downsizing the sample of test URLs to %d"
-            % max_urls_per_endpoint
+            % len(endpoint_test.payloads)
         )
 
-    # testing all url variations for validness
-    # fetching all the responses
-    # validating responses against schema
-    responses: Dict[int, object] = {}
-    for index, payload in enumerate(payloads):
 
-        body, request_url = payload
+def _print_request(endpoint_test: EndpointTest, index: int) -> None:
+    print(
+        "%s %s"
+        % (
+            colored(
+                "[%d/%d]" % (index, len(endpoint_test.payloads)), "cyan"
+            ),
+            colored(
+                "Fetching response from %s"
+                % endpoint_test.payloads[index][1],
+                "blue",
+            ),
+        )
+    )
 
+
+def _handle_response(
+    response,
+    errors: List[ErrorMessage],
+    index: int,
+    responses: Dict[int, object],
+    latencies: List[float],
+    should_continue_on_fail: Callable[[], bool],
+    after_error_occurred: Callable[[ErrorMessage], None],
+) -> bool:
+    """Report the errors for a single response.
+
+    Returns:
+        Whether to continue testing
+    """
+    for error in errors:
+        after_error_occurred(error)
+
+    # Set for every response that was received, valid or not
+    if getattr(response, "elapsed", None) is not None:
+        latencies.append(response.elapsed * 1000)
+
+    if response.type != "success":
         print(
-            "%s %s"
-            % (
-                colored("[%d/%d]" % (index, len(payloads)), "cyan"),
-                colored(
-                    "Fetching response from %s" % request_url,
-                    "blue",
-                ),
+            colored(
+                json.dumps(response, indent=4, default=str),
+                "yellow",
             )
         )
+        if not should_continue_on_fail():
+            return False
 
-        response = make_request(
-            request_url=request_url,
-            endpoint_name=endpoint_name,
-            method=method,
-            body=body,
-            schema=schema,
-            before_request_send=before_request_send,
-            after_error_occurred=after_error_occurred,
-        )
+    if response.type == "invalid_request":
+        raise Exception(response.type)
 
-        if response.type != "success":
+    if response.type == "success":
+        responses[index] = response.response
+        if response.checked_items is not None:
+            shown_items = ", ".join(
+                map(str, response.checked_items[:10])
+            )
             print(
-                colored(
-                    json.dumps(
-                        response, indent=4, default=str
-                    ),
-                    "yellow",
+                "Validated %d array items (%s%s)"
+                % (
+                    len(response.checked_items),
+                    shown_items,
+                    ", ..." if len(response.checked_items) > 10 else "",
                 )
             )
-            if not should_continue_on_fail():
-                return
 
-        if response.type == "invalid_request":
-            raise Exception(response.type)
+    return True
+
+
+def _check_constraints(
+    endpoint_test: EndpointTest,
+    responses: Dict[int, object],
+    parameter_constraints: Union[
+        None, Dict[str, Callable[[bool, str, Dict[str, any]], bool]]
+    ],
+    after_error_occurred: Callable[[ErrorMessage], None],
+) -> None:
+    """Run successful responses through the parameter constraints."""
+    endpoint_name = endpoint_test.endpoint_name
+    parameters = endpoint_test.parameters
+    parameter_names = list(map(lambda p: p.name, parameters))
 
-        if hasattr(response,'parsed_response'):
-            responses[index] = response.response
+    if parameter_constraints is None:
+        parameter_constraints = {}
 
-    # running tests though constraints
     defined_constraints = {
         parameter_name: constraint_function
         for parameter_name, constraint_function in parameter_constraints.items()
         if parameter_name in parameter_names
     }
-    if defined_constraints:
-        for request_index, response_object in responses.items():
-            for (
-                parameter_name,
-                constraint_function,
-            ) in defined_constraints.items():
-
-                parameter_value = parameter_variations[request_index][
+    if not defined_constraints:
+        return
+
+    for request_index, response_object in responses.items():
+        for (
+            parameter_name,
+            constraint_function,
+        ) in defined_constraints.items():
+
+            parameter_value = endpoint_test.parameter_variations[
+                request_index
+            ][parameter_names.index(parameter_name)]
+            if parameter_value == "":
+                parameter_value = parameters[
                     parameter_names.index(parameter_name)
-                ]
-                if parameter_value == "":
-                    parameter_value = parameters[
-                        parameter_names.index(parameter_name)
-                    ].default
-
-                if not constraint_function(
-                    parameter_value, endpoint_name, response_object
-                ):
-                    error_message = ErrorMessage(
-                        type="failed_test_constraint",
-                        title="Testing constraint failed",
-                        error_status=f"Constraint on the {endpoint_name} based "
-                        + f"on a parameter {parameter_name} failed",
-                        url=payloads[request_index][1],
-                        extra={
-                            "response": json.dumps(
-                                response, indent=4, default=str
-                            )
-                        },
-                    )
-                    after_error_occurred(error_message)
-                    print(
-                        colored(
-                            json.dumps(
-                                error_message, indent=4, default=str
-                            ),
-                            "yellow",
+                ].default
+
+            if not constraint_function(
+                parameter_value, endpoint_name, response_object
+            ):
+                error_message = ErrorMessage(
+                    type="failed_test_constraint",
+                    title="Testing constraint failed",
+                    error_status=f"Constraint on the {endpoint_name} "
+                    + f"based on a parameter {parameter_name} failed",
+                    url=endpoint_test.payloads[request_index][1],
+                    extra={
+                        "response": json.dumps(
+                            response_object, indent=4, default=str
                         )
+                    },
+                )
+                after_error_occurred(error_message)
+                print(
+                    colored(
+                        json.dumps(
+                            error_message, indent=4, default=str
+                        ),
+                        "yellow",
                     )
+                )
+
+
+def _check_latency_percentile(
+    endpoint_test: EndpointTest,
+    latencies: List[float],
+    should_continue_on_fail: Callable[[], bool],
+    after_error_occurred: Callable[[ErrorMessage], None],
+) -> None:
+    """Check response times against the `x-p95-latency-ms` budget."""
+    budget = endpoint_test.p95_latency_ms
+    if budget is None or not latencies:
+        return
+
+    # Nearest-rank percentile
+    p95 = sorted(latencies)[math.ceil(len(latencies) * 0.95) - 1]
+    if p95 <= budget:
+        return
+
+    error_message = ErrorMessage(
+        type="latency_budget_exceeded",
+        title="Latency Budget Exceeded",
+        error_status=(
+            f"95th percentile of the response times of the "
+            f"{endpoint_test.endpoint_name} endpoint ({p95:.1f}ms) is "
+            f"over the {budget:g}ms budget ({P95_LATENCY_EXTENSION})"
+        ),
+        url=endpoint_test.endpoint_name,
+        extra={
+            "p95_ms": p95,
+            "budget_ms": budget,
+            "samples": len(latencies),
+        },
+    )
+    after_error_occurred(error_message)
+    print(
+        colored(
+            json.dumps(error_message, indent=4, default=str), "yellow"
+        )
+    )
+    should_continue_on_fail()
+
+
+def test_endpoint(
+    endpoint_name: str,
+    method: str,
+    base_url: str,
+    should_continue_on_fail: Callable[[], bool],
+    schema: Schema,
+    max_urls_per_endpoint: int,
+    parameter_constraints: Union[
+        None, Dict[str, Callable[[bool, str, Dict[str, any]], bool]]
+    ] = None,
+    after_error_occurred: Callable[[ErrorMessage], None] = None,
+    after_examples_generated: Union[
+        None, Callable[[str, Dict[str, any], List[any]], List[any]]
+    ] = None,
+    before_request_send: Union[Callable[[any], any], None] = None,
+    scheduler: Union[RequestScheduler, None] = None,
+    validation_policy: Union[ValidationPolicy, None] = None,
+    sessions: Union[SessionManager, None] = None,
+    covering_strength: Union[int, None] = None,
+) -> None:
+    """Full test for a single endpoint.
+
+    Generates test URLs and validates the responses
+
+    Args:
+        endpoint_name: Endpoint name
+        method: HTTP method
+        base_url: Server URL
+        should_continue_on_fail:
+            function that would say whether to continue testing
+        schema: the schema object
+        max_urls_per_endpoint: max number of URLs to test
+        parameter_constraints:
+            Parameter Constraints dictionary
+            (described in `README.md`)
+        after_error_occurred:
+            After error occurred hook
+            (described in `README.md`)
+        after_examples_generated:
+            After examples generated hook
+            (described in `README.md`)
+        before_request_send:
+            Before request send hook
+            (described in `README.md`)
+        scheduler:
+            Send the requests concurrently using this scheduler
+        validation_policy:
+            Only validate some of the items of array responses
+            (described in `README.md`)
+        sessions:
+            Sessions to send the requests with
+            (described in `README.md`)
+        covering_strength:
+            Generate a covering array of this strength instead of
+            picking random combinations of parameter values (described
+            in `README.md`)
+    """
+    run_endpoint_test(
+        schedule_endpoint_test(
+            endpoint_name=endpoint_name,
+            method=method,
+            base_url=base_url,
+            schema=schema,
+            max_urls_per_endpoint=max_urls_per_endpoint,
+            covering_strength=covering_strength,
+            after_examples_generated=after_examples_generated,
+            before_request_send=before_request_send,
+            scheduler=scheduler,
+            validation_policy=validation_policy,
+            sessions=sessions,
+        ),
+        should_continue_on_fail=should_continue_on_fail,
+        parameter_constraints=parameter_constraints,
+        after_error_occurred=after_error_occurred,
+    )
@@ -2,9 +2,13 @@
 """Utility functions for running the tests."""
 
 import functools
+import itertools
+import operator
+import random
+import sys
 import urllib
 from dataclasses import dataclass
-from typing import List, Tuple, Union
+from typing import Iterator, List, Tuple, Union
 
 
 @dataclass
@@ -137,3 +141,99 @@ def create_request_payload(
             "{}{}?".format(base_url, endpoint_name),
         ),
     )
+
+
+def count_variations(parameters: List[ParameterData]) -> int:
+    """Count the combinations of parameter examples.
+
+    Args:
+        parameters: list of parameters for the endpoint
+
+    Returns:
+        The size of the cartesian product of all examples
+    """
+    return functools.reduce(
+        operator.mul,
+        (len(parameter.examples) for parameter in parameters),
+        1,
+    )
+
+
+def distinct_values(values: List[any]) -> List[any]:
+    """Remove repeated values, keeping the first of each.
+
+    Values are compared by type and equality (examples may be
+    unhashable), so `1`, `True` and `"1"` stay different.
+
+    Args:
+        values: examples of a parameter
+
+    Returns:
+        The values in their original order, without repeats
+    """
+    distinct = []
+    for value in values:
+        if not any(
+            type(value) is type(other) and value == other
+            for other in distinct
+        ):
+            distinct.append(value)
+    return distinct
+
+
+def sample_variations(
+    parameters: List[ParameterData],
+    sample_size: int,
+    random_generator: Union[random.Random, None] = None,
+) -> Iterator[Tuple[any, ...]]:
+    """Pick random combinations of parameter examples.
+
+    Combinations are decoded from random indices into the cartesian
+    product, so the product is never enumerated.
+
+    Args:
+        parameters: list of parameters for the endpoint
+        sample_size: max number of combinations to return
+        random_generator:
+            Generator to pick the combinations with. Default: the
+            shared generator of the `random` module
+
+    Returns:
+        Iterator of combinations (one value per parameter). If the
+        product is not larger than `sample_size`, all combinations are
+        returned in order
+    """
+    examples = [parameter.examples for parameter in parameters]
+    total = count_variations(parameters)
+
+    if total <= sample_size:
+        yield from itertools.product(*examples)
+        return
+
+    for index in _sample_indices(
+        total, sample_size, random_generator or random
+    ):
+        variation = []
+        # The last parameter changes fastest, as in itertools.product
+        for parameter_examples in reversed(examples):
+            index, position = divmod(index, len(parameter_examples))
+            variation.append(parameter_examples[position])
+        yield tuple(reversed(variation))
+
+
+def _sample_indices(
+    total: int, sample_size: int, random_generator: random.Random
+) -> Iterator[int]:
+    """Pick unique random integers from `range(total)`."""
+    if total <= sys.maxsize:
+        yield from random_generator.sample(range(total), sample_size)
+        return
+
+    # range() of this size does not support len(), which random.sample
+    # needs. Collisions are negligible when total is this large
+    picked = set()
+    while len(picked) < sample_size:
+        index = random_generator.randrange(total)
+        if index not in picked:
+            picked.add(index)
+            yield index
@@ -0,0 +1,506 @@
+# -*- coding: utf-8 -*-
+"""Validate requests and responses from HAR files and access logs."""
+
+import dataclasses
+import json
+import os
+import time
+import urllib.parse as urlparse
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ProcessPoolExecutor,
+    wait,
+)
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Union
+from urllib.parse import parse_qs
+from openapi_core.contrib.requests import RequestsOpenAPIRequest
+from requests import Request
+from termcolor import colored
+
+from open_api_tools.common.instrumentation import (
+    Timings,
+    instrument,
+    measure,
+)
+from open_api_tools.common.load_schema import Schema, load_schema
+from open_api_tools.common.traffic_archive import RecordedExchange
+from open_api_tools.common.traffic_logs import (
+    detect_log_format,
+    parse_log_record,
+    read_log_records,
+)
+from open_api_tools.common.validation_policy import ValidationPolicy
+from open_api_tools.validate.index import (
+    ErrorMessage,
+    validate_latency,
+    validate_request_body,
+    validate_request_url,
+    validate_response,
+)
+
+# Key of the entries that don't belong to any endpoint of the schema
+UNMATCHED = "(unmatched)"
+# Number of errors of each endpoint that are kept as examples
+ERROR_SAMPLES = 3
+
+
+@dataclass
+class LogValidationResult:
+    """Violation counts per endpoint."""
+
+    # Number of entries of each endpoint ("METHOD /endpoint/name")
+    entries: Dict[str, int] = field(default_factory=dict)
+    # Number of errors of each type, for each endpoint
+    violations: Dict[str, Dict[str, int]] = field(default_factory=dict)
+    # The first few errors of each endpoint, as dictionaries (see
+    # `ErrorMessage`)
+    samples: Dict[str, List[Dict[str, any]]] = field(
+        default_factory=dict
+    )
+    # Number of records that could not be parsed, and the first few
+    # reasons
+    unparsed: int = 0
+    unparsed_samples: List[str] = field(default_factory=list)
+    # Number of records whose validation raised an exception, and the
+    # first few exceptions
+    failed: int = 0
+    failed_samples: List[str] = field(default_factory=list)
+    # How long the validation took, in seconds
+    duration: float = 0
+    timings: Timings = field(default_factory=Timings, repr=False)
+
+    @property
+    def errors(self) -> int:
+        """Total number of errors."""
+        return sum(
+            sum(counts.values()) for counts in self.violations.values()
+        )
+
+    def add_entry(self, endpoint: str) -> None:
+        """Count an entry of an endpoint."""
+        self.entries[endpoint] = self.entries.get(endpoint, 0) + 1
+
+    def add_error(self, endpoint: str, error: ErrorMessage) -> None:
+        """Count an error of an endpoint."""
+        counts = self.violations.setdefault(endpoint, {})
+        counts[error.type] = counts.get(error.type, 0) + 1
+        samples = self.samples.setdefault(endpoint, [])
+        if len(samples) < ERROR_SAMPLES:
+            samples.append(
+                json.loads(
+                    json.dumps(dataclasses.asdict(error), default=str)
+                )
+            )
+
+    def add_unparsed(self, reason: str) -> None:
+        """Count a record that could not be parsed."""
+        self.unparsed += 1
+        if len(self.unparsed_samples) < ERROR_SAMPLES:
+            self.unparsed_samples.append(reason)
+
+    def add_failed(self, reason: str) -> None:
+        """Count a record whose validation raised an exception."""
+        self.failed += 1
+        if len(self.failed_samples) < ERROR_SAMPLES:
+            self.failed_samples.append(reason)
+
+    def merge(self, other: "LogValidationResult") -> None:
+        """Add the counts of another result to this one.
+
+        Args:
+            other: The result to merge
+        """
+        for endpoint, count in other.entries.items():
+            self.entries[endpoint] = (
+                self.entries.get(endpoint, 0) + count
+            )
+        for endpoint, counts in other.violations.items():
+            own_counts = self.violations.setdefault(endpoint, {})
+            for error_type, count in counts.items():
+                own_counts[error_type] = (
+                    own_counts.get(error_type, 0) + count
+                )
+        for endpoint, samples in other.samples.items():
+            own_samples = self.samples.setdefault(endpoint, [])
+            own_samples += samples[: ERROR_SAMPLES - len(own_samples)]
+        self.unparsed += other.unparsed
+        self.unparsed_samples += other.unparsed_samples[
+            : ERROR_SAMPLES - len(self.unparsed_samples)
+        ]
+        self.failed += other.failed
+        self.failed_samples += other.failed_samples[
+            : ERROR_SAMPLES - len(self.failed_samples)
+        ]
+        self.timings.merge(other.timings)
+
+    def to_dict(self) -> Dict[str, any]:
+        """Serialize the result."""
+        return {
+            "entries": self.entries,
+            "errors": self.errors,
+            "violations": self.violations,
+            "samples": self.samples,
+            "unparsed": self.unparsed,
+            "unparsed_samples": self.unparsed_samples,
+            "failed": self.failed,
+            "failed_samples": self.failed_samples,
+            "duration": self.duration,
+            "timings": self.timings.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, result: Dict[str, any]) -> "LogValidationResult":
+        """Restore a result serialized by `to_dict`."""
+        return cls(
+            entries=result["entries"],
+            violations=result["violations"],
+            samples=result["samples"],
+            unparsed=result["unparsed"],
+            unparsed_samples=result["unparsed_samples"],
+            failed=result["failed"],
+            failed_samples=result["failed_samples"],
+            duration=result["duration"],
+            timings=Timings.from_dict(result["timings"]),
+        )
+
+    def print_summary(self) -> None:
+        """Print the totals and the counts of each endpoint."""
+        print(
+            colored("Logs: ", "cyan")
+            + f"validated {sum(self.entries.values())} entries in "
+            f"{self.duration:.2f}s, {self.errors} errors, "
+            f"{self.unparsed} unreadable records, {self.failed} "
+            f"records that failed to validate"
+        )
+        self.print_endpoints()
+
+    def print_endpoints(self) -> None:
+        """Print the number of entries and errors of each endpoint."""
+        for endpoint, count in sorted(self.entries.items()):
+            counts = self.violations.get(endpoint, {})
+            print(
+                colored(
+                    f"  {endpoint}: ", "yellow" if counts else "cyan"
+                )
+                + f"{count} entries"
+                + "".join(
+                    f", {error_type}: {error_count}"
+                    for error_type, error_count in sorted(
+                        counts.items()
+                    )
+                )
+            )
+
+
+def validate_exchange(
+    schema: Schema,
+    exchange: RecordedExchange,
+    after_error_occurred: Callable[[ErrorMessage], None],
+    validation_policy: Union[ValidationPolicy, None] = None,
+) -> Union[str, None]:
+    """Validate a request and its response without sending anything.
+
+    The same checks as `prepare_request` and `file_request` are done, as
+    far as the captured data allows: the request is only validated if
+    its headers are known, and only the status code of a response
+    without a body is checked.
+
+    Args:
+        schema: The schema object
+        exchange: The request and the response
+        after_error_occurred: Function to call for each error
+        validation_policy:
+            Only validate some of the items of array responses
+            (described in `README.md`)
+
+    Returns:
+        The endpoint name, or None if the request does not belong to any
+        endpoint of the schema
+    """
+    match = schema.router.match(exchange.method, exchange.request_url)
+    if match is None:
+        after_error_occurred(
+            ErrorMessage(
+                type="unknown_endpoint",
+                title="Unknown Endpoint",
+                error_status=(
+                    f"[{exchange.method.upper()}] "
+                    f"{urlparse.urlparse(exchange.request_url).path} "
+                    f"does not match any endpoint of the schema"
+                ),
+                url=exchange.request_url,
+            )
+        )
+        return None
+
+    endpoint_name = match.endpoint_name
+    # Errors refer to the URL from the log
+    request_url = exchange.request_url
+    method = exchange.method
+
+    if exchange.request_headers is not None:
+        with measure(endpoint_name, method, "prepare"):
+            error = validate_recorded_request(
+                schema, exchange, endpoint_name, match.request_url
+            )
+        if error is not None:
+            after_error_occurred(error)
+
+    response = exchange.response
+    if response.content is None:
+        endpoint_schema = getattr(
+            schema.schema.paths[endpoint_name], method
+        )
+        if response.status_code not in endpoint_schema.responses:
+            after_error_occurred(
+                ErrorMessage(
+                    type="invalid_response",
+                    title="Invalid Response",
+                    error_status=(
+                        f"Response code ({response.status_code}) is "
+                        f"invalid"
+                    ),
+                    url=request_url,
+                )
+            )
+            return endpoint_name
+    else:
+        with measure(endpoint_name, method, "validate_response"):
+            filed_request = validate_response(
+                schema=schema,
+                request_url=request_url,
+                endpoint_name=endpoint_name,
+                method=method,
+                response=response,
+                after_error_occurred=after_error_occurred,
+                validation_policy=validation_policy,
+            )
+        if filed_request.type != "success":
+            return endpoint_name
+
+    if response.elapsed is not None:
+        error = validate_latency(
+            schema=schema,
+            request_url=request_url,
+            endpoint_name=endpoint_name,
+            method=method,
+            elapsed=response.elapsed,
+        )
+        if error is not None:
+            after_error_occurred(error)
+    return endpoint_name
+
+
+def validate_recorded_request(
+    schema: Schema,
+    exchange: RecordedExchange,
+    endpoint_name: str,
+    server_url: str,
+) -> Union[ErrorMessage, None]:
+    """Do the checks of `prepare_request` on a captured request.
+
+    Args:
+        schema: The schema object
+        exchange: The request, with its headers
+        endpoint_name: The endpoint the request belongs to
+        server_url:
+            The URL of the request, moved to a server of the schema (see
+            `PathRouter.match`). The request is validated as if it was
+            sent there
+
+    Returns:
+        The first error, or None if the request is valid
+    """
+    headers = exchange.request_headers
+    content_type = next(
+        (
+            value
+            for name, value in headers.items()
+            if name.lower() == "content-type"
+        ),
+        "",
+    )
+    request_body = exchange.request_body.decode(errors="replace")
+    error = validate_request_body(
+        schema=schema,
+        request_url=exchange.request_url,
+        endpoint_name=endpoint_name,
+        method=exchange.method,
+        body=(content_type, request_body) if request_body else None,
+    )
+    if error is not None:
+        return error
+
+    parsed_url = urlparse.urlparse(server_url)
+    request = Request(
+        method=exchange.method,
+        url=server_url.split("?")[0],
+        params=parse_qs(parsed_url.query),
+        data=request_body,
+        headers=headers,
+    )
+    with measure(endpoint_name, exchange.method, "validate_url"):
+        return validate_request_url(
+            schema=schema,
+            request_url=exchange.request_url,
+            openapi_request=RequestsOpenAPIRequest(request),
+        )
+
+
+def validate_records(
+    schema: Schema,
+    records: List[any],
+    log_format: str,
+    validation_policy: Union[ValidationPolicy, None] = None,
+) -> LogValidationResult:
+    """Validate a batch of raw log records.
+
+    Args:
+        schema: The schema object
+        records: Records returned by `read_log_records`
+        log_format: Format of the records
+        validation_policy:
+            Only validate some of the items of array responses
+            (described in `README.md`)
+
+    Returns:
+        The counts for the batch
+    """
+    result = LogValidationResult()
+    errors: List[ErrorMessage] = []
+    with instrument(result.timings):
+        for record in records:
+            try:
+                exchange = parse_log_record(record, log_format)
+            except Exception as error:
+                result.add_unparsed(str(error))
+                continue
+
+            errors.clear()
+            try:
+                endpoint_name = validate_exchange(
+                    schema=schema,
+                    exchange=exchange,
+                    after_error_occurred=errors.append,
+                    validation_policy=validation_policy,
+                )
+            except Exception as error:
+                result.add_failed(
+                    f"[{exchange.method.upper()}] "
+                    f"{exchange.request_url}: {error!r}"
+                )
+                continue
+            endpoint = (
+                UNMATCHED
+                if endpoint_name is None
+                else f"{exchange.method.upper()} {endpoint_name}"
+            )
+            result.add_entry(endpoint)
+            for error in errors:
+                result.add_error(endpoint, error)
+    return result
+
+
+# The state of a worker process (see `_initialize_worker`)
+_worker_schema: Union[Schema, None] = None
+_worker_validation_policy: Union[ValidationPolicy, None] = None
+
+
+def _initialize_worker(
+    schema_location: str,
+    cache_directory: Union[str, None],
+    validation_policy: Union[ValidationPolicy, None],
+) -> None:
+    global _worker_schema, _worker_validation_policy
+    _worker_schema = load_schema(schema_location, cache_directory)
+    _worker_validation_policy = validation_policy
+
+
+def _validate_batch(records: List[any], log_format: str) -> Dict:
+    return validate_records(
+        _worker_schema, records, log_format, _worker_validation_policy
+    ).to_dict()
+
+
+def _batches(paths: List[str], log_format: Union[str, None], size: int):
+    """Split the records of the files into same-format batches."""
+    for path in paths:
+        path_format = log_format or detect_log_format(path)
+        batch = []
+        for record in read_log_records(path, path_format):
+            batch.append(record)
+            if len(batch) == size:
+                yield batch, path_format
+                batch = []
+        if batch:
+            yield batch, path_format
+
+
+def validate_logs(
+    schema_location: str,
+    paths: List[str],
+    log_format: Union[str, None] = None,
+    processes: Union[int, None] = None,
+    batch_size: int = 1000,
+    cache_directory: Union[str, None] = None,
+    validation_policy: Union[ValidationPolicy, None] = None,
+) -> LogValidationResult:
+    """Validate the requests and responses in log files.
+
+    The files are read in this process, and batches of records are
+    parsed and validated in a pool of processes. Only a few batches are
+    queued at a time, so memory use does not depend on the size of the
+    files.
+
+    Args:
+        schema_location: Location of the schema (see `load_schema`)
+        paths: Locations of the log files
+        log_format:
+            Format of the files (see
+            `open_api_tools.common.traffic_logs`). Default: guessed from
+            the extension of each file
+        processes: Number of processes. Default: number of CPUs
+        batch_size: Number of records sent to a process at once
+        cache_directory: Schema cache directory (see `load_schema`)
+        validation_policy:
+            Only validate some of the items of array responses
+            (described in `README.md`)
+
+    Returns:
+        The number of entries and errors of each endpoint
+    """
+    if processes is None:
+        processes = os.cpu_count() or 1
+    if batch_size < 1:
+        raise Exception("Batch size must be positive")
+
+    result = LogValidationResult()
+    start = time.perf_counter()
+    with ProcessPoolExecutor(
+        max_workers=processes,
+        initializer=_initialize_worker,
+        initargs=(schema_location, cache_directory, validation_policy),
+    ) as executor:
+        pending = set()
+        for batch, batch_format in _batches(
+            paths, log_format, batch_size
+        ):
+            # Don't read further ahead than the processes can handle
+            if len(pending) >= processes * 2:
+                done, pending = wait(
+                    pending, return_when=FIRST_COMPLETED
+                )
+                for future in done:
+                    result.merge(
+                        LogValidationResult.from_dict(future.result())
+                    )
+            pending.add(
+                executor.submit(_validate_batch, batch, batch_format)
+            )
+        for future in pending:
+            result.merge(LogValidationResult.from_dict(future.result()))
+
+    result.duration = time.perf_counter() - start
+    result.print_summary()
+    return result
@@ -2,20 +2,41 @@
 """A validator for request/response objects powered by OpenAPI schema."""
 
 import json
+import time
 import urllib.parse as urlparse
-from typing import Callable, Dict, Tuple, Union
+from typing import Callable, Dict, List, Tuple, Union
 from dataclasses import dataclass
 from urllib.parse import parse_qs
+import httpx
 from openapi_core.contrib.requests import (
     RequestsOpenAPIRequest,
 )
 from openapi_core.validation.request.validators import RequestValidator
 from requests import Request, Session
 
+from open_api_tools.common.instrumentation import measure
 from open_api_tools.common.load_schema import Schema
-from open_api_tools.common.transform_schema import validate_object
+from open_api_tools.common.sessions import (
+    create_async_client,
+    default_sessions,
+)
+from open_api_tools.common.transform_schema import (
+    validate_content,
+    validate_content_sample,
+    validate_content_stream,
+)
+from open_api_tools.common.validation_policy import ValidationPolicy
+from open_api_tools.common.validator_registry import (
+    get_item_validator,
+    get_validator,
+)
 
-session = Session()
+# Size of the chunks a streamed response is read in, in bytes
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Operation extensions that define latency budgets, in milliseconds
+MAX_LATENCY_EXTENSION = "x-max-latency-ms"
+P95_LATENCY_EXTENSION = "x-p95-latency-ms"
 
 
 @dataclass
@@ -27,6 +48,9 @@ class ErrorMessage:
     error_status: str
     url: str
     extra: Dict = None
+    # Time it took to send the request and receive the response, in
+    # seconds. None if no response was received
+    elapsed: Union[float, None] = None
 
 
 @dataclass
@@ -38,16 +62,44 @@ class PreparedRequest:
     openapi_request: object
 
 
-def prepare_request(
+class RequestUrlValidator(RequestValidator):
+    """Validate the request path, query, headers and security.
+
+    The request body is validated separately by `validate_request_body`,
+    using the compiled validators from the validator registry.
+    """
+
+    def _get_body(self, request, operation):
+        return None, []
+
+
+def get_request_validator(schema: Schema) -> RequestUrlValidator:
+    """Get the request URL validator for a schema.
+
+    The validator does not keep any state between requests, so a single
+    instance is shared by all threads.
+
+    Args:
+        schema (Schema): OpenAPI schema
+
+    Returns:
+        The validator
+    """
+    if schema.request_validator is None:
+        schema.request_validator = RequestUrlValidator(
+            schema.open_api_core
+        )
+    return schema.request_validator
+
+
+def validate_request_body(
     schema: Schema,
     request_url: str,
     endpoint_name: str,
     method: str,
     body: Union[Tuple[str, str], None],
-    after_error_occurred: Callable[[ErrorMessage], None] = None,
-    before_request_send: Union[Callable[[any], any], None] = None,
-) -> Union[PreparedRequest, ErrorMessage]:
-    """Prepare request and validate the request URL.
+) -> Union[ErrorMessage, None]:
+    """Validate the request body against the endpoint's schema.
 
     Args:
         schema (Schema): OpenAPI schema
@@ -55,105 +107,91 @@ def prepare_request(
         endpoint_name (str): endpoint name
         method (str): HTTP method name
         body: payload to send along with the request
-        after_error_occurred: function to call in case of an error
-        before_request_send: A pre-hook that allows to amend the request object
 
     Returns:
-        object: Prepared request or error message
+        Error message or None if the body is valid
     """
-
-    if after_error_occurred is None:
-        after_error_occurred = lambda _error: None
-
-    if before_request_send is None:
-        before_request_send = lambda request: request
-
-    request_validator = RequestValidator(schema.open_api_core)
-    parsed_url = urlparse.urlparse(request_url)
-    base_url = request_url.split("?")[0]
-    query_params_dict = parse_qs(parsed_url.query)
-
     if body is None:
-        headers = {}
         mime_type = ""
         request_body = ""
     else:
         mime_type, request_body = body
-        headers = {"Content-type": mime_type}
 
-    endpoint_schema = getattr(
+    request_body_schema = getattr(
         schema.schema.paths[endpoint_name], method
-    )
-    request_body_schema = endpoint_schema.requestBody
-    endpoint_schema.requestBody = None
-
-    if request_body_schema is not None:
-        if request_body_schema.required and request_body == "":
-            error_response = ErrorMessage(
-                type="invalid_request",
-                title="Invalid Request",
-                error_status=("Required requestBody is missing"),
-                url=request_url,
-                extra={"body": body, "mime_type": mime_type},
-            )
-            after_error_occurred(error_response)
-            return error_response
+    ).requestBody
+
+    if request_body_schema is None:
+        return None
+
+    if request_body_schema.required and request_body == "":
+        return ErrorMessage(
+            type="invalid_request",
+            title="Invalid Request",
+            error_status=("Required requestBody is missing"),
+            url=request_url,
+            extra={"body": body, "mime_type": mime_type},
+        )
 
-        accepted_content_types = list(
-            request_body_schema.content.raw_element.keys()
+    accepted_content_types = list(
+        request_body_schema.content.raw_element.keys()
+    )
+    if mime_type not in accepted_content_types:
+        return ErrorMessage(
+            type="invalid_request",
+            title="Invalid Request",
+            error_status=(
+                f"Request body's content type "
+                f"({mime_type}) is not in "
+                f"the list of accepted content types "
+                f"({accepted_content_types})"
+            ),
+            url=request_url,
+            extra={"body": body, "mime_type": mime_type},
         )
-        if mime_type not in accepted_content_types:
-            error_response = ErrorMessage(
-                type="invalid_request",
-                title="Invalid Request",
-                error_status=(
-                    f"Request body's content type "
-                    f"({mime_type}) is not in "
-                    f"the list of accepted content types "
-                    f"({accepted_content_types})"
-                ),
-                url=request_url,
-                extra={"body": body, "mime_type": mime_type},
-            )
-            after_error_occurred(error_response)
-            return error_response
 
-        try:
-            validate_object(
-                getattr(
-                    request_body_schema.content.raw_element, mime_type
-                ).schema,
-                schema.schema.components.raw_element,
-                headers,
+    try:
+        with measure(endpoint_name, method, "validate_request_body"):
+            validate_content(
+                get_validator(
+                    schema, endpoint_name, method, None, mime_type
+                ),
+                request_body,
                 mime_type,
             )
-        except Exception as error:
-            error_response = ErrorMessage(
-                type="invalid_request",
-                title="Invalid Request",
-                error_status=str(error),
-                url=request_url,
-                extra={"error_object": json.dumps(error, default=str)},
-            )
-            after_error_occurred(error_response)
-            return error_response
+    except Exception as error:
+        return ErrorMessage(
+            type="invalid_request",
+            title="Invalid Request",
+            error_status=str(error),
+            url=request_url,
+            extra={"error_object": json.dumps(error, default=str)},
+        )
 
-    request = Request(
-        method=method,
-        url=base_url,
-        params=query_params_dict,
-        data=request_body,
-        headers=headers,
+    return None
+
+
+def validate_request_url(
+    schema: Schema,
+    request_url: str,
+    openapi_request,
+) -> Union[ErrorMessage, None]:
+    """Validate everything about the request, except for the body.
+
+    Args:
+        schema (Schema): OpenAPI schema
+        request_url (str): request URL
+        openapi_request: openapi request object
+
+    Returns:
+        Error message or None if the request is valid
+    """
+    request_url_validator = get_request_validator(schema).validate(
+        openapi_request
     )
-    if before_request_send:
-        request = before_request_send(request)
-    openapi_request = RequestsOpenAPIRequest(request)
-    request_url_validator = request_validator.validate(openapi_request)
-    endpoint_schema.requestBody = request_body_schema
 
     if request_url_validator.errors:
-        error_message = request_url_validator.errors
-        error_response = ErrorMessage(
+        return ErrorMessage(
             type="invalid_request",
             title="Invalid Request",
             error_status=(
@@ -161,17 +199,92 @@ def prepare_request(
             ),
             url=request_url,
             extra={
-                "text": error_message,
+                "text": request_url_validator.errors,
             },
         )
-        after_error_occurred(error_response)
-        return error_response
 
-    return PreparedRequest(
-        type="success",
-        request=request,
-        openapi_request=openapi_request,
-    )
+    return None
+
+
+def prepare_request(
+    schema: Schema,
+    request_url: str,
+    endpoint_name: str,
+    method: str,
+    body: Union[Tuple[str, str], None],
+    after_error_occurred: Callable[[ErrorMessage], None] = None,
+    before_request_send: Union[Callable[[any], any], None] = None,
+) -> Union[PreparedRequest, ErrorMessage]:
+    """Prepare request and validate the request URL.
+
+    The schema is not modified, so requests can be prepared from several
+    threads at once.
+
+    Args:
+        schema (Schema): OpenAPI schema
+        request_url (str): request URL
+        endpoint_name (str): endpoint name
+        method (str): HTTP method name
+        body: payload to send along with the request
+        after_error_occurred: function to call in case of an error
+        before_request_send: A pre-hook that allows to amend the request object
+
+    Returns:
+        object: Prepared request or error message
+    """
+
+    if after_error_occurred is None:
+        after_error_occurred = lambda _error: None
+
+    with measure(endpoint_name, method, "prepare"):
+        error_response = validate_request_body(
+            schema=schema,
+            request_url=request_url,
+            endpoint_name=endpoint_name,
+            method=method,
+            body=body,
+        )
+        if error_response is not None:
+            after_error_occurred(error_response)
+            return error_response
+
+        parsed_url = urlparse.urlparse(request_url)
+        base_url = request_url.split("?")[0]
+        query_params_dict = parse_qs(parsed_url.query)
+
+        if body is None:
+            headers = {}
+            request_body = ""
+        else:
+            mime_type, request_body = body
+            headers = {"Content-type": mime_type}
+
+        request = Request(
+            method=method,
+            url=base_url,
+            params=query_params_dict,
+            data=request_body,
+            headers=headers,
+        )
+        if before_request_send:
+            request = before_request_send(request)
+        openapi_request = RequestsOpenAPIRequest(request)
+
+        with measure(endpoint_name, method, "validate_url"):
+            error_response = validate_request_url(
+                schema=schema,
+                request_url=request_url,
+                openapi_request=openapi_request,
+            )
+        if error_response is not None:
+            after_error_occurred(error_response)
+            return error_response
+
+        return PreparedRequest(
+            type="success",
+            request=request,
+            openapi_request=openapi_request,
+        )
 
 
 @dataclass
@@ -180,6 +293,12 @@ class FiledRequest:
 
     type: str
     response: object
+    # Time it took to send the request and receive the response, in
+    # seconds
+    elapsed: Union[float, None] = None
+    # Indices of the array items that were validated, when only some of
+    # them were (see `ValidationPolicy`)
+    checked_items: Union[List[int], None] = None
 
 
 def file_request(
@@ -188,6 +307,9 @@ def file_request(
     endpoint_name: str,
     request,
     after_error_occurred: Callable[[ErrorMessage], None] = None,
+    stream: bool = False,
+    validation_policy: Union[ValidationPolicy, None] = None,
+    session: Union[Session, None] = None,
 ) -> Union[ErrorMessage, FiledRequest]:
     """
     Send a prepared request and validate the response.
@@ -199,19 +321,110 @@ def file_request(
         request: request object
         openapi_request: openapi request object
         after_error_occurred: function to call in case of an error
+        stream (bool):
+            Validate the items of a JSON array response as they are
+            received, instead of loading the whole response first.
+            The content of the response is not kept
+        validation_policy:
+            Only validate some of the items of a JSON array response
+            (described in `README.md`)
+        session:
+            The session to send the request with. By default, a shared
+            session for the server of `request_url` is used (described
+            in `README.md`)
+
+    Returns:
+        Request response or error message
+    """
+
+    if session is None:
+        session = default_sessions.get(request_url)
+
+    # Apply the session's headers
+    prepared_request = session.prepare_request(request)
+    start = time.perf_counter()
+    with measure(endpoint_name, request.method, "send"):
+        response = session.send(prepared_request, stream=stream)
+    elapsed = time.perf_counter() - start
+
+    # A streamed response's body is not kept, so it can't be recorded
+    if schema.traffic_recorder is not None and not stream:
+        schema.traffic_recorder.record(
+            endpoint_name=endpoint_name,
+            method=request.method,
+            request_url=request_url,
+            request=prepared_request,
+            response=response,
+            elapsed=elapsed,
+        )
+
+    try:
+        with measure(
+            endpoint_name, request.method, "validate_response"
+        ):
+            filed_request = validate_response(
+                schema=schema,
+                request_url=request_url,
+                endpoint_name=endpoint_name,
+                method=request.method,
+                response=response,
+                after_error_occurred=after_error_occurred,
+                stream=stream,
+                validation_policy=validation_policy,
+            )
+    finally:
+        if stream:
+            response.close()
+
+    return _check_latency(
+        schema=schema,
+        request_url=request_url,
+        endpoint_name=endpoint_name,
+        method=request.method,
+        filed_request=filed_request,
+        elapsed=elapsed,
+        after_error_occurred=after_error_occurred,
+    )
+
+
+def validate_response(
+    schema: Schema,
+    request_url: str,
+    endpoint_name: str,
+    method: str,
+    response,
+    after_error_occurred: Callable[[ErrorMessage], None] = None,
+    stream: bool = False,
+    validation_policy: Union[ValidationPolicy, None] = None,
+) -> Union[ErrorMessage, FiledRequest]:
+    """
+    Validate a response that was already received.
+
+    Args:
+        schema (Schema): OpenAPI schema
+        request_url (str): request url
+        endpoint_name (str): endpoint name
+        method (str): HTTP method name
+        response:
+            `requests` or `httpx` response object
+        after_error_occurred: function to call in case of an error
+        stream (bool):
+            Read the body of a `requests` response sent with
+            `stream=True` in chunks, validating the items of a JSON
+            array one at a time. Other content is read in full
+        validation_policy:
+            Only validate some of the items of a JSON array response
+            (described in `README.md`)
 
     Returns:
         Request response or error message
     """
 
-    method = request.method.lower()
+    method = method.lower()
 
     if after_error_occurred is None:
         after_error_occurred = lambda _error: None
 
-    prepared_request = request.prepare()
-    response = session.send(prepared_request)
-
     # make sure that the server did not return an error
     endpoint_schema = getattr(
         schema.schema.paths[endpoint_name], method
@@ -235,7 +448,10 @@ def file_request(
     if response_code == 204:
         return FiledRequest(type="success", response=response)
 
-    elif not hasattr(response_schema, "content"):
+    elif not getattr(response_schema, "content", None):
+        # A response without a body doesn't need a schema
+        if not response.content:
+            return FiledRequest(type="success", response=response)
         error_response = ErrorMessage(
             type="invalid_response",
             title="Invalid Response",
@@ -250,7 +466,20 @@ def file_request(
 
     response_types = list(response_schema.content.keys())
 
-    content_type = response.headers["Content-Type"]
+    content_type = response.headers.get("Content-Type")
+
+    if content_type is None:
+        error_response = ErrorMessage(
+            type="invalid_response",
+            title="Invalid Response",
+            error_status=(
+                f"The response has no content type (expected one of "
+                f"{', '.join(response_types)})."
+            ),
+            url=request_url,
+        )
+        after_error_occurred(error_response)
+        return error_response
 
     if content_type not in response_types:
         error_response = ErrorMessage(
@@ -271,17 +500,57 @@ def file_request(
         after_error_occurred(error_response)
         return error_response
 
+    item_validator = (
+        get_item_validator(
+            schema, endpoint_name, method, response_code, content_type
+        )
+        if stream or validation_policy is not None
+        else None
+    )
+
     # Use JSON Schema to validate a JSON response
-    openapi_response_schema = response_schema.content[
-        content_type
-    ].raw_element["schema"]
+    checked_items = None
     try:
-        validate_object(
-            openapi_response_schema,
-            schema.schema.components.raw_element,
-            response.content,
-            content_type,
-        )
+        with measure(endpoint_name, method, "validate_response_body"):
+            validator = get_validator(
+                schema,
+                endpoint_name,
+                method,
+                response_code,
+                content_type,
+            )
+            validation_cache = schema.validation_cache
+            if item_validator is None and (
+                validation_cache is None or validator is None
+            ):
+                validate_content(
+                    validator, response.content, content_type
+                )
+            elif item_validator is None:
+                validation_cache.validate(
+                    (
+                        endpoint_name,
+                        method,
+                        response_code,
+                        content_type,
+                    ),
+                    validator,
+                    response.content,
+                    content_type,
+                )
+            elif stream:
+                checked_items = validate_content_stream(
+                    *item_validator,
+                    response.iter_content(STREAM_CHUNK_SIZE),
+                    validation_policy=validation_policy,
+                )
+            else:
+                checked_items = validate_content_sample(
+                    validator,
+                    *item_validator,
+                    response.content,
+                    validation_policy=validation_policy,
+                )
     except Exception as error:
         error_response = ErrorMessage(
             type="invalid_response",
@@ -292,13 +561,111 @@ def file_request(
             extra={
                 "error": json.dumps(error, indent=4, default=str),
                 "response": json.dumps(response, indent=4, default=str),
-                "response_content": response.content,
+                # A streamed response is not kept in memory
+                "response_content": (
+                    None if stream else response.content
+                ),
             },
         )
         after_error_occurred(error_response)
         return error_response
 
-    return FiledRequest(type="success", response=response)
+    return FiledRequest(
+        type="success", response=response, checked_items=checked_items
+    )
+
+
+def get_latency_budget(
+    schema: Schema,
+    endpoint_name: str,
+    method: str,
+    extension: str,
+) -> Union[float, None]:
+    """Read a latency budget from the operation's extensions.
+
+    Args:
+        schema (Schema): OpenAPI schema
+        endpoint_name (str): endpoint name
+        method (str): HTTP method name
+        extension (str):
+            `MAX_LATENCY_EXTENSION` or `P95_LATENCY_EXTENSION`
+
+    Returns:
+        The budget in milliseconds or None if the operation has none
+    """
+    budget = getattr(
+        schema.schema.paths[endpoint_name], method.lower()
+    ).raw_element.get(extension)
+    return None if budget is None else float(budget)
+
+
+def validate_latency(
+    schema: Schema,
+    request_url: str,
+    endpoint_name: str,
+    method: str,
+    elapsed: float,
+) -> Union[ErrorMessage, None]:
+    """Check the response time against the `x-max-latency-ms` budget.
+
+    Args:
+        schema (Schema): OpenAPI schema
+        request_url (str): request url
+        endpoint_name (str): endpoint name
+        method (str): HTTP method name
+        elapsed (float): response time in seconds
+
+    Returns:
+        Error message or None if the response was fast enough
+    """
+    budget = get_latency_budget(
+        schema, endpoint_name, method, MAX_LATENCY_EXTENSION
+    )
+    elapsed_ms = elapsed * 1000
+    if budget is None or elapsed_ms <= budget:
+        return None
+
+    return ErrorMessage(
+        type="latency_budget_exceeded",
+        title="Latency Budget Exceeded",
+        error_status=(
+            f"Response took {elapsed_ms:.1f}ms, which is over the "
+            f"{budget:g}ms budget ({MAX_LATENCY_EXTENSION})"
+        ),
+        url=request_url,
+        extra={"elapsed_ms": elapsed_ms, "budget_ms": budget},
+    )
+
+
+def _check_latency(
+    schema: Schema,
+    request_url: str,
+    endpoint_name: str,
+    method: str,
+    filed_request: Union[ErrorMessage, FiledRequest],
+    elapsed: float,
+    after_error_occurred: Callable[[ErrorMessage], None],
+) -> Union[ErrorMessage, FiledRequest]:
+    """Turn a valid but slow response into an error."""
+    # Failed responses count towards the latency percentiles too
+    filed_request.elapsed = elapsed
+    if filed_request.type != "success":
+        return filed_request
+
+    error_response = validate_latency(
+        schema=schema,
+        request_url=request_url,
+        endpoint_name=endpoint_name,
+        method=method,
+        elapsed=elapsed,
+    )
+    if error_response is None:
+        return filed_request
+    error_response.elapsed = elapsed
+
+    if after_error_occurred is not None:
+        after_error_occurred(error_response)
+    return error_response
 
 
 def make_request(
@@ -309,6 +676,9 @@ def make_request(
     body: Union[Tuple[str, str], None],
     after_error_occurred: Callable[[ErrorMessage], None] = None,
     before_request_send: Union[Callable[[any], any], None] = None,
+    stream: bool = False,
+    validation_policy: Union[ValidationPolicy, None] = None,
+    session: Union[Session, None] = None,
 ):
     """
     Combine `prepared_request` and `file_request`.
@@ -324,6 +694,9 @@ def make_request(
         body (Union[Dict, None]: payload to send along with the request
         after_error_occurred: function to call in case of an error
         before_request_send: A pre-hook that allows to amend the request object
+        stream (bool): validate the response as it is received
+        validation_policy: which items of an array response to validate
+        session: The session to send the request with
 
     Returns:
         Request response or error message
@@ -348,4 +721,187 @@ def make_request(
         endpoint_name=endpoint_name,
         request_url=request_url,
         after_error_occurred=after_error_occurred,
+        stream=stream,
+        validation_policy=validation_policy,
+        session=session,
+    )
+
+
+async def async_prepare_request(
+    schema: Schema,
+    request_url: str,
+    endpoint_name: str,
+    method: str,
+    body: Union[Tuple[str, str], None],
+    after_error_occurred: Callable[[ErrorMessage], None] = None,
+    before_request_send: Union[Callable[[any], any], None] = None,
+) -> Union[PreparedRequest, ErrorMessage]:
+    """Asynchronous version of `prepare_request`.
+
+    Preparing a request does not do any I/O, so this is provided for
+    symmetry with the other async functions.
+
+    Args:
+        schema (Schema): OpenAPI schema
+        request_url (str): request URL
+        endpoint_name (str): endpoint name
+        method (str): HTTP method name
+        body: payload to send along with the request
+        after_error_occurred: function to call in case of an error
+        before_request_send:
+            A pre-hook that allows to amend the request object
+
+    Returns:
+        object: Prepared request or error message
+    """
+    return prepare_request(
+        schema=schema,
+        request_url=request_url,
+        endpoint_name=endpoint_name,
+        method=method,
+        body=body,
+        after_error_occurred=after_error_occurred,
+        before_request_send=before_request_send,
+    )
+
+
+async def async_file_request(
+    schema: Schema,
+    request_url: str,
+    endpoint_name: str,
+    request,
+    after_error_occurred: Callable[[ErrorMessage], None] = None,
+    client: Union[httpx.AsyncClient, None] = None,
+    validation_policy: Union[ValidationPolicy, None] = None,
+) -> Union[ErrorMessage, FiledRequest]:
+    """
+    Asynchronous version of `file_request`.
+
+    The response in the returned `FiledRequest` is an `httpx.Response`,
+    which has the same commonly used attributes as a `requests`
+    response.
+
+    Args:
+        schema (Schema): OpenAPI schema
+        request_url (str): request url
+        endpoint_name (str): endpoint name
+        request: request object
+        after_error_occurred: function to call in case of an error
+        client:
+            The client to send the request with. Reuse the same client
+            for many requests to benefit from connection pooling.
+            By default, a new client is created for this request
+        validation_policy:
+            Only validate some of the items of a JSON array response
+
+    Returns:
+        Request response or error message
+    """
+
+    if client is None:
+        async with create_async_client() as client:
+            return await async_file_request(
+                schema=schema,
+                request_url=request_url,
+                endpoint_name=endpoint_name,
+                request=request,
+                after_error_occurred=after_error_occurred,
+                client=client,
+                validation_policy=validation_policy,
+            )
+
+    prepared_request = request.prepare()
+    start = time.perf_counter()
+    with measure(endpoint_name, request.method, "send"):
+        response = await client.request(
+            prepared_request.method,
+            prepared_request.url,
+            content=prepared_request.body,
+            headers=dict(prepared_request.headers),
+        )
+    elapsed = time.perf_counter() - start
+
+    if schema.traffic_recorder is not None:
+        schema.traffic_recorder.record(
+            endpoint_name=endpoint_name,
+            method=request.method,
+            request_url=request_url,
+            request=prepared_request,
+            response=response,
+            elapsed=elapsed,
+        )
+
+    with measure(endpoint_name, request.method, "validate_response"):
+        filed_request = validate_response(
+            schema=schema,
+            request_url=request_url,
+            endpoint_name=endpoint_name,
+            method=request.method,
+            response=response,
+            after_error_occurred=after_error_occurred,
+            validation_policy=validation_policy,
+        )
+
+    return _check_latency(
+        schema=schema,
+        request_url=request_url,
+        endpoint_name=endpoint_name,
+        method=request.method,
+        filed_request=filed_request,
+        elapsed=elapsed,
+        after_error_occurred=after_error_occurred,
+    )
+
+
+async def async_make_request(
+    schema: Schema,
+    request_url: str,
+    endpoint_name: str,
+    method: str,
+    body: Union[Tuple[str, str], None],
+    after_error_occurred: Callable[[ErrorMessage], None] = None,
+    before_request_send: Union[Callable[[any], any], None] = None,
+    client: Union[httpx.AsyncClient, None] = None,
+    validation_policy: Union[ValidationPolicy, None] = None,
+):
+    """
+    Asynchronous version of `make_request`.
+
+    Args:
+        schema (Schema): OpenAPI schema
+        request_url (str): full request url
+        endpoint_name (str): endpoint name
+        method (str): HTTP method name
+        body (Union[Dict, None]: payload to send along with the request
+        after_error_occurred: function to call in case of an error
+        before_request_send:
+            A pre-hook that allows to amend the request object
+        client: The client to send the request with
+        validation_policy: which items of an array response to validate
+
+    Returns:
+        Request response or error message
+    """
+
+    response = await async_prepare_request(
+        schema=schema,
+        request_url=request_url,
+        endpoint_name=endpoint_name,
+        method=method,
+        body=body,
+        after_error_occurred=after_error_occurred,
+        before_request_send=before_request_send,
+    )
+
+    if response.type != "success":
+        return response
+
+    return await async_file_request(
+        schema=schema,
+        request=response.request,
+        endpoint_name=endpoint_name,
+        request_url=request_url,
+        after_error_occurred=after_error_occurred,
+        client=client,
+        validation_policy=validation_policy,
     )
@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+"""Tests for running chains as dependency graphs."""
+
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+from urllib.parse import urlparse
+
+from open_api_tools.common.load_schema import load_schema
+from open_api_tools.test.chain import (
+    Request,
+    Validate,
+    _build_graph,
+    chain,
+)
+
+SCHEMA = {
+    "openapi": "3.0.0",
+    "info": {"title": "Chain", "version": "1.0.0"},
+    "servers": [{"url": "http://localhost/api"}],
+    "paths": {
+        "/items/": {
+            "get": {
+                "parameters": [
+                    {
+                        "name": "limit",
+                        "in": "query",
+                        "required": False,
+                        "schema": {"type": "integer", "default": 10},
+                        "examples": {"one": {"value": 1}},
+                    }
+                ],
+                "responses": {"200": {"description": "Items"}},
+            }
+        },
+        "/items/{item_id}/": {
+            "get": {
+                "parameters": [
+                    {
+                        "name": "item_id",
+                        "in": "path",
+                        "required": True,
+                        "schema": {"type": "integer"},
+                        "examples": {"one": {"value": 1}},
+                    }
+                ],
+                "responses": {"200": {"description": "An item"}},
+            }
+        },
+    },
+}
+
+
+class FakeResponse:
+    """The part of a `requests` response that the tests use."""
+
+    def __init__(self, content):
+        self.content = content
+
+    def json(self):
+        return self.content
+
+
+def fake_make_request(request_url, **_kwargs):
+    """Answer with the IDs of two items, or with the requested item."""
+    item_id = urlparse(request_url).path.rstrip("/").rsplit("/", 1)[-1]
+    content = (
+        [{"id": 7}, {"id": 8}]
+        if not item_id.isdigit()
+        else {"id": int(item_id)}
+    )
+    return SimpleNamespace(
+        type="success", response=FakeResponse(content)
+    )
+
+
+class GraphChainTest(unittest.TestCase):
+    def setUp(self):
+        self.schema = load_schema(SCHEMA)
+        patcher = mock.patch(
+            "open_api_tools.test.chain.make_request",
+            side_effect=fake_make_request,
+        )
+        self.make_request = patcher.start()
+        self.addCleanup(patcher.stop)
+        print_patcher = mock.patch("builtins.print")
+        print_patcher.start()
+        self.addCleanup(print_patcher.stop)
+
+    def sent_urls(self):
+        return sorted(
+            call.kwargs["request_url"]
+            for call in self.make_request.call_args_list
+        )
+
+    def test_sequential_parameters_function(self):
+        # A function that asks for no named responses gets the previous
+        # response and parameter values, like in a sequential chain
+        calls = []
+
+        def item_parameters(parameters, response, request):
+            calls.append(request)
+            return {"item_id": response.json()[0]["id"]}
+
+        chain(
+            self.schema,
+            [
+                Request("GET", "/items/", {"limit": 1}, name="list"),
+                Request("GET", "/items/{item_id}/", item_parameters),
+            ],
+        )
+
+        self.assertEqual(calls, [{"limit": 1}])
+        self.assertEqual(
+            self.sent_urls(),
+            [
+                "http://localhost/api/items/7/?",
+                "http://localhost/api/items/?limit=1&",
+            ],
+        )
+
+    def test_named_responses(self):
+        # A function gets the responses of the requests it names
+        chain(
+            self.schema,
+            [
+                Request("GET", "/items/", {"limit": 1}, name="list"),
+                Request(
+                    "GET",
+                    "/items/{item_id}/",
+                    lambda parameters, list: {
+                        "item_id": list.json()[1]["id"]
+                    },
+                    name="second",
+                ),
+                Validate(lambda response: response.json()["id"] == 8),
+                Request(
+                    "GET",
+                    "/items/{item_id}/",
+                    lambda parameters, list, second: {
+                        "item_id": list.json()[0]["id"]
+                        + second.json()["id"]
+                    },
+                ),
+            ],
+        )
+
+        self.assertEqual(
+            self.sent_urls(),
+            [
+                "http://localhost/api/items/15/?",
+                "http://localhost/api/items/8/?",
+                "http://localhost/api/items/?limit=1&",
+            ],
+        )
+
+    def test_sequential_argument_names_are_not_dependencies(self):
+        steps = _build_graph(
+            [
+                Request("GET", "/items/", {}, name="first"),
+                Request("GET", "/items/", {}, name="response"),
+                Request(
+                    "GET",
+                    "/items/{item_id}/",
+                    lambda parameters, response, request: {},
+                ),
+            ]
+        )
+
+        self.assertEqual(steps[2].arguments, {})
+        self.assertEqual(steps[2].previous, 1)
+        self.assertEqual(steps[2].dependencies, [1])
+
+    def test_parameters_function_without_signature(self):
+        # `dict` has no signature that `inspect` can read
+        steps = _build_graph(
+            [
+                Request("GET", "/items/", {}, name="first"),
+                Request("GET", "/items/", dict),
+            ]
+        )
+
+        self.assertEqual(steps[1].arguments, {})
+        self.assertEqual(steps[1].previous, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+"""Tests for covering arrays of parameter values."""
+
+import inspect
+import itertools
+import random
+import unittest
+
+from open_api_tools.common.load_schema import load_schema
+from open_api_tools.test.covering_array import generate_covering_array
+from open_api_tools.test.full_test import async_full_test, full_test
+from open_api_tools.test.test_endpoint import generate_endpoint_test
+from open_api_tools.test.utils import distinct_values
+
+SCHEMA = {
+    "openapi": "3.0.0",
+    "info": {"title": "Covering", "version": "1.0.0"},
+    "servers": [{"url": "http://localhost/api"}],
+    "paths": {
+        "/items/": {
+            "get": {
+                "parameters": [
+                    {
+                        "name": name,
+                        "in": "query",
+                        "required": True,
+                        "schema": {"type": "string"},
+                        "examples": {
+                            "a": {"value": "a"},
+                            "b": {"value": "b"},
+                            "again": {"value": "a"},
+                        },
+                    }
+                    for name in ("first", "second", "third")
+                ],
+                "responses": {200: {"description": "Items"}},
+            }
+        },
+    },
+}
+
+
+def uncovered(radices, strength, rows):
+    """The interactions of `strength` parameters missing from rows."""
+    return [
+        (combination, values)
+        for combination in itertools.combinations(
+            range(len(radices)), strength
+        )
+        for values in itertools.product(
+            *(range(radices[parameter]) for parameter in combination)
+        )
+        if not any(
+            tuple(row[parameter] for parameter in combination) == values
+            for row in rows
+        )
+    ]
+
+
+class CoveringArrayTest(unittest.TestCase):
+    def test_covers_every_interaction(self):
+        for radices, strength in [
+            ([2, 2, 2, 2], 2),
+            ([3, 4, 2, 5, 3], 2),
+            ([2, 3, 2, 2], 3),
+        ]:
+            with self.subTest(radices=radices, strength=strength):
+                array = generate_covering_array(
+                    radices, strength, random_generator=random.Random(1)
+                )
+
+                self.assertEqual(
+                    uncovered(radices, strength, array.rows), []
+                )
+                self.assertEqual(array.coverage, 1.0)
+                self.assertLess(
+                    len(array.rows),
+                    len(list(itertools.product(*map(range, radices)))),
+                )
+
+    def test_pairwise_array_of_binary_parameters_is_small(self):
+        # The smallest pairwise array for four binary parameters has 5
+        # rows, against 16 for the cartesian product
+        array = generate_covering_array(
+            [2] * 4, 2, random_generator=random.Random(1)
+        )
+
+        self.assertLessEqual(len(array.rows), 6)
+
+    def test_max_rows(self):
+        array = generate_covering_array(
+            [3, 3, 3], 2, max_rows=2, random_generator=random.Random(1)
+        )
+
+        self.assertEqual(len(array.rows), 2)
+        self.assertEqual(array.total_interactions, 27)
+        self.assertLess(array.coverage, 1.0)
+        self.assertEqual(
+            array.total_interactions - array.covered_interactions,
+            len(uncovered([3, 3, 3], 2, array.rows)),
+        )
+
+    def test_edge_cases(self):
+        self.assertEqual(generate_covering_array([]).rows, [()])
+        self.assertEqual(generate_covering_array([2, 0]).rows, [])
+        # The strength is capped at the number of parameters
+        array = generate_covering_array([2, 3], strength=3)
+        self.assertEqual(array.strength, 2)
+        self.assertEqual(len(array.rows), 6)
+
+
+class DistinctValuesTest(unittest.TestCase):
+    def test_distinct_values(self):
+        self.assertEqual(
+            distinct_values(
+                [None, None, 1, True, "1", 1, {"a": 1}, {"a": 1}]
+            ),
+            [None, 1, True, "1", {"a": 1}],
+        )
+
+
+class EndpointCoveringArrayTest(unittest.TestCase):
+    def test_repeated_examples_are_covered_once(self):
+        endpoint_test = generate_endpoint_test(
+            endpoint_name="/items/",
+            method="get",
+            base_url="http://localhost/api",
+            schema=load_schema(SCHEMA),
+            max_urls_per_endpoint=50,
+            seed=1,
+            covering_strength=2,
+        )
+
+        urls = [url for _body, url in endpoint_test.payloads]
+        self.assertEqual(len(urls), len(set(urls)))
+        # Two values for each of the three parameters, and a single
+        # `None` request body: 3 pairs of parameters with 4 interactions
+        # each, and 3 pairs with the request body with 2 each
+        self.assertEqual(
+            endpoint_test.covering_array.total_interactions, 18
+        )
+        self.assertEqual(endpoint_test.covering_array.coverage, 1.0)
+        self.assertLessEqual(len(urls), 6)
+
+    def test_positional_arguments_keep_their_meaning(self):
+        for function in (full_test, async_full_test):
+            with self.subTest(function=function.__name__):
+                self.assertEqual(
+                    list(inspect.signature(function).parameters)[:5],
+                    [
+                        "schema",
+                        "max_urls_per_endpoint",
+                        "failed_request_limit",
+                        "methods_to_test",
+                        "parameter_constraints",
+                    ],
+                )
+
+
+if __name__ == "__main__":
+    unittest.main()
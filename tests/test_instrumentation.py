@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""Tests for the latency histograms."""
+
+import math
+import random
+import unittest
+
+from open_api_tools.common.instrumentation import (
+    SUB_BUCKET_BITS,
+    LatencyHistogram,
+    _bucket_index,
+    _bucket_value,
+)
+
+# Values around every power of two up to about 10 minutes, in
+# microseconds
+VALUES = sorted(
+    {
+        value
+        for power in range(30)
+        for value in range(max(0, (1 << power) - 3), (1 << power) + 3)
+    }
+    | set(range(2000))
+)
+
+
+class BucketTest(unittest.TestCase):
+    def test_small_values_are_exact(self):
+        for value in range(1 << SUB_BUCKET_BITS):
+            self.assertEqual(_bucket_value(_bucket_index(value)), value)
+
+    def test_buckets_are_contiguous(self):
+        # Each value falls into the first bucket whose highest value is
+        # not below it
+        for value in VALUES:
+            index = _bucket_index(value)
+            self.assertGreaterEqual(_bucket_value(index), value)
+            if index:
+                self.assertLess(_bucket_value(index - 1), value)
+
+    def test_indices_are_monotonic(self):
+        indices = [_bucket_index(value) for value in VALUES]
+        self.assertEqual(indices, sorted(indices))
+
+    def test_relative_error(self):
+        for value in VALUES[1:]:
+            error = (
+                _bucket_value(_bucket_index(value)) - value
+            ) / value
+            self.assertLessEqual(error, 2 ** -(SUB_BUCKET_BITS - 1))
+
+
+class LatencyHistogramTest(unittest.TestCase):
+    def test_percentiles(self):
+        generator = random.Random(1)
+        durations = [
+            generator.lognormvariate(-3, 1) for _i in range(5000)
+        ]
+        histogram = LatencyHistogram()
+        for duration in durations:
+            histogram.record(duration)
+
+        durations.sort()
+        for percentile in (1, 50, 95, 99, 100):
+            expected = durations[
+                math.ceil(percentile / 100 * len(durations)) - 1
+            ]
+            self.assertAlmostEqual(
+                histogram.percentile(percentile),
+                expected,
+                delta=expected * 2 ** -(SUB_BUCKET_BITS - 1) + 1e-6,
+            )
+        self.assertEqual(histogram.count, 5000)
+        # Recorded in whole microseconds
+        self.assertAlmostEqual(
+            histogram.max / 1_000_000, durations[-1], delta=1e-6
+        )
+
+    def test_empty(self):
+        histogram = LatencyHistogram()
+
+        self.assertIsNone(histogram.percentile(50))
+        self.assertIsNone(histogram.to_dict()["p95_ms"])
+
+    def test_merge_and_serialization(self):
+        first, second, both = (
+            LatencyHistogram(),
+            LatencyHistogram(),
+            LatencyHistogram(),
+        )
+        for number in range(1, 200):
+            duration = number / 1000
+            (first if number % 3 else second).record(duration)
+            both.record(duration)
+
+        first.merge(second)
+        restored = LatencyHistogram.from_dict(first.to_dict())
+
+        for histogram in (first, restored):
+            self.assertEqual(histogram.buckets, both.buckets)
+            self.assertEqual(histogram.count, both.count)
+            self.assertEqual(histogram.min, both.min)
+            self.assertEqual(histogram.max, both.max)
+            self.assertEqual(histogram.to_dict(), both.to_dict())
+
+
+if __name__ == "__main__":
+    unittest.main()
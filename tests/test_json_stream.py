@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""Tests for the incremental JSON array parser."""
+
+import json
+import unittest
+
+from open_api_tools.common.json_stream import JsonArrayParser
+
+DOCUMENT = json.dumps(
+    [
+        1,
+        -12.5e3,
+        "café ☃ \U0001f600",
+        True,
+        None,
+        {"a": [1, {"b": "]"}], "c": "\\"},
+        [],
+        "",
+        0,
+    ],
+    ensure_ascii=False,
+).encode()
+
+
+def parse(chunks, trailing_content=False):
+    parser = JsonArrayParser(trailing_content=trailing_content)
+    items = []
+    for chunk in chunks:
+        items += parser.feed(chunk)
+    items += parser.close()
+    return items
+
+
+def split(content, size):
+    return [
+        content[start : start + size]
+        for start in range(0, len(content), size)
+    ]
+
+
+class JsonArrayParserTest(unittest.TestCase):
+    def test_every_split(self):
+        expected = json.loads(DOCUMENT)
+        for position in range(len(DOCUMENT) + 1):
+            with self.subTest(position=position):
+                self.assertEqual(
+                    parse([DOCUMENT[:position], DOCUMENT[position:]]),
+                    expected,
+                )
+
+    def test_chunk_sizes(self):
+        expected = json.loads(DOCUMENT)
+        for size in (1, 2, 3, 7, 64):
+            with self.subTest(size=size):
+                self.assertEqual(parse(split(DOCUMENT, size)), expected)
+
+    def test_items_are_returned_as_they_complete(self):
+        parser = JsonArrayParser()
+
+        self.assertEqual(parser.feed(b'[{"a": 1}, 2'), [{"a": 1}])
+        # The number may continue in the next chunk
+        self.assertEqual(parser.feed(b"3"), [])
+        self.assertEqual(parser.feed(b', "x'), [23])
+        self.assertEqual(parser.feed(b'"]'), ["x"])
+        self.assertTrue(parser.finished)
+        self.assertEqual(parser.close(), [])
+
+    def test_completed_items_are_dropped(self):
+        parser = JsonArrayParser()
+        parser.feed(b"[" + b'"item", ' * 1000)
+
+        self.assertLess(len(parser._buffer), 10)
+
+    def test_empty_array(self):
+        self.assertEqual(parse([b" [ ", b"] "]), [])
+
+    def test_trailing_content(self):
+        content = b'[1, 2], "pages": []}'
+
+        self.assertEqual(
+            parse([content], trailing_content=True), [1, 2]
+        )
+        with self.assertRaisesRegex(ValueError, "after the JSON array"):
+            parse([content])
+
+    def test_invalid_content(self):
+        for content, message in [
+            (b'{"a": 1}', "Expected a JSON array"),
+            (b"[1 2]", "Expected ',' or ']'"),
+            (b"[1, 2", "Unexpected end"),
+            (b"[1, tru", "Expecting value"),
+        ]:
+            with self.subTest(content=content):
+                with self.assertRaisesRegex(ValueError, message):
+                    parse(split(content, 2))
+
+
+if __name__ == "__main__":
+    unittest.main()
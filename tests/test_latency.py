@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""Tests for collecting the response times of failed requests."""
+
+import unittest
+from unittest import mock
+
+from open_api_tools.common.load_schema import load_schema
+from open_api_tools.test.test_endpoint import _handle_response
+from open_api_tools.validate.index import (
+    ErrorMessage,
+    FiledRequest,
+    _check_latency,
+)
+
+SCHEMA = {
+    "openapi": "3.0.0",
+    "info": {"title": "Latency", "version": "1.0.0"},
+    "servers": [{"url": "http://localhost/api"}],
+    "paths": {
+        "/items/": {
+            "get": {
+                "x-max-latency-ms": 100,
+                "responses": {200: {"description": "Items"}},
+            }
+        },
+    },
+}
+
+
+def check_latency(filed_request, elapsed):
+    return _check_latency(
+        schema=load_schema(SCHEMA),
+        request_url="http://localhost/api/items/",
+        endpoint_name="/items/",
+        method="get",
+        filed_request=filed_request,
+        elapsed=elapsed,
+        after_error_occurred=None,
+    )
+
+
+class LatencyTest(unittest.TestCase):
+    def setUp(self):
+        print_patcher = mock.patch("builtins.print")
+        print_patcher.start()
+        self.addCleanup(print_patcher.stop)
+
+    def test_elapsed_is_set_on_every_received_response(self):
+        invalid = ErrorMessage(
+            type="invalid_response",
+            title="Invalid Response",
+            error_status="Response code (500) is invalid",
+            url="http://localhost/api/items/",
+        )
+        self.assertEqual(check_latency(invalid, 0.05).elapsed, 0.05)
+
+        slow = check_latency(FiledRequest("success", object()), 0.5)
+        self.assertEqual(slow.type, "latency_budget_exceeded")
+        self.assertEqual(slow.elapsed, 0.5)
+
+        fast = check_latency(FiledRequest("success", object()), 0.01)
+        self.assertEqual(fast.elapsed, 0.01)
+
+    def test_latencies_include_failed_responses(self):
+        latencies = []
+        for response in [
+            FiledRequest("success", object(), elapsed=0.01),
+            ErrorMessage("invalid_response", "", "", "", elapsed=0.3),
+            # Never received a response
+            ErrorMessage("connection_error", "", "", ""),
+        ]:
+            _handle_response(
+                response,
+                [],
+                index=0,
+                responses={},
+                latencies=latencies,
+                should_continue_on_fail=lambda: True,
+                after_error_occurred=lambda _error: None,
+            )
+
+        self.assertEqual(latencies, [10, 300])
+
+
+if __name__ == "__main__":
+    unittest.main()
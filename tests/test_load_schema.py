@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""Tests for reading and parsing schema files."""
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from open_api_tools.common.load_schema import (
+    DOWNLOAD_TIMEOUT,
+    load_schema,
+    parse_schema_content,
+    read_schema_source,
+)
+
+
+class LoadSchemaTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def write(self, name, content):
+        path = os.path.join(self.directory, name)
+        with open(path, "wb") as schema_file:
+            schema_file.write(content)
+        return path
+
+    def parse_file(self, content):
+        with read_schema_source(
+            self.write("schema", content)
+        ) as mapped:
+            return parse_schema_content(mapped)
+
+    def test_parse_mapped_file(self):
+        for content, expected in [
+            (
+                b'  {"a": [1, 2], "b": "\xc3\xa9"}',
+                {"a": [1, 2], "b": "é"},
+            ),
+            # A YAML flow mapping is not JSON
+            (b"{a: 1}", {"a": 1}),
+            (b"a: 1\nb:\n  200: ok\n", {"a": 1, "b": {200: "ok"}}),
+        ]:
+            with self.subTest(content=content):
+                self.assertEqual(self.parse_file(content), expected)
+
+    def test_parse_bytes(self):
+        self.assertEqual(parse_schema_content(b'{"a": 1}'), {"a": 1})
+        self.assertEqual(parse_schema_content(b"a: 1"), {"a": 1})
+
+    def test_empty_file(self):
+        for content in (b"", b"\n# Nothing yet\n"):
+            with self.subTest(content=content):
+                with self.assertRaisesRegex(
+                    Exception, "schema file is empty"
+                ):
+                    load_schema(self.write("open_api.yaml", content))
+
+    def test_not_a_document(self):
+        with self.assertRaisesRegex(
+            Exception, "not an OpenAPI document"
+        ):
+            load_schema(self.write("open_api.yaml", b"- a\n- b\n"))
+
+    def test_download_timeout(self):
+        response = mock.Mock(
+            content=b'{"openapi": "3.0.0", "paths": {}}'
+        )
+        with mock.patch(
+            "open_api_tools.common.load_schema.requests.get",
+            return_value=response,
+        ) as get:
+            schema = load_schema("https://example.com/open_api.json")
+
+        get.assert_called_once_with(
+            "https://example.com/open_api.json",
+            timeout=DOWNLOAD_TIMEOUT,
+        )
+        self.assertEqual(schema.raw_spec["openapi"], "3.0.0")
+
+
+if __name__ == "__main__":
+    unittest.main()
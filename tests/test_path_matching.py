@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""Tests for finding the endpoint of a concrete URL."""
+
+import unittest
+
+from open_api_tools.common.path_matching import PathRouter
+
+GET = {"get": {}}
+
+
+def router(paths, servers=None):
+    raw_spec = {"paths": paths}
+    if servers is not None:
+        raw_spec["servers"] = servers
+    return PathRouter(raw_spec)
+
+
+class PathRouterTest(unittest.TestCase):
+    def test_literal_segments_take_precedence(self):
+        paths = router({"/items/{item_id}/": GET, "/items/mine/": GET})
+
+        self.assertEqual(
+            paths.match_path("get", "/items/mine/"),
+            ("/items/mine/", {}),
+        )
+        self.assertEqual(
+            paths.match_path("get", "/items/42/"),
+            ("/items/{item_id}/", {"item_id": "42"}),
+        )
+
+    def test_backtracking_from_a_literal_segment(self):
+        paths = router(
+            {
+                "/a/{x}/c/{y}/": GET,
+                "/a/b/d/": GET,
+                "/a/b/{z}/e/": GET,
+            }
+        )
+
+        # "b" matches the literal segment, but nothing below it
+        # matches "c/1/", so "b" is used as the value of "x"
+        self.assertEqual(
+            paths.match_path("get", "/a/b/c/1/"),
+            ("/a/{x}/c/{y}/", {"x": "b", "y": "1"}),
+        )
+        self.assertEqual(
+            paths.match_path("get", "/a/b/c/e/"),
+            ("/a/b/{z}/e/", {"z": "c"}),
+        )
+
+    def test_backtracking_on_the_method(self):
+        paths = router(
+            {"/items/new/": {"post": {}}, "/items/{item_id}/": GET}
+        )
+
+        self.assertEqual(
+            paths.match_path("GET", "/items/new/"),
+            ("/items/{item_id}/", {"item_id": "new"}),
+        )
+        self.assertEqual(
+            paths.match_path("post", "/items/new/"), ("/items/new/", {})
+        )
+        self.assertIsNone(paths.match_path("delete", "/items/new/"))
+
+    def test_segments_with_text(self):
+        paths = router(
+            {
+                "/files/{name}.{extension}": GET,
+                "/files/{name}.json/meta": GET,
+                "/files/{path}": GET,
+            }
+        )
+
+        self.assertEqual(
+            paths.match_path("get", "/files/report.tar.gz"),
+            (
+                "/files/{name}.{extension}",
+                {"name": "report", "extension": "tar.gz"},
+            ),
+        )
+        self.assertEqual(
+            paths.match_path("get", "/files/report.json/meta"),
+            ("/files/{name}.json/meta", {"name": "report"}),
+        )
+        self.assertEqual(
+            paths.match_path("get", "/files/report"),
+            ("/files/{path}", {"path": "report"}),
+        )
+
+    def test_parameter_values(self):
+        paths = router({"/users/{user_id}/": GET})
+
+        self.assertEqual(
+            paths.match_path("get", "/users/a%20b%2Fc/"),
+            ("/users/{user_id}/", {"user_id": "a b/c"}),
+        )
+        # Parameters don't match empty segments
+        self.assertIsNone(paths.match_path("get", "/users//"))
+        self.assertIsNone(paths.match_path("get", "/users/1"))
+
+    def test_servers(self):
+        paths = router(
+            {"/items/": GET},
+            servers=[
+                {"url": "https://example.com/"},
+                {
+                    "url": "https://{host}/api/{version}",
+                    "variables": {
+                        "host": {"default": "api.example.com"},
+                        "version": {"default": "v1"},
+                    },
+                },
+            ],
+        )
+
+        match = paths.match(
+            "get", "http://localhost:8000/api/v1/items/?a=1"
+        )
+        self.assertEqual(match.endpoint_name, "/items/")
+        self.assertEqual(
+            match.request_url,
+            "https://api.example.com/api/v1/items/?a=1",
+        )
+        match = paths.match("get", "/items/")
+        self.assertEqual(
+            match.request_url, "https://example.com/items/"
+        )
+        self.assertIsNone(paths.match("get", "/api/v2/items/"))
+
+    def test_relative_server(self):
+        paths = router({"/items/": GET}, servers=[{"url": "/api"}])
+
+        self.assertEqual(
+            paths.match(
+                "get", "http://localhost/api/items/"
+            ).request_url,
+            "http://localhost/api/items/",
+        )
+        self.assertIsNone(paths.match("get", "http://localhost/items/"))
+
+
+if __name__ == "__main__":
+    unittest.main()
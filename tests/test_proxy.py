@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""Tests for the statistics of the validating proxy."""
+
+import unittest
+from unittest import mock
+
+from open_api_tools.common.load_schema import load_schema
+from open_api_tools.test.proxy import ProxyStats, ValidatingProxy
+from open_api_tools.validate.index import ErrorMessage
+
+SCHEMA = {
+    "openapi": "3.0.0",
+    "info": {"title": "Proxy", "version": "1.0.0"},
+    "servers": [{"url": "http://localhost/api"}],
+    "paths": {
+        "/items/": {
+            "get": {"responses": {200: {"description": "Items"}}},
+        },
+    },
+}
+
+ERROR = ErrorMessage(
+    type="invalid_response",
+    title="Invalid response",
+    error_status="Status code 500",
+    url="http://localhost/api/items/",
+)
+
+
+def make_stats():
+    stats = ProxyStats(forwarded=3, upstream_errors=1, dropped=2)
+    stats.forward_latency.record(0.25)
+    stats.validation.duration = 1.5
+    stats.validation.add_entry("/items/")
+    stats.validation.add_error("/items/", ERROR)
+    stats.validation.add_unparsed("Truncated record")
+    stats.validation.add_failed("[GET] /items/: KeyError()")
+    return stats
+
+
+class ProxyStatsTest(unittest.TestCase):
+    def test_snapshot_copies_the_counters(self):
+        stats = make_stats()
+        snapshot = stats.snapshot()
+        self.assertEqual(snapshot.to_dict(), stats.to_dict())
+
+    def test_snapshot_is_independent(self):
+        stats = make_stats()
+        snapshot = stats.snapshot()
+        expected = snapshot.to_dict()
+
+        stats.forwarded += 1
+        stats.forward_latency.record(0.5)
+        stats.validation.add_entry("/items/")
+        stats.validation.add_error("/items/", ERROR)
+        stats.validation.add_failed("[GET] /items/: KeyError()")
+
+        self.assertEqual(snapshot.to_dict(), expected)
+
+
+class PrintStatsTest(unittest.TestCase):
+    def setUp(self):
+        self.proxy = ValidatingProxy(
+            schema=load_schema(SCHEMA),
+            upstream="http://localhost:8000",
+            port=0,
+            stats_interval=0,
+        )
+        self.addCleanup(self.proxy._server.server_close)
+
+    def test_prints_outside_of_the_lock(self):
+        lock_held = []
+
+        def print_summary(_stats):
+            lock_held.append(self.proxy._lock.locked())
+            self.proxy._stopped.set()
+
+        with mock.patch.object(
+            ProxyStats, "print_summary", print_summary
+        ):
+            self.proxy._print_stats()
+
+        self.assertEqual(lock_held, [False])
+
+
+if __name__ == "__main__":
+    unittest.main()
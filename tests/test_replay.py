@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+"""Tests for recording traffic and replaying it against a schema."""
+
+import copy
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from requests import Request
+from requests.structures import CaseInsensitiveDict
+
+from open_api_tools.common.load_schema import load_schema
+from open_api_tools.common.traffic_archive import (
+    TrafficArchive,
+    TrafficRecorder,
+    index_path,
+)
+from open_api_tools.test.replay import replay
+
+SCHEMA = {
+    "openapi": "3.0.0",
+    "info": {"title": "Replay", "version": "1.0.0"},
+    "servers": [{"url": "http://localhost/api"}],
+    "paths": {
+        "/items/": {
+            "post": {
+                "parameters": [
+                    {
+                        "name": "limit",
+                        "in": "query",
+                        "required": False,
+                        "schema": {"type": "integer", "maximum": 10},
+                    }
+                ],
+                "requestBody": {
+                    "content": {
+                        "application/json": {
+                            "schema": {
+                                "type": "object",
+                                "properties": {
+                                    "name": {"type": "string"}
+                                },
+                            }
+                        }
+                    }
+                },
+                "responses": {
+                    200: {
+                        "description": "Items",
+                        "content": {
+                            "application/json": {
+                                "schema": {
+                                    "type": "array",
+                                    "items": {"type": "integer"},
+                                }
+                            }
+                        },
+                    }
+                },
+            }
+        },
+    },
+}
+
+
+def fake_response(url, content):
+    return SimpleNamespace(
+        url=url,
+        status_code=200,
+        headers=CaseInsensitiveDict(
+            {"Content-Type": "application/json"}
+        ),
+        content=content,
+    )
+
+
+class ArchiveTestCase(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "traffic.archive")
+
+    def record(self, count=2):
+        with TrafficRecorder(self.path) as recorder:
+            for number in range(count):
+                url = f"http://localhost/api/items/?limit={number}"
+                request = Request(
+                    "POST",
+                    url,
+                    json={"name": f"item{number}"},
+                ).prepare()
+                recorder.record(
+                    endpoint_name="/items/",
+                    method="POST",
+                    request_url=url,
+                    request=request,
+                    response=fake_response(url, b"[%d]" % number),
+                    elapsed=number / 10,
+                )
+
+
+class TrafficArchiveTest(ArchiveTestCase):
+    def test_round_trip(self):
+        self.record()
+
+        with TrafficArchive(self.path) as archive:
+            self.assertEqual(len(archive), 2)
+            exchanges = list(archive)
+            self.assertEqual(archive[1], exchanges[1])
+
+        exchange = exchanges[1]
+        self.assertEqual(exchange.endpoint_name, "/items/")
+        self.assertEqual(exchange.method, "post")
+        self.assertEqual(
+            exchange.request_url, "http://localhost/api/items/?limit=1"
+        )
+        self.assertEqual(
+            exchange.request_headers["Content-Type"], "application/json"
+        )
+        self.assertEqual(exchange.request_body, b'{"name": "item1"}')
+        self.assertEqual(exchange.response.status_code, 200)
+        self.assertEqual(
+            exchange.response.headers["content-type"],
+            "application/json",
+        )
+        self.assertEqual(exchange.response.json(), [1])
+        self.assertEqual(exchange.response.elapsed, 0.1)
+
+    def test_appending(self):
+        self.record()
+        self.record()
+
+        with TrafficArchive(self.path) as archive:
+            self.assertEqual(
+                [exchange.response.json() for exchange in archive],
+                [[0], [1], [0], [1]],
+            )
+
+    def test_without_index(self):
+        self.record()
+        os.remove(index_path(self.path))
+
+        with TrafficArchive(self.path) as archive:
+            self.assertEqual(len(archive), 2)
+            self.assertEqual(archive[1].response.json(), [1])
+
+    def test_truncated_record(self):
+        self.record()
+        with open(self.path, "r+b") as data_file:
+            data_file.truncate(os.path.getsize(self.path) - 1)
+
+        with TrafficArchive(self.path) as archive:
+            self.assertEqual(
+                [exchange.response.json() for exchange in archive],
+                [[0]],
+            )
+        os.remove(index_path(self.path))
+        with TrafficArchive(self.path) as archive:
+            self.assertEqual(len(archive), 1)
+
+    def test_not_an_archive(self):
+        with open(self.path, "wb") as data_file:
+            data_file.write(b"something else")
+
+        with self.assertRaisesRegex(Exception, "not a traffic archive"):
+            TrafficArchive(self.path)
+
+
+class ReplayTest(ArchiveTestCase):
+    def setUp(self):
+        super().setUp()
+        print_patcher = mock.patch("builtins.print")
+        print_patcher.start()
+        self.addCleanup(print_patcher.stop)
+
+    def replay(self, raw_spec):
+        result = replay(load_schema(raw_spec), self.path)
+        return [error.type for error in result.errors]
+
+    def test_unchanged_schema(self):
+        self.record(3)
+
+        self.assertEqual(self.replay(SCHEMA), [])
+
+    def test_changed_parameters(self):
+        self.record(3)
+        raw_spec = copy.deepcopy(SCHEMA)
+        operation = raw_spec["paths"]["/items/"]["post"]
+        operation["parameters"][0]["schema"]["maximum"] = 1
+
+        self.assertEqual(self.replay(raw_spec), ["invalid_request"])
+
+    def test_changed_request_body(self):
+        self.record(2)
+        raw_spec = copy.deepcopy(SCHEMA)
+        operation = raw_spec["paths"]["/items/"]["post"]
+        body_schema = operation["requestBody"]["content"][
+            "application/json"
+        ]["schema"]
+        body_schema["properties"]["name"] = {"type": "integer"}
+
+        self.assertEqual(
+            self.replay(raw_spec),
+            ["invalid_request", "invalid_request"],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
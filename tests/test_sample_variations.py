@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""Tests for sampling combinations of parameter examples."""
+
+import itertools
+import random
+import unittest
+
+from open_api_tools.test.utils import (
+    ParameterData,
+    count_variations,
+    sample_variations,
+)
+
+
+def parameters(*example_counts):
+    return [
+        ParameterData(
+            name=f"p{number}",
+            location="query",
+            required=True,
+            examples=[f"p{number}v{value}" for value in range(count)],
+            type="string",
+            default=None,
+        )
+        for number, count in enumerate(example_counts)
+    ]
+
+
+class SampleVariationsTest(unittest.TestCase):
+    def test_small_products_are_returned_in_full(self):
+        endpoint_parameters = parameters(2, 3)
+
+        self.assertEqual(
+            list(sample_variations(endpoint_parameters, 6)),
+            list(
+                itertools.product(
+                    *(
+                        parameter.examples
+                        for parameter in endpoint_parameters
+                    )
+                )
+            ),
+        )
+
+    def test_mixed_radix_decoding(self):
+        # Sampling every index decodes to the cartesian product, in the
+        # order of itertools.product
+        endpoint_parameters = parameters(3, 1, 4, 2)
+        product = list(
+            itertools.product(
+                *(
+                    parameter.examples
+                    for parameter in endpoint_parameters
+                )
+            )
+        )
+
+        class Identity(random.Random):
+            def sample(self, population, count):
+                return list(population)[:count]
+
+        # One less than the product, so that the indices are decoded
+        variations = list(
+            sample_variations(
+                endpoint_parameters, len(product) - 1, Identity()
+            )
+        )
+
+        self.assertEqual(variations, product[:-1])
+
+    def test_samples_are_distinct_and_seeded(self):
+        endpoint_parameters = parameters(5, 4, 3, 7)
+
+        first = list(
+            sample_variations(endpoint_parameters, 50, random.Random(3))
+        )
+        second = list(
+            sample_variations(endpoint_parameters, 50, random.Random(3))
+        )
+
+        self.assertEqual(first, second)
+        self.assertEqual(len(set(first)), 50)
+        for variation in first:
+            for parameter, value in zip(endpoint_parameters, variation):
+                self.assertIn(value, parameter.examples)
+
+    def test_huge_products(self):
+        # Larger than sys.maxsize, which random.sample can't handle
+        endpoint_parameters = parameters(*[10] * 25)
+        self.assertEqual(
+            count_variations(endpoint_parameters), 10 ** 25
+        )
+
+        variations = list(
+            sample_variations(endpoint_parameters, 20, random.Random(1))
+        )
+
+        self.assertEqual(len(set(variations)), 20)
+        self.assertTrue(
+            all(len(variation) == 25 for variation in variations)
+        )
+
+    def test_parameter_without_examples(self):
+        self.assertEqual(
+            list(sample_variations(parameters(3, 0), 10)), []
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""Tests for the request scheduler."""
+
+import threading
+import unittest
+from concurrent.futures import CancelledError
+
+from open_api_tools.common.scheduler import RequestScheduler
+
+
+class RequestSchedulerTest(unittest.TestCase):
+    def test_runs_jobs(self):
+        with RequestScheduler(2, 1) as scheduler:
+            futures = [
+                scheduler.submit(f"GET /{index % 2}/", pow, index, 2)
+                for index in range(6)
+            ]
+            results = [future.result() for future in futures]
+        self.assertEqual(results, [0, 1, 4, 9, 16, 25])
+
+    def test_close_cancels_jobs_waiting_for_a_worker(self):
+        started = threading.Event()
+        release = threading.Event()
+        ran = []
+
+        def block():
+            started.set()
+            release.wait()
+
+        scheduler = RequestScheduler(1)
+        running = scheduler.submit("GET /a/", block)
+        # Different endpoints, so these wait in the executor's queue
+        # rather than in the per-endpoint queues
+        waiting = [
+            scheduler.submit(f"GET /{key}/", ran.append, key)
+            for key in "bc"
+        ]
+        started.wait()
+        threading.Timer(0.05, release.set).start()
+        scheduler.close()
+
+        self.assertIsNone(running.result())
+        self.assertEqual(ran, [])
+        for future in waiting:
+            self.assertTrue(future.cancelled())
+            with self.assertRaises(CancelledError):
+                future.result()
+
+    def test_close_cancels_jobs_over_the_endpoint_limit(self):
+        started = threading.Event()
+        release = threading.Event()
+        ran = []
+
+        def block():
+            started.set()
+            release.wait()
+
+        scheduler = RequestScheduler(2, 1)
+        scheduler.submit("GET /a/", block)
+        waiting = scheduler.submit("GET /a/", ran.append, "a")
+        started.wait()
+        threading.Timer(0.05, release.set).start()
+        scheduler.close()
+
+        self.assertEqual(ran, [])
+        self.assertTrue(waiting.cancelled())
+
+
+if __name__ == "__main__":
+    unittest.main()
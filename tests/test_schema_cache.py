@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""Tests for the on-disk schema cache."""
+
+import datetime
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from open_api_tools.common import schema_cache
+from open_api_tools.common.load_schema import load_schema
+from open_api_tools.common.schema_cache import (
+    get_cache_path,
+    read_cache,
+    write_cache,
+)
+
+SCHEMA = b"""
+openapi: 3.0.0
+info:
+  title: Cache
+  version: 1.0.0
+servers:
+  - url: http://localhost/api
+paths:
+  /items/:
+    get:
+      responses:
+        200:
+          description: Items
+          content:
+            application/json:
+              schema:
+                type: array
+                items:
+                  $ref: '#/components/schemas/Item'
+components:
+  schemas:
+    Item:
+      type: object
+      properties:
+        created:
+          type: string
+          example: 2021-06-01
+        children:
+          type: array
+          items:
+            $ref: '#/components/schemas/Item'
+"""
+
+
+class SchemaCacheTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def test_values_json_can_not_represent(self):
+        cache = {
+            "codes": {200: "OK", "default": "Other"},
+            ("items", 200): {"a", "b"},
+            "date": datetime.date(2021, 6, 1),
+            "time": datetime.datetime(2021, 6, 1, 12, 30),
+            "binary": b"\x00\xff",
+            "tagged": {schema_cache._TAG: "dict"},
+            "nested": [(1, (2, 3)), {"x": None, "y": 1.5}],
+        }
+        path = get_cache_path(self.directory, b"schema")
+        write_cache(path, cache)
+
+        self.assertEqual(read_cache(path), {**cache, "version": 2})
+
+    def test_unreadable_cache(self):
+        path = get_cache_path(self.directory, b"schema")
+        with open(path, "wb") as cache_file:
+            cache_file.write(b"\x80\x04not json")
+
+        self.assertIsNone(read_cache(path))
+
+    def test_library_versions_are_part_of_the_key(self):
+        path = get_cache_path(self.directory, b"schema")
+        with mock.patch.object(
+            schema_cache,
+            "_library_versions",
+            return_value="jsonschema==0.0.1",
+        ):
+            self.assertNotEqual(
+                get_cache_path(self.directory, b"schema"), path
+            )
+        self.assertEqual(
+            get_cache_path(self.directory, b"schema"), path
+        )
+
+    def test_load_from_cache(self):
+        path = os.path.join(self.directory, "open_api.yaml")
+        with open(path, "wb") as schema_file:
+            schema_file.write(SCHEMA)
+
+        first = load_schema(path, cache_directory=self.directory)
+        self.assertEqual(
+            len(
+                [
+                    name
+                    for name in os.listdir(self.directory)
+                    if name.endswith(".json")
+                ]
+            ),
+            1,
+        )
+        with mock.patch(
+            "open_api_tools.common.load_schema.parse_schema_content"
+        ) as parse_schema_content:
+            second = load_schema(path, cache_directory=self.directory)
+
+        parse_schema_content.assert_not_called()
+        self.assertEqual(second.raw_spec, first.raw_spec)
+        self.assertIn(
+            200, second.raw_spec["paths"]["/items/"]["get"]["responses"]
+        )
+        self.assertEqual(
+            second.references.references, first.references.references
+        )
+        self.assertTrue(second.validators)
+        self.assertEqual(
+            second.validators.keys(), first.validators.keys()
+        )
+        for key, validator in second.validators.items():
+            self.assertEqual(
+                validator.schema, first.validators[key].schema
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""Tests for the retries of the `requests` sessions."""
+
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from open_api_tools.common.sessions import SessionConfig, create_session
+
+
+class UnavailableHandler(BaseHTTPRequestHandler):
+    """Answer every request with a 503 and count the requests."""
+
+    requests = []
+
+    def do_GET(self):
+        self.respond()
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.respond()
+
+    def respond(self):
+        self.requests.append(self.command)
+        self.send_response(503)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *_args):
+        pass
+
+
+class RetryTest(unittest.TestCase):
+    def setUp(self):
+        UnavailableHandler.requests = []
+        server = ThreadingHTTPServer(
+            ("127.0.0.1", 0), UnavailableHandler
+        )
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        self.addCleanup(thread.join)
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.url = f"http://127.0.0.1:{server.server_address[1]}/items/"
+
+    def send(self, method, config):
+        session = create_session(config)
+        self.addCleanup(session.close)
+        return session.request(method, self.url, data="{}")
+
+    def test_retries_idempotent_methods(self):
+        response = self.send(
+            "GET", SessionConfig(retries=2, backoff_factor=0)
+        )
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(UnavailableHandler.requests, ["GET"] * 3)
+
+    def test_does_not_retry_post_by_default(self):
+        response = self.send(
+            "POST", SessionConfig(retries=2, backoff_factor=0)
+        )
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(UnavailableHandler.requests, ["POST"])
+
+    def test_retries_the_configured_methods(self):
+        config = SessionConfig(
+            retries=2, backoff_factor=0, retry_methods=["POST"]
+        )
+        self.send("POST", config)
+        self.send("GET", config)
+        self.assertEqual(
+            UnavailableHandler.requests, ["POST"] * 3 + ["GET"]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
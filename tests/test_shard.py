@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""Tests for combining the results of shards."""
+
+import os
+import tempfile
+import unittest
+
+from open_api_tools.test.shard import ShardResult, merge_shard_results
+
+
+class MergeShardResultsTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def dump(self, number, seed):
+        path = os.path.join(self.directory, f"shard-{number}.json")
+        ShardResult(
+            shard_count=2,
+            shards=[number],
+            errors=[{"type": "invalid_response"}],
+            seed=seed,
+        ).dump(path)
+        return path
+
+    def test_keeps_the_seed(self):
+        path = self.dump(1, 42)
+        self.assertEqual(ShardResult.load(path).seed, 42)
+
+    def test_merges_shards_of_the_same_seed(self):
+        result = merge_shard_results(
+            [self.dump(2, 42), self.dump(1, 42)]
+        )
+        self.assertEqual(result.shards, [1, 2])
+        self.assertEqual(result.seed, 42)
+        self.assertEqual(len(result.errors), 2)
+        self.assertEqual(result.missing_shards, [])
+
+    def test_rejects_shards_of_different_seeds(self):
+        paths = [self.dump(1, 42), self.dump(2, 43)]
+        with self.assertRaisesRegex(Exception, "different seeds"):
+            merge_shard_results(paths)
+
+    def test_rejects_duplicate_shards(self):
+        paths = [self.dump(1, 42), self.dump(1, 42)]
+        with self.assertRaisesRegex(Exception, "more than once"):
+            merge_shard_results(paths)
+
+
+if __name__ == "__main__":
+    unittest.main()
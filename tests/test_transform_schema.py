@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+"""Tests for converting OpenAPI schema objects to JSON schema."""
+
+import unittest
+
+from jsonschema.exceptions import ValidationError
+
+from open_api_tools.common.transform_schema import (
+    ReferenceResolver,
+    compile_validator,
+)
+
+
+def document(schemas):
+    return {
+        "openapi": "3.0.0",
+        "paths": {
+            "/items/": {
+                "get": {
+                    "responses": {
+                        200: {
+                            "content": {
+                                "application/json": {
+                                    "schema": {"type": "string"}
+                                }
+                            }
+                        }
+                    }
+                }
+            }
+        },
+        "components": {"schemas": schemas},
+    }
+
+
+TREE = {
+    "type": "object",
+    "required": ["name"],
+    "properties": {
+        "name": {"type": "string"},
+        "parent": {"$ref": "#/components/schemas/Tree"},
+        "children": {
+            "type": "array",
+            "items": {"$ref": "#/components/schemas/Tree"},
+        },
+    },
+}
+
+
+class ReferenceResolverTest(unittest.TestCase):
+    def test_references_point_at_definitions(self):
+        resolver = ReferenceResolver(
+            document({"Name": {"type": "string", "nullable": True}})
+        )
+
+        json_schema = resolver.resolve(
+            {
+                "type": "array",
+                "items": {"$ref": "#/components/schemas/Name"},
+            }
+        )
+
+        self.assertEqual(
+            json_schema["items"],
+            {"$ref": "#/definitions/components~1schemas~1Name"},
+        )
+        self.assertEqual(
+            json_schema["definitions"],
+            {"components/schemas/Name": {"type": ["string", "null"]}},
+        )
+
+    def test_any_local_pointer(self):
+        resolver = ReferenceResolver(document({}))
+
+        json_schema = resolver.resolve(
+            {
+                "$ref": "#/paths/~1items~1/get/responses/200/content/"
+                "application~1json/schema"
+            }
+        )
+
+        name = (
+            "paths/~1items~1/get/responses/200/content/"
+            "application~1json/schema"
+        )
+        self.assertEqual(
+            json_schema["definitions"], {name: {"type": "string"}}
+        )
+        self.assertEqual(
+            json_schema["$ref"],
+            "#/definitions/paths~1~01items~01~1get~1responses~1200~1"
+            "content~1application~01json~1schema",
+        )
+
+    def test_cyclic_references(self):
+        resolver = ReferenceResolver(document({"Tree": TREE}))
+
+        validator = compile_validator(
+            {"$ref": "#/components/schemas/Tree"}, resolver
+        )
+
+        self.assertEqual(
+            resolver.references,
+            {"/components/schemas/Tree": {"/components/schemas/Tree"}},
+        )
+        validator.validate(
+            {
+                "name": "leaf",
+                "parent": {"name": "root"},
+                "children": [{"name": "leaf", "children": []}],
+            }
+        )
+        with self.assertRaises(ValidationError):
+            validator.validate({"name": "root", "children": [{}]})
+
+    def test_mutually_recursive_references(self):
+        resolver = ReferenceResolver(
+            document(
+                {
+                    "A": {
+                        "properties": {
+                            "b": {"$ref": "#/components/schemas/B"}
+                        }
+                    },
+                    "B": {
+                        "type": "object",
+                        "properties": {
+                            "a": {"$ref": "#/components/schemas/A"}
+                        },
+                    },
+                }
+            )
+        )
+
+        json_schema = resolver.resolve(
+            {"$ref": "#/components/schemas/B"}
+        )
+
+        self.assertEqual(
+            sorted(json_schema["definitions"]),
+            ["components/schemas/A", "components/schemas/B"],
+        )
+        # Only the definitions a schema needs are included
+        self.assertNotIn(
+            "definitions", resolver.resolve({"type": "integer"})
+        )
+
+    def test_invalid_references(self):
+        resolver = ReferenceResolver(document({}))
+
+        for reference, message in [
+            ("other.yaml#/Item", "Only references within"),
+            ("#/components/schemas/Missing", "Unable to find"),
+            ("#/paths/~1items~1/get/responses/x", "Unable to find"),
+        ]:
+            with self.subTest(reference=reference):
+                with self.assertRaisesRegex(Exception, message):
+                    resolver.resolve({"$ref": reference})
+        self.assertEqual(resolver.references, {})
+
+    def test_failed_conversion_is_not_remembered(self):
+        schemas = {
+            "A": {
+                "properties": {"b": {"$ref": "#/components/schemas/B"}}
+            },
+            "B": {
+                "properties": {
+                    "a": {"$ref": "#/components/schemas/A"},
+                    "c": {"$ref": "#/components/schemas/C"},
+                }
+            },
+        }
+        resolver = ReferenceResolver(document(schemas))
+
+        for _attempt in range(2):
+            # The same error every time, rather than a KeyError for the
+            # half-converted nodes
+            with self.assertRaisesRegex(Exception, "Unable to find"):
+                resolver.resolve({"$ref": "#/components/schemas/A"})
+        self.assertEqual(resolver.references, {})
+        self.assertEqual(resolver.definitions, {})
+
+        schemas["C"] = {"type": "integer"}
+        json_schema = resolver.resolve(
+            {"$ref": "#/components/schemas/A"}
+        )
+        self.assertEqual(len(json_schema["definitions"]), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
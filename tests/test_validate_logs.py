@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""Tests for validating captured requests and responses."""
+
+import json
+import unittest
+from unittest import mock
+
+from open_api_tools.common.load_schema import load_schema
+from open_api_tools.test.validate_logs import validate_records
+
+SCHEMA = {
+    "openapi": "3.0.0",
+    "info": {"title": "Logs", "version": "1.0.0"},
+    "servers": [{"url": "http://localhost/api"}],
+    "paths": {
+        "/items/": {
+            "get": {
+                "responses": {
+                    200: {
+                        "description": "Items",
+                        "content": {
+                            "application/json": {
+                                "schema": {
+                                    "type": "array",
+                                    "items": {"type": "integer"},
+                                }
+                            }
+                        },
+                    },
+                    404: {"description": "Not found"},
+                }
+            }
+        },
+    },
+}
+
+
+def har_entry(status, text=None, mime_type=None):
+    """A HAR entry of a `GET /items/` request."""
+    content = {"size": len(text or "")}
+    if text is not None:
+        content["text"] = text
+    if mime_type is not None:
+        content["mimeType"] = mime_type
+    return {
+        "request": {
+            "method": "GET",
+            "url": "http://localhost/api/items/",
+            "headers": [],
+        },
+        "response": {
+            "status": status,
+            "headers": [],
+            "content": content,
+        },
+    }
+
+
+class ValidateRecordsTest(unittest.TestCase):
+    def setUp(self):
+        self.schema = load_schema(SCHEMA)
+        print_patcher = mock.patch("builtins.print")
+        print_patcher.start()
+        self.addCleanup(print_patcher.stop)
+
+    def test_response_without_content_schema(self):
+        result = validate_records(
+            self.schema,
+            [har_entry(404, ""), har_entry(404, "Not found")],
+            "har",
+        )
+
+        self.assertEqual(result.entries, {"GET /items/": 2})
+        self.assertEqual(
+            result.violations, {"GET /items/": {"invalid_response": 1}}
+        )
+        self.assertEqual(result.failed, 0)
+
+    def test_response_without_content_type(self):
+        result = validate_records(
+            self.schema, [har_entry(200, "[1, 2]")], "har"
+        )
+
+        self.assertEqual(
+            result.violations, {"GET /items/": {"invalid_response": 1}}
+        )
+        self.assertEqual(result.failed, 0)
+
+    def test_failing_record_does_not_stop_the_batch(self):
+        records = [
+            har_entry(200, "[1, 2]", "application/json"),
+            har_entry(200, "[1, 2]", "application/json"),
+        ]
+        validate_exchange = mock.Mock(
+            side_effect=[ValueError("broken"), "/items/"]
+        )
+        with mock.patch(
+            "open_api_tools.test.validate_logs.validate_exchange",
+            validate_exchange,
+        ):
+            result = validate_records(self.schema, records, "har")
+
+        self.assertEqual(result.entries, {"GET /items/": 1})
+        self.assertEqual(result.failed, 1)
+        self.assertIn("broken", result.failed_samples[0])
+
+    def test_failed_records_survive_serialization(self):
+        result = validate_records(
+            self.schema,
+            [har_entry(200, "[1]", "application/json")],
+            "har",
+        )
+        result.add_failed("broken")
+        restored = type(result).from_dict(
+            json.loads(json.dumps(result.to_dict()))
+        )
+        restored.merge(restored)
+
+        self.assertEqual(restored.failed, 2)
+        self.assertEqual(restored.failed_samples, ["broken", "broken"])
+
+
+if __name__ == "__main__":
+    unittest.main()